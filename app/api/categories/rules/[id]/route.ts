@@ -11,6 +11,7 @@ import { categoryRules } from '@/lib/db/schema';
 import { eq } from 'drizzle-orm';
 import { requireAuth } from '@/lib/auth/get-session';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from '@/lib/services/rule-index.service';
 
 const log = createLogger('categories-rules-detail');
 
@@ -150,6 +151,7 @@ export async function PATCH(
       updatedAt: dbUpdatedRule.updatedAt
     };
 
+    RuleIndexService.invalidate(dbUpdatedRule.companyId);
     log.info({ ruleId }, 'Rule updated');
 
     return NextResponse.json({
@@ -205,6 +207,7 @@ export async function DELETE(
       .delete(categoryRules)
       .where(eq(categoryRules.id, ruleId));
 
+    RuleIndexService.invalidate(existingRule.companyId);
     log.info({ ruleId }, 'Rule deleted');
 
     return NextResponse.json({
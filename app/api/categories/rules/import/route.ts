@@ -14,6 +14,7 @@ import { eq, and } from 'drizzle-orm';
 import type { RulesExport, ExportedRule, ExportedCategory } from '../export/route';
 import { requireAuth } from '@/lib/auth/get-session';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from '@/lib/services/rule-index.service';
 
 const log = createLogger('categories-rules-import');
 
@@ -201,6 +202,10 @@ export async function POST(request: NextRequest) {
       }
     }
 
+    if (!dryRun) {
+      RuleIndexService.invalidate(companyId);
+    }
+
     // 5. Retornar resultado
     return NextResponse.json({
       success: true,
@@ -3,6 +3,7 @@ import { db } from '@/lib/db/connection';
 import { categoryRules, categories, transactions } from '@/lib/db/schema';
 import { eq, and, ilike, desc, sql } from 'drizzle-orm';
 import CategoryRulesService from '@/lib/services/category-rules.service';
+import { RuleIndexService } from '@/lib/services/rule-index.service';
 import { requireAuth } from '@/lib/auth/get-session';
 import { createLogger } from '@/lib/logger';
 
@@ -40,6 +41,7 @@ export async function POST(request: NextRequest) {
           updatedAt: new Date()
         })
         .where(eq(categoryRules.id, ruleMatch.ruleId));
+      RuleIndexService.recordUse(ruleMatch.ruleId);
 
       suggestions.push({
         categoryId: ruleMatch.categoryId,
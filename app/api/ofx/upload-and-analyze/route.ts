@@ -370,17 +370,8 @@ export async function POST(request: NextRequest) {
     if (async) {
       log.info('Modo assincrono ativado - iniciando processamento em background');
 
-      // Iniciar processamento em background (não aguardar)
-      AsyncUploadProcessorService.startProcessing(
-        newUpload.id,
-        fileBuffer,
-        defaultAccount.id,
-        {
-          fileName: file.name,
-          bankName: parseResult.bankInfo?.bankName,
-          companyId: defaultCompany.id
-        }
-      ).catch(async (error) => {
+      // Enfileirar para os workers (não aguardar o processamento)
+      AsyncUploadProcessorService.startProcessing(newUpload.id).catch(async (error) => {
         log.error({ err: error }, 'Erro no processamento assincrono');
         try {
           await db
@@ -445,7 +436,7 @@ export async function POST(request: NextRequest) {
     log.info({ transactionCount: formattedTransactions.length }, 'Processando transacoes em batches...');
     let totalSuccessful = 0;
     let totalFailed = 0;
-    const batchSize = 15; // Mesmo batch size do serviço
+    const batchSize = batchService.getBatchSize(); // Mesmo batch size do serviço
 
     for (let i = 0; i < formattedTransactions.length; i += batchSize) {
       const batchNumber = Math.floor(i / batchSize) + 1;
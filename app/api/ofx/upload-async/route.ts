@@ -243,7 +243,7 @@ export async function POST(request: NextRequest) {
         },
         processingInfo: {
           status: 'pending',
-          estimatedTime: Math.ceil(parseResult.transactions.length / 15 * 2), // ~2 segundos por batch
+          estimatedTime: Math.ceil(parseResult.transactions.length / BatchProcessingService.getBatchSize() * 2), // ~2 segundos por batch
           progressUrl: `/api/uploads/${newUpload.id}/progress`,
           checkInterval: 2000 // Verificar progresso a cada 2 segundos
         },
@@ -297,7 +297,7 @@ async function processOFXAsync(
     }));
 
     // Processar em batches
-    const batchSize = 15;
+    const batchSize = batchService.getBatchSize();
     let totalSuccessful = 0;
     let totalFailed = 0;
 
@@ -376,7 +376,7 @@ export async function GET(_request: NextRequest) {
     ],
     features: [
       'Upload instantaneo (nao trava navegador)',
-      'Processamento em batches de 15 transacoes',
+      `Processamento em batches de ${BatchProcessingService.getBatchSize()} transacoes`,
       'Progresso em tempo real via API',
       'Retomada automatica em caso de falha',
       'Persistencia incremental',
@@ -8,18 +8,11 @@ import FileStorageService from '@/lib/storage/file-storage.service';
 import { createHash } from 'crypto';
 import { requireAuth } from '@/lib/auth/get-session';
 import { createLogger } from '@/lib/logger';
-import { TransactionData } from '@/lib/services/batch-processing.service';
+import BatchProcessingService, { TransactionData } from '@/lib/services/batch-processing.service';
+import AsyncUploadProcessorService from '@/lib/services/async-upload-processor.service';
 
 const log = createLogger('ofx-queue');
 
-// Importar sistema de filas se disponível
-let QueueService: { initialize: () => Promise<void>; addOFXProcessingJob: (uploadId: string, transactions: unknown[], context: Record<string, unknown>, options: Record<string, unknown>) => Promise<string>; getQueueStats: () => Promise<unknown> } | null = null;
-try {
-  // QueueService = require('@/lib/services/queue.service').default;
-} catch (error) {
-  log.info('[QUEUE] Sistema de filas nao disponivel, usando background processing');
-}
-
 export async function POST(request: NextRequest) {
   const startTime = Date.now();
 
@@ -189,31 +182,18 @@ export async function POST(request: NextRequest) {
     let processingMethod = 'background';
     let jobId: string | null = null;
 
-    if (QueueService) {
-      // MÉTODO 1: Sistema de Filas (Redis/BullMQ)
-      try {
-        await QueueService.initialize();
-        jobId = await QueueService.addOFXProcessingJob(
-          newUpload.id,
-          parseResult.transactions,
-          {
-            fileName: file.name,
-            bankName: parseResult.bankInfo?.bankName || targetAccount.bankName,
-            accountId: targetAccount.id,
-            companyId: defaultCompany.id
-          },
-          {
-            priority: 1 // Prioridade normal
-          }
-        );
-
-        processingMethod = 'queue';
-        log.info({ jobId }, '[QUEUE] Job adicionado a fila de processamento');
-
-      } catch (queueError) {
-        log.error({ err: queueError }, '[QUEUE] Falha ao adicionar job na fila, usando background processing');
-        processingMethod = 'background';
-      }
+    // MÉTODO 1: Fila persistente no Postgres (worker pool com SKIP LOCKED).
+    // Sempre enfileira: com UPLOAD_WORKER_ENABLED=false este nó só não consome
+    // a fila, e o upload é processado pelos workers de outro processo.
+    try {
+      await AsyncUploadProcessorService.startProcessing(newUpload.id);
+      jobId = newUpload.id;
+      processingMethod = 'queue';
+      log.info({ jobId }, '[QUEUE] Upload adicionado a fila de processamento');
+
+    } catch (queueError) {
+      log.error({ err: queueError }, '[QUEUE] Falha ao adicionar upload na fila, usando background processing');
+      processingMethod = 'background';
     }
 
     if (processingMethod === 'background') {
@@ -244,7 +224,7 @@ export async function POST(request: NextRequest) {
         processing: {
           method: processingMethod, // 'queue' ou 'background'
           status: 'pending',
-          estimatedTime: Math.ceil(parseResult.transactions.length / 15 * 2),
+          estimatedTime: Math.ceil(parseResult.transactions.length / BatchProcessingService.getBatchSize() * 2),
           progressUrl: `/api/uploads/${newUpload.id}/progress`
         },
         fileInfo: {
@@ -271,6 +251,7 @@ export async function POST(request: NextRequest) {
 }
 
 interface BatchService {
+  getBatchSize: () => number;
   prepareUploadForBatchProcessing: (uploadId: string, count: number) => Promise<void>;
   processBatch: (
     uploadId: string,
@@ -307,7 +288,7 @@ async function processOFXInBackground(
       balance: tx.balance
     }));
 
-    const batchSize = 15;
+    const batchSize = BatchServiceInstance.getBatchSize();
     let totalSuccessful = 0;
     let totalFailed = 0;
 
@@ -355,7 +336,9 @@ async function processOFXInBackground(
 
 export async function GET(_request: NextRequest) {
   await requireAuth();
-  const queueStats = QueueService ? await QueueService.getQueueStats() : null;
+  const queueStats = {
+    activeInThisProcess: AsyncUploadProcessorService.getQueueSize()
+  };
 
   return NextResponse.json({
     message: 'API de Upload com Sistema de Filas',
@@ -363,14 +346,16 @@ export async function GET(_request: NextRequest) {
     method: 'POST',
     processing: {
       queue: {
-        available: !!QueueService,
+        available: true,
+        // UPLOAD_WORKER_ENABLED=false: este nó só enfileira
+        workersInThisProcess: process.env.UPLOAD_WORKER_ENABLED !== 'false',
         stats: queueStats,
         features: [
           'Processos sobrevivem a restarts',
           'Multiplos workers paralelos',
           'Retentativas automaticas',
-          'Prioridade de jobs',
-          'Dashboard de monitoramento'
+          'Retomada a partir do ultimo indice processado',
+          'Justica entre empresas'
         ]
       },
       background: {
@@ -0,0 +1,96 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { initializeDatabase } from '@/lib/db/init-db';
+import DREService, { InvalidDrilldownCursorError } from '@/lib/services/dre.service';
+import { requireAuth } from '@/lib/auth/get-session';
+import { createLogger } from '@/lib/logger';
+
+const log = createLogger('reports-dre-drilldown');
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const UNCATEGORIZED_IDS = ['uncategorized-revenue', 'uncategorized-expense'];
+
+function isValidDate(value: string): boolean {
+  if (!DATE_PATTERN.test(value)) return false;
+  const date = new Date(`${value}T00:00:00Z`);
+  return !isNaN(date.getTime()) && date.toISOString().startsWith(value);
+}
+
+/**
+ * Transações de uma categoria do DRE, paginadas por cursor.
+ * O intervalo (startDate/endDate) é o mesmo devolvido pelo DRE.
+ */
+export async function GET(request: NextRequest) {
+  try {
+    const { companyId, userId } = await requireAuth();
+    await initializeDatabase();
+
+    const { searchParams } = new URL(request.url);
+    const categoryId = searchParams.get('categoryId');
+    const startDate = searchParams.get('startDate');
+    const endDate = searchParams.get('endDate');
+    const accountId = searchParams.get('accountId') || undefined;
+    const cursor = searchParams.get('cursor');
+    const limit = parseInt(searchParams.get('limit') || '25');
+
+    if (!categoryId || !startDate || !endDate) {
+      return NextResponse.json(
+        { success: false, error: 'categoryId, startDate e endDate são obrigatórios' },
+        { status: 400 }
+      );
+    }
+
+    if (!isValidDate(startDate) || !isValidDate(endDate) || startDate > endDate) {
+      return NextResponse.json(
+        { success: false, error: 'startDate e endDate devem ser datas YYYY-MM-DD, com startDate <= endDate' },
+        { status: 400 }
+      );
+    }
+
+    if (!UUID_PATTERN.test(categoryId) && !UNCATEGORIZED_IDS.includes(categoryId)) {
+      return NextResponse.json(
+        { success: false, error: 'categoryId inválido' },
+        { status: 400 }
+      );
+    }
+
+    if (accountId && accountId !== 'all' && !UUID_PATTERN.test(accountId)) {
+      return NextResponse.json(
+        { success: false, error: 'accountId inválido' },
+        { status: 400 }
+      );
+    }
+
+    const page = await DREService.getCategoryDrilldown({
+      categoryId,
+      startDate,
+      endDate,
+      accountId,
+      companyId,
+      userId,
+      cursor,
+      limit
+    });
+
+    return NextResponse.json({
+      success: true,
+      data: page
+    });
+  } catch (error) {
+    if (error instanceof InvalidDrilldownCursorError) {
+      return NextResponse.json(
+        { success: false, error: error.message },
+        { status: 400 }
+      );
+    }
+
+    log.error({ err: error }, 'Error fetching DRE drilldown');
+    return NextResponse.json(
+      {
+        success: false,
+        error: error instanceof Error ? error.message : 'Failed to fetch DRE drilldown'
+      },
+      { status: 500 }
+    );
+  }
+}
@@ -1,8 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { db } from '@/lib/db/connection';
 import { transactions, categoryRules, categories } from '@/lib/db/schema';
-import { eq, and, or, ilike, isNull, inArray } from 'drizzle-orm';
+import { eq, and, or, ilike, isNull, inArray, sql } from 'drizzle-orm';
 import { requireAuth } from '@/lib/auth/get-session';
+import { RuleIndexService } from '@/lib/services/rule-index.service';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('tx-rules-retroactive');
@@ -147,10 +148,11 @@ export async function POST(request: NextRequest) {
     await db
       .update(categoryRules)
       .set({
-        usageCount: (Number(categoryRules.usageCount) || 0) + updatedTransactions.length,
+        usageCount: sql`COALESCE(${categoryRules.usageCount}, 0) + ${updatedTransactions.length}`,
         updatedAt: new Date()
       })
       .where(eq(categoryRules.id, ruleId));
+    RuleIndexService.invalidate(companyId);
 
     log.info({ updated: updatedTransactions.length, newlyCategorized }, 'Regra aplicada retroativamente');
 
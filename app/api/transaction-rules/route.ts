@@ -5,6 +5,7 @@ import { eq, and, desc } from 'drizzle-orm';
 import { createHash } from 'crypto';
 import { requireAuth } from '@/lib/auth/get-session';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from '@/lib/services/rule-index.service';
 
 const log = createLogger('tx-rules');
 
@@ -126,6 +127,7 @@ export async function POST(request: NextRequest) {
       updatedAt: new Date()
     }).returning();
 
+    RuleIndexService.invalidate(companyId);
     log.info({ ruleId: newRule.id }, 'Regra criada');
 
     // Retornar regra com informações da categoria
@@ -184,6 +186,7 @@ export async function PUT(request: NextRequest) {
       }, { status: 404 });
     }
 
+    RuleIndexService.invalidate(updatedRule.companyId);
     log.info({ ruleId }, 'Regra atualizada');
 
     return NextResponse.json({
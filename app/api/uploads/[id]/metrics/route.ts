@@ -0,0 +1,42 @@
+import { NextRequest, NextResponse } from 'next/server';
+import BatchProcessingService from '@/lib/services/batch-processing.service';
+import { requireAuth } from '@/lib/auth/get-session';
+import { createLogger } from '@/lib/logger';
+
+const log = createLogger('uploads-metrics');
+
+/**
+ * Métricas do pipeline de categorização de um upload: latência por camada,
+ * queries ao banco e razões de acerto (cache/regras/histórico/IA)
+ */
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  try {
+    const { companyId } = await requireAuth();
+    const { id: uploadId } = await params;
+
+    const metrics = await BatchProcessingService.getUploadMetrics(uploadId, companyId);
+
+    if (!metrics) {
+      return NextResponse.json({
+        success: false,
+        error: 'Upload não encontrado'
+      }, { status: 404 });
+    }
+
+    return NextResponse.json({
+      success: true,
+      data: metrics
+    });
+
+  } catch (error) {
+    log.error({ err: error }, 'Error querying upload metrics');
+
+    return NextResponse.json({
+      success: false,
+      error: error instanceof Error ? error.message : 'Erro interno do servidor'
+    }, { status: 500 });
+  }
+}
@@ -251,6 +251,7 @@ export default function ReportsPage() {
               <DREStatement
                 data={dreData?.current}
                 previousPeriod={dreData?.comparison}
+                accountId={filters.accountId}
                 onExport={(format) => handleExport(format, 'dre')}
               />
             ) : (
@@ -20,17 +20,97 @@ import {
   TooltipProvider,
   TooltipTrigger,
 } from "@/components/ui/tooltip"
-import { DREStatement, DRECategory } from '@/lib/types';
+import { DREStatement } from '@/lib/types';
+import { useDREDrilldown } from '@/hooks/use-reports';
 
 interface DREStatementProps {
   data: DREStatement;
   previousPeriod?: DREStatement;
+  accountId?: string;
   onExport?: (format: 'pdf' | 'excel') => void;
 }
 
+const formatCurrency = (value: number) => {
+  return new Intl.NumberFormat('pt-BR', {
+    style: 'currency',
+    currency: 'BRL'
+  }).format(value);
+};
+
+interface CategoryDrilldownProps {
+  categoryId: string;
+  startDate?: string;
+  endDate?: string;
+  accountId?: string;
+  compact?: boolean;
+}
+
+/**
+ * Transações de uma categoria, buscadas só quando a categoria é expandida
+ */
+function CategoryDrilldown({ categoryId, startDate, endDate, accountId, compact = false }: CategoryDrilldownProps) {
+  const {
+    transactions,
+    isLoading,
+    hasError,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage
+  } = useDREDrilldown({ categoryId, startDate, endDate, accountId });
+
+  if (isLoading) {
+    return <div className="text-sm text-muted-foreground py-2">Carregando transações...</div>;
+  }
+
+  if (hasError) {
+    return <div className="text-sm text-destructive py-2">Erro ao carregar transações</div>;
+  }
+
+  if (transactions.length === 0) {
+    return <div className="text-sm text-muted-foreground py-2">Nenhuma transação no período</div>;
+  }
+
+  return (
+    <div className="space-y-2">
+      {transactions.map((transaction) => (
+        <div
+          key={transaction.id}
+          className={`flex justify-between items-center text-sm ${compact ? 'py-1 border-b border-border/50' : 'py-2 border-b border-border'} last:border-0`}
+        >
+          <div>
+            <div className="font-medium">{transaction.description}</div>
+            <div className={`text-muted-foreground ${compact ? 'text-xs' : ''}`}>
+              {new Date(transaction.date + 'T12:00:00').toLocaleDateString('pt-BR')}
+            </div>
+          </div>
+          <span className={`${transaction.type === 'income' ? 'text-success' : 'text-destructive'} whitespace-nowrap`}>
+            {transaction.type === 'income' ? '+' : '-'}{formatCurrency(transaction.amount)}
+          </span>
+        </div>
+      ))}
+      {hasNextPage && (
+        <div className="text-center py-1">
+          <Button
+            variant="ghost"
+            size="sm"
+            disabled={isFetchingNextPage}
+            onClick={(e) => {
+              e.stopPropagation();
+              fetchNextPage();
+            }}
+          >
+            {isFetchingNextPage ? 'Carregando...' : 'Carregar mais'}
+          </Button>
+        </div>
+      )}
+    </div>
+  );
+}
+
 export default function DREStatementComponent({
   data,
   previousPeriod,
+  accountId,
   onExport
 }: DREStatementProps) {
   const [expandedCategories, setExpandedCategories] = useState<string[]>([]);
@@ -43,13 +123,6 @@ export default function DREStatementComponent({
     );
   };
 
-  const formatCurrency = (value: number) => {
-    return new Intl.NumberFormat('pt-BR', {
-      style: 'currency',
-      currency: 'BRL'
-    }).format(value);
-  };
-
   const formatPercentage = (value: number) => {
     return `${value.toFixed(1)}%`;
   };
@@ -146,44 +219,49 @@ export default function DREStatementComponent({
               Detalhamento por Categoria
             </h4>
             <div className="space-y-3">
-              {lineDetails.map((item) => (
-                <div key={item.label} className="border-b border-border pb-3 last:border-0">
-                  <div className="flex justify-between items-center mb-2">
-                    <span className="font-medium">{item.label}</span>
-                    <span className={item.value >= 0 ? 'text-success' : 'text-destructive'}>
-                      {item.value >= 0 ? '+' : ''}{formatCurrency(item.value)}
-                    </span>
-                  </div>
-                  {item.drilldown && item.drilldown.length > 0 && (
-                    <div className="space-y-2 ml-4">
-                      <div className="text-sm text-muted-foreground">
-                        Transações ({item.drilldown.length}):
+              {lineDetails.map((item) => {
+                const itemKey = `${lineKey}-${item.categoryId}`;
+                const isItemExpanded = expandedCategories.includes(itemKey);
+
+                return (
+                  <div key={item.categoryId} className="border-b border-border pb-3 last:border-0">
+                    <div
+                      className={`flex justify-between items-center mb-2 ${item.transactions > 0 ? 'cursor-pointer' : ''}`}
+                      onClick={() => {
+                        if (item.transactions > 0) {
+                          toggleCategory(itemKey);
+                        }
+                      }}
+                    >
+                      <div className="flex items-center gap-2">
+                        {item.transactions > 0 && (
+                          isItemExpanded ? (
+                            <ChevronDown className="w-3 h-3 text-muted-foreground" />
+                          ) : (
+                            <ChevronRight className="w-3 h-3 text-muted-foreground" />
+                          )
+                        )}
+                        <span className="font-medium">{item.label}</span>
+                        <span className="text-xs text-muted-foreground">({item.transactions})</span>
                       </div>
-                      {item.drilldown.slice(0, 5).map((transaction: any) => (
-                        <div
-                          key={transaction.id}
-                          className="flex justify-between items-center text-sm py-1 border-b border-border/50 last:border-0"
-                        >
-                          <div>
-                            <div className="font-medium">{transaction.description}</div>
-                            <div className="text-muted-foreground text-xs">
-                              {new Date(transaction.date).toLocaleDateString('pt-BR')}
-                            </div>
-                          </div>
-                          <span className={`${transaction.type === 'income' ? 'text-success' : 'text-destructive'} whitespace-nowrap`}>
-                            {transaction.type === 'income' ? '+' : '-'}{formatCurrency(transaction.amount)}
-                          </span>
-                        </div>
-                      ))}
-                      {item.drilldown.length > 5 && (
-                        <div className="text-sm text-muted-foreground text-center py-1">
-                          ... e mais {item.drilldown.length - 5} transações
-                        </div>
-                      )}
+                      <span className={item.value >= 0 ? 'text-success' : 'text-destructive'}>
+                        {item.value >= 0 ? '+' : ''}{formatCurrency(item.value)}
+                      </span>
                     </div>
-                  )}
-                </div>
-              ))}
+                    {isItemExpanded && (
+                      <div className="ml-4">
+                        <CategoryDrilldown
+                          categoryId={item.categoryId}
+                          startDate={data.startDate}
+                          endDate={data.endDate}
+                          accountId={accountId}
+                          compact
+                        />
+                      </div>
+                    )}
+                  </div>
+                );
+              })}
             </div>
           </div>
         )}
@@ -439,34 +517,17 @@ export default function DREStatementComponent({
                       </div>
                     </div>
 
-                    {expandedCategories.includes(category.name) && category.drilldown && (
+                    {expandedCategories.includes(category.name) && (
                       <div className="border-t border-border bg-muted p-4 max-h-64 overflow-y-auto">
                         <h4 className="font-medium mb-3 text-sm">
-                          Transações ({category.drilldown.length})
+                          Transações ({category.transactions || 0})
                         </h4>
-                        <div className="space-y-2">
-                          {category.drilldown.slice(0, 10).map((transaction: any) => (
-                            <div
-                              key={transaction.id}
-                              className="flex justify-between items-center text-sm py-2 border-b border-border last:border-0"
-                            >
-                              <div>
-                                <div className="font-medium">{transaction.description}</div>
-                                <div className="text-muted-foreground">
-                                  {new Date(transaction.date).toLocaleDateString('pt-BR')}
-                                </div>
-                              </div>
-                              <span className={`${transaction.type === 'income' ? 'text-success' : 'text-destructive'} whitespace-nowrap`}>
-                                {transaction.type === 'income' ? '+' : '-'}{formatCurrency(transaction.amount)}
-                              </span>
-                            </div>
-                          ))}
-                          {category.drilldown.length > 10 && (
-                            <div className="text-sm text-muted-foreground text-center py-2">
-                              ... e mais {category.drilldown.length - 10} transações
-                            </div>
-                          )}
-                        </div>
+                        <CategoryDrilldown
+                          categoryId={category.id}
+                          startDate={data.startDate}
+                          endDate={data.endDate}
+                          accountId={accountId}
+                        />
                       </div>
                     )}
                   </CardContent>
@@ -1,8 +1,8 @@
 'use client';
 
-import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useQueryClient, useInfiniteQuery } from '@tanstack/react-query';
 import { useMemo, useCallback } from 'react';
-import { DREStatement, CashFlowReport, Insight, CategoryRule, ReportPeriod } from '@/lib/types';
+import { DREStatement, DREDrilldownPage, CashFlowReport, Insight, CategoryRule, ReportPeriod } from '@/lib/types';
 
 export interface ReportsFilters {
   period?: string;
@@ -77,6 +77,70 @@ export function useDREStatement(
   };
 }
 
+/**
+ * Hook para o drilldown de uma categoria do DRE (carregado sob demanda, por páginas)
+ */
+export function useDREDrilldown(
+  params: { categoryId: string; startDate?: string; endDate?: string; accountId?: string },
+  options: UseReportsOptions = {}
+) {
+  const {
+    data,
+    isLoading,
+    error,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
+    queryKey: ['dre-drilldown', params],
+    queryFn: async ({ pageParam }): Promise<DREDrilldownPage> => {
+      const searchParams = new URLSearchParams({
+        categoryId: params.categoryId,
+        startDate: params.startDate || '',
+        endDate: params.endDate || '',
+      });
+
+      if (params.accountId && params.accountId !== 'all') searchParams.append('accountId', params.accountId);
+      if (pageParam) searchParams.append('cursor', pageParam);
+
+      const response = await fetch(`/api/reports/dre/drilldown?${searchParams.toString()}`);
+
+      if (!response.ok) {
+        throw new Error(`Erro ao buscar transações da categoria: ${response.statusText}`);
+      }
+
+      const result = await response.json();
+
+      if (!result.success) {
+        throw new Error(result.error || 'Erro desconhecido ao buscar transações da categoria');
+      }
+
+      return result.data;
+    },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
+    staleTime: 1000 * 60 * 10, // 10 minutos
+    gcTime: 1000 * 60 * 30, // 30 minutos
+    enabled: options.enabled !== false && !!params.startDate && !!params.endDate,
+    retry: 2,
+  });
+
+  const transactions = useMemo(() => {
+    if (!data) return [];
+    return data.pages.flatMap(page => page.transactions);
+  }, [data]);
+
+  return {
+    transactions,
+    isLoading,
+    error,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+    hasError: !!error,
+  };
+}
+
 /**
  * Hook para buscar DRE com comparação entre períodos
  */
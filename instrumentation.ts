@@ -0,0 +1,13 @@
+/**
+ * Hook de inicialização do Next.js (executado uma vez por processo)
+ *
+ * Sobe o pool de workers da fila de uploads para retomar uploads
+ * enfileirados ou interrompidos por um restart.
+ * UPLOAD_WORKER_ENABLED=false desativa (ex: nós que só servem a UI).
+ */
+export async function register() {
+  if (process.env.NEXT_RUNTIME === 'nodejs') {
+    const { default: asyncUploadProcessor } = await import('@/lib/services/async-upload-processor.service');
+    asyncUploadProcessor.start();
+  }
+}
@@ -0,0 +1,121 @@
+/**
+ * Limitador adaptativo de chamadas ao provedor de IA
+ *
+ * Controla quantas chamadas ficam em voo ao mesmo tempo (AIMD):
+ * - cada sucesso aumenta o limite em 1/limite (≈ +1 a cada "janela" cheia)
+ * - cada 429 divide o limite pela metade e pausa novas chamadas pelo
+ *   tempo sugerido pelo provedor
+ *
+ * Compartilhado por todo o processo: uploads concorrentes disputam o mesmo
+ * orçamento em vez de cada um martelar o provedor isoladamente.
+ */
+
+export interface AdaptiveRateLimiterConfig {
+  initialConcurrency: number;
+  minConcurrency: number;
+  maxConcurrency: number;
+  // Pausa mínima após um 429 sem retry-after
+  cooldownMs: number;
+}
+
+export interface AdaptiveRateLimiterStats {
+  limit: number;
+  inFlight: number;
+  waiting: number;
+  rateLimited: number;
+  pausedUntil: number | null;
+}
+
+export class AdaptiveRateLimiter {
+  private limit: number;
+  private inFlight = 0;
+  private waiting: Array<() => void> = [];
+  private pausedUntil = 0;
+  private pauseTimer: ReturnType<typeof setTimeout> | null = null;
+  private rateLimited = 0;
+
+  constructor(private config: AdaptiveRateLimiterConfig) {
+    this.limit = config.initialConcurrency;
+  }
+
+  /**
+   * Aguarda uma vaga. Retorna a função que libera a vaga (chamar sempre, em finally).
+   */
+  async acquire(): Promise<() => void> {
+    if (this.waiting.length === 0 && this.canStart()) {
+      this.inFlight++;
+    } else {
+      // A vaga é reservada por drain() antes de acordar a chamada
+      await new Promise<void>(resolve => {
+        this.waiting.push(resolve);
+        this.drain();
+      });
+    }
+
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      this.inFlight--;
+      this.drain();
+    };
+  }
+
+  /**
+   * Chamada concluída sem rate limit: aumento aditivo
+   */
+  onSuccess(): void {
+    if (this.limit < this.config.maxConcurrency) {
+      this.limit = Math.min(this.config.maxConcurrency, this.limit + 1 / Math.floor(this.limit));
+      this.drain();
+    }
+  }
+
+  /**
+   * Provedor respondeu 429: redução multiplicativa + pausa global
+   */
+  onRateLimit(retryAfterMs = 0): void {
+    this.rateLimited++;
+    this.limit = Math.max(this.config.minConcurrency, Math.floor(this.limit / 2));
+    this.pausedUntil = Math.max(this.pausedUntil, Date.now() + Math.max(retryAfterMs, this.config.cooldownMs));
+  }
+
+  getStats(): AdaptiveRateLimiterStats {
+    return {
+      limit: Math.floor(this.limit),
+      inFlight: this.inFlight,
+      waiting: this.waiting.length,
+      rateLimited: this.rateLimited,
+      pausedUntil: this.pausedUntil > Date.now() ? this.pausedUntil : null
+    };
+  }
+
+  private canStart(): boolean {
+    return this.inFlight < Math.floor(this.limit) && Date.now() >= this.pausedUntil;
+  }
+
+  private drain(): void {
+    while (this.waiting.length > 0 && this.canStart()) {
+      this.inFlight++;
+      this.waiting.shift()!();
+    }
+
+    const pausedFor = this.pausedUntil - Date.now();
+    if (this.waiting.length > 0 && pausedFor > 0 && !this.pauseTimer) {
+      this.pauseTimer = setTimeout(() => {
+        this.pauseTimer = null;
+        this.drain();
+      }, pausedFor);
+    }
+  }
+}
+
+/**
+ * Limitador global das chamadas de completion (configurável por env)
+ */
+export const llmRateLimiter = new AdaptiveRateLimiter({
+  initialConcurrency: parseInt(process.env.AI_INITIAL_CONCURRENCY || '4', 10),
+  minConcurrency: 1,
+  maxConcurrency: parseInt(process.env.AI_MAX_CONCURRENCY || '16', 10),
+  cooldownMs: 1000
+});
@@ -4,6 +4,7 @@
  */
 
 import { aiCostLogger, type AiUsageLogInput } from '../services/ai-cost-logger.service';
+import { llmRateLimiter } from './adaptive-rate-limiter';
 
 export type AIProvider = 'openrouter' | 'openai';
 
@@ -168,23 +169,32 @@ export class AIProviderService {
     let lastError: Error | null = null;
 
     for (let attempt = 0; attempt < maxRetries; attempt++) {
+      // Limitador adaptativo compartilhado: segura a chamada se o provedor estiver saturado
+      const release = await llmRateLimiter.acquire();
       try {
-        return await this.complete(options);
+        const response = await this.complete(options);
+        llmRateLimiter.onSuccess();
+        return response;
       } catch (error) {
+        // Libera a vaga antes do backoff
+        release();
         lastError = error as Error;
         const errorMessage = error instanceof Error ? error.message : String(error);
 
         // Verificar se é erro de rate limit (429)
         const isRateLimit = errorMessage.includes('429') || errorMessage.includes('rate_limit');
 
+        // Extrair tempo de espera sugerido pela API
+        const retryAfter = isRateLimit ? this.extractRetryAfter(errorMessage) : 0;
+        if (isRateLimit) {
+          llmRateLimiter.onRateLimit(retryAfter);
+        }
+
         if (!isRateLimit || attempt === maxRetries - 1) {
           // Não é rate limit ou última tentativa - lançar erro
           throw error;
         }
 
-        // Extrair tempo de espera sugerido pela API
-        const retryAfter = this.extractRetryAfter(errorMessage);
-
         // Usar tempo sugerido ou exponential backoff
         const waitTime = retryAfter > 0
           ? retryAfter + 500 // tempo sugerido + 500ms de buffer
@@ -197,6 +207,8 @@ export class AIProviderService {
 
         // Aguardar antes de tentar novamente
         await new Promise(resolve => setTimeout(resolve, waitTime));
+      } finally {
+        release();
       }
     }
 
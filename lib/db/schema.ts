@@ -1,4 +1,5 @@
-import { pgTable, uuid, varchar, timestamp, decimal, integer, boolean, text, json, index, unique, date, PgColumn } from 'drizzle-orm/pg-core';
+import { pgTable, uuid, varchar, timestamp, decimal, integer, boolean, text, json, index, uniqueIndex, unique, date, PgColumn } from 'drizzle-orm/pg-core';
+import { sql } from 'drizzle-orm';
 
 // Empresas
 export const companies = pgTable('financeai_companies', {
@@ -89,6 +90,12 @@ export const uploads = pgTable('financeai_uploads', {
   currentBatch: integer('current_batch').default(0),
   totalBatches: integer('total_batches').default(0),
   lastProcessedIndex: integer('last_processed_index').default(0), // Para retomada
+  // Fila de processamento assíncrono (worker pool com FOR UPDATE SKIP LOCKED)
+  queuedAt: timestamp('queued_at'), // Preenchido quando o upload entra na fila
+  workerId: varchar('worker_id', { length: 100 }), // Worker que detém o upload
+  heartbeatAt: timestamp('heartbeat_at'), // Último sinal de vida do worker
+  attempts: integer('attempts').default(0),
+  nextAttemptAt: timestamp('next_attempt_at'), // Backoff: não reivindicar antes disso
   uploadedAt: timestamp('uploaded_at').defaultNow(),
   processedAt: timestamp('processed_at'),
   createdAt: timestamp('created_at').defaultNow()
@@ -96,7 +103,8 @@ export const uploads = pgTable('financeai_uploads', {
   companyIdIdx: index('idx_uploads_company_id').on(table.companyId),
   accountIdIdx: index('idx_uploads_account_id').on(table.accountId),
   statusIdx: index('idx_uploads_status').on(table.status),
-  uploadedAtIdx: index('idx_uploads_uploaded_at').on(table.uploadedAt)
+  uploadedAtIdx: index('idx_uploads_uploaded_at').on(table.uploadedAt),
+  queueIdx: index('idx_uploads_queue').on(table.status, table.queuedAt)
 }));
 
 // Controle de processamento em batches
@@ -115,7 +123,9 @@ export const processingBatches = pgTable('financeai_processing_batches', {
 }, (table) => ({
   uploadIdIdx: index('idx_processing_batches_upload_id').on(table.uploadId),
   statusIdx: index('idx_processing_batches_status').on(table.status),
-  batchNumberIdx: index('idx_processing_batches_batch_number').on(table.batchNumber)
+  batchNumberIdx: index('idx_processing_batches_batch_number').on(table.batchNumber),
+  // Um batch por (upload, número): alvo do upsert de BatchProcessingService.saveBatch
+  uploadBatchIdx: uniqueIndex('idx_processing_batches_upload_batch').on(table.uploadId, table.batchNumber)
 }));
 
 // Transações financeiras
@@ -125,6 +135,8 @@ export const transactions = pgTable('financeai_transactions', {
   categoryId: uuid('category_id').references(() => categories.id, { onDelete: 'set null' }),
   uploadId: uuid('upload_id').references(() => uploads.id, { onDelete: 'set null' }),
   description: text('description').notNull(),
+  // Descrição normalizada para busca por similaridade (pg_trgm), mantida pelo banco
+  normalizedDescription: text('normalized_description').generatedAlwaysAs(sql`financeai_normalize_description(description)`),
   name: text('name'), // Nome do beneficiário/estabelecimento do OFX (opcional)
   memo: text('memo'), // Memo/detalhes adicionais do OFX (opcional)
   amount: decimal('amount', { precision: 15, scale: 2 }).notNull(),
@@ -160,7 +172,9 @@ export const transactions = pgTable('financeai_transactions', {
   dateTypeIdx: index('idx_transactions_date_type').on(table.transactionDate, table.type),
   dateAmountIdx: index('idx_transactions_date_amount').on(table.transactionDate.desc()),
   accountDateIdx: index('idx_transactions_account_date').on(table.accountId, table.transactionDate.desc()),
-  categoryDateIdx: index('idx_transactions_category_date').on(table.categoryId, table.transactionDate.desc())
+  categoryDateIdx: index('idx_transactions_category_date').on(table.categoryId, table.transactionDate.desc()),
+  // Busca por similaridade de descrição (histórico, clustering)
+  normalizedDescriptionTrgmIdx: index('idx_transactions_normalized_description_trgm').using('gin', table.normalizedDescription.op('gin_trgm_ops'))
 }));
 
 // Usuários
@@ -264,7 +278,8 @@ export const transactionClusters = pgTable('financeai_transaction_clusters', {
   companyIdIdx: index('idx_transaction_clusters_company_id').on(table.companyId),
   categoryIdIdx: index('idx_transaction_clusters_category_id').on(table.categoryId),
   statusIdx: index('idx_transaction_clusters_status').on(table.status),
-  createdAtIdx: index('idx_transaction_clusters_created_at').on(table.createdAt)
+  createdAtIdx: index('idx_transaction_clusters_created_at').on(table.createdAt),
+  centroidTrgmIdx: index('idx_transaction_clusters_centroid_trgm').using('gin', table.centroidDescription.op('gin_trgm_ops'))
 }));
 
 // Preços dos modelos de IA
@@ -365,6 +380,27 @@ export const transactionSplits = pgTable('financeai_transaction_splits', {
   categoryIdIdx: index('idx_transaction_splits_category_id').on(table.categoryId)
 }));
 
+// Agregados mensais de transações (empresa × conta × categoria × mês × tipo)
+// Mantida por triggers em financeai_transactions e financeai_transaction_splits
+// (scripts/apply-monthly-aggregates-migration.ts). Splits já vêm aplicados: a
+// categoria/valor de uma transação desmembrada são os dos seus splits.
+export const transactionMonthlyAggregates = pgTable('financeai_transaction_monthly_aggregates', {
+  id: uuid('id').primaryKey().defaultRandom(),
+  companyId: uuid('company_id').references(() => companies.id, { onDelete: 'cascade' }),
+  accountId: uuid('account_id').references(() => accounts.id, { onDelete: 'cascade' }).notNull(),
+  categoryId: uuid('category_id'), // Sem FK: recalculado pelo trigger quando a categoria some
+  month: date('month').notNull(), // Primeiro dia do mês
+  type: varchar('type', { length: 10 }).notNull(), // credit, debit
+  balanceSnapshot: boolean('balance_snapshot').default(false).notNull(), // Descrição de snapshot de saldo (SALDO TOTAL, etc)
+  totalAmount: decimal('total_amount', { precision: 18, scale: 2 }).notNull().default('0'), // Soma com sinal
+  absAmount: decimal('abs_amount', { precision: 18, scale: 2 }).notNull().default('0'), // Soma de ABS(amount)
+  transactionCount: integer('transaction_count').notNull().default(0),
+  updatedAt: timestamp('updated_at').defaultNow()
+}, (table) => ({
+  companyMonthIdx: index('idx_monthly_aggregates_company_month').on(table.companyId, table.month),
+  accountMonthIdx: index('idx_monthly_aggregates_account_month').on(table.accountId, table.month)
+}));
+
 // Export types
 export type Company = typeof companies.$inferSelect;
 export type NewCompany = typeof companies.$inferInsert;
@@ -412,3 +448,5 @@ export type Projection = typeof projections.$inferSelect;
 export type NewProjection = typeof projections.$inferInsert;
 export type TransactionSplit = typeof transactionSplits.$inferSelect;
 export type NewTransactionSplit = typeof transactionSplits.$inferInsert;
+
+export type TransactionMonthlyAggregate = typeof transactionMonthlyAggregates.$inferSelect;
@@ -115,6 +115,143 @@ export async function parseOFXFile(ofxContent: string): Promise<OFXParseResult>
   }
 }
 
+// Fonte de bytes/texto para o leitor incremental (ex: fs.createReadStream, Body do S3)
+export type OFXSource = AsyncIterable<Uint8Array | string>;
+
+const STMTTRN_OPEN = /<STMTTRN>/i;
+const STMTTRN_CLOSE = /<\/STMTTRN>/i;
+// Maior tag procurada, para não perder uma tag dividida entre dois chunks
+const MAX_TAG_LENGTH = '</STMTTRN>'.length;
+
+/**
+ * Leitor incremental de OFX (SGML ou XML)
+ *
+ * Lê a fonte em chunks e emite cada bloco <STMTTRN> como transação assim
+ * que ele fecha, sem montar o arquivo inteiro em memória nem o array de
+ * transações. O texto fora dos blocos (cabeçalho, conta, saldos) é pequeno
+ * e fica guardado para extrair bankInfo e saldo com as mesmas regras de
+ * parseOFXFile.
+ *
+ * Diferente de parseOFXFile, as transações saem na ordem do arquivo (sem
+ * ordenação por data). bankInfo fica disponível a partir da primeira
+ * transação emitida; balance, startDate e endDate ao final da iteração.
+ *
+ * Uso:
+ *   const reader = new OFXStreamReader(fs.createReadStream(path));
+ *   for await (const tx of reader) { ... }
+ *   reader.balance
+ */
+export class OFXStreamReader implements AsyncIterable<OFXTransaction> {
+  bankInfo?: OFXBankInfo;
+  balance?: OFXBalance;
+  startDate?: string;
+  endDate?: string;
+  count = 0;
+  bytesRead = 0;
+
+  private envelope = '';
+  private consumed = false;
+
+  constructor(private source: OFXSource, private encoding = 'utf-8') {}
+
+  async *[Symbol.asyncIterator](): AsyncGenerator<OFXTransaction> {
+    if (this.consumed) {
+      throw new Error('OFXStreamReader só pode ser iterado uma vez');
+    }
+    this.consumed = true;
+
+    const decoder = new TextDecoder(this.encoding);
+    let buffer = '';
+    let inTransaction = false;
+    // Posição a partir da qual procurar o fechamento (evita reescanear o bloco)
+    let searchFrom = 0;
+
+    const drain = function* (this: OFXStreamReader, final: boolean): Generator<OFXTransaction> {
+      while (true) {
+        if (!inTransaction) {
+          const open = STMTTRN_OPEN.exec(buffer);
+          if (!open) {
+            // Guarda o envelope, mantendo o final caso uma tag esteja dividida
+            const keep = final ? 0 : Math.min(buffer.length, MAX_TAG_LENGTH);
+            this.envelope += buffer.slice(0, buffer.length - keep);
+            buffer = buffer.slice(buffer.length - keep);
+            return;
+          }
+          this.envelope += buffer.slice(0, open.index);
+          buffer = buffer.slice(open.index);
+          inTransaction = true;
+          searchFrom = 0;
+
+          if (!this.bankInfo) {
+            this.bankInfo = extractBankInfo(normalizeOFXText(this.envelope));
+          }
+        }
+
+        const rest = buffer.slice(searchFrom);
+        const close = STMTTRN_CLOSE.exec(rest);
+        if (!close) {
+          searchFrom = Math.max(0, buffer.length - MAX_TAG_LENGTH);
+          if (final) {
+            // Bloco sem fechamento: parseOFXFile também o ignora
+            this.envelope += buffer;
+            buffer = '';
+          }
+          return;
+        }
+
+        const end = searchFrom + close.index + close[0].length;
+        const transaction = this.parseBlock(buffer.slice(0, end));
+        buffer = buffer.slice(end);
+        inTransaction = false;
+        if (transaction) yield transaction;
+      }
+    };
+
+    for await (const chunk of this.source) {
+      if (typeof chunk === 'string') {
+        buffer += chunk;
+        this.bytesRead += chunk.length;
+      } else {
+        buffer += decoder.decode(chunk, { stream: true });
+        this.bytesRead += chunk.byteLength;
+      }
+      yield* drain.call(this, false);
+    }
+
+    buffer += decoder.decode();
+    yield* drain.call(this, true);
+
+    const envelope = normalizeOFXText(this.envelope);
+    if (!this.bankInfo) {
+      this.bankInfo = extractBankInfo(envelope);
+    }
+    this.balance = extractLedgerBalance(envelope) || undefined;
+    this.envelope = '';
+
+    log.info({ count: this.count, bytes: this.bytesRead, startDate: this.startDate, endDate: this.endDate }, 'OFX lido em streaming');
+  }
+
+  private parseBlock(block: string): OFXTransaction | null {
+    try {
+      const transaction = parseTransactionBlock(normalizeOFXText(block));
+      if (!transaction) return null;
+
+      this.count++;
+      if (!this.startDate || transaction.date < this.startDate) this.startDate = transaction.date;
+      if (!this.endDate || transaction.date > this.endDate) this.endDate = transaction.date;
+      return transaction;
+    } catch (error) {
+      log.warn({ err: error }, 'Erro ao processar bloco de transação');
+      return null;
+    }
+  }
+}
+
+// Mesma normalização de espaços aplicada por parseOFXFile
+function normalizeOFXText(text: string): string {
+  return text.replace(/\s+/g, ' ').trim();
+}
+
 // Mapeamento FID → Nome do banco
 const BANK_FID_MAP: Record<string, string> = {
   '001': 'Banco do Brasil',
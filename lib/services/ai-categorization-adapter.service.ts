@@ -6,6 +6,12 @@
  *
  * NOVO: Integra serviço de enriquecimento de descrições para
  * fornecer contexto adicional sobre termos bancários obscuros.
+ *
+ * Modo lote: chamadas concorrentes de categorize() (ex: chunks paralelos do
+ * BatchProcessingService) são agrupadas numa janela curta e enviadas à IA
+ * num único prompt estruturado. Descrições normalizadas idênticas são
+ * enviadas uma vez só e o resultado é mapeado de volta pelo índice.
+ * Itens que não vierem no JSON de resposta caem na chamada individual.
  */
 
 import type { AICategorizationService, TransactionContext } from './transaction-categorization.service';
@@ -14,6 +20,7 @@ import CategoriesService from '@/lib/services/categories.service';
 import { filterCategoriesByTransactionType } from '@/lib/utils/category-filter';
 import { descriptionEnrichmentService, type EnrichedDescription } from './description-enrichment.service';
 import { searchCompanyInfo, searchByCNPJ, ProcessedSearchResult } from '@/lib/tools/duckduckgo-search.tool';
+import { measureStage, countDbQuery } from './categorization-metrics';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('ai-categorization');
@@ -21,6 +28,8 @@ const log = createLogger('ai-categorization');
 // Cache de categorias do banco para evitar múltiplas consultas
 let cachedCategories: Array<{name: string; type: string}> = [];
 let categoriesCacheTime = 0;
+// Consulta em andamento (chamadas paralelas compartilham a mesma)
+let categoriesLoading: Promise<Array<{name: string; type: string}>> | null = null;
 const CACHE_DURATION = 5 * 60 * 1000; // 5 minutos
 
 // Configuração dos modelos com sistema de fallback
@@ -29,6 +38,17 @@ const AI_MODELS = {
   fallback: process.env.AI_MODEL_FALLBACK || 'openai/gpt-4o-mini'
 };
 
+// Configuração do modo lote
+const AI_BATCH_CONFIG = {
+  enabled: process.env.AI_BATCH_ENABLED !== 'false',
+  // Máximo de transações distintas por prompt
+  maxBatchSize: 20,
+  // Janela para agrupar chamadas concorrentes (ms)
+  windowMs: 25,
+  // Tokens de saída por item no JSON de resposta
+  maxTokensPerItem: 40
+};
+
 // Função para obter categorias do banco com cache
 async function getCategoriesFromDB(): Promise<Array<{name: string; type: string}>> {
   const now = Date.now();
@@ -38,19 +58,71 @@ async function getCategoriesFromDB(): Promise<Array<{name: string; type: string}
     return cachedCategories;
   }
 
-  // Buscar do banco
-  const dbCategories = await CategoriesService.getCategories({
-    isActive: true,
-    includeStats: false
+  if (categoriesLoading) {
+    return categoriesLoading;
+  }
+
+  categoriesLoading = (async () => {
+    // Buscar do banco
+    countDbQuery('aiCategories');
+    const dbCategories = await CategoriesService.getCategories({
+      isActive: true,
+      includeStats: false
+    });
+
+    if (dbCategories.length > 0) {
+      cachedCategories = dbCategories.map(cat => ({ name: cat.name, type: cat.type }));
+      categoriesCacheTime = Date.now();
+      return cachedCategories;
+    }
+
+    throw new Error('Nenhuma categoria encontrada no banco');
+  })().finally(() => {
+    categoriesLoading = null;
   });
 
-  if (dbCategories.length > 0) {
-    cachedCategories = dbCategories.map(cat => ({ name: cat.name, type: cat.type }));
-    categoriesCacheTime = now;
-    return cachedCategories;
-  }
+  return categoriesLoading;
+}
 
-  throw new Error('Nenhuma categoria encontrada no banco');
+/**
+ * Normaliza descrição para deduplicação (mesma regra do cache de categorias)
+ */
+export function normalizeForDedupe(text: string): string {
+  return text
+    .toUpperCase()
+    .replace(/\d{6,}/g, '')
+    .replace(/[^A-Z0-9\s]/g, ' ')
+    .replace(/\s+/g, ' ')
+    .trim();
+}
+
+/**
+ * Extrai o array JSON da resposta do lote: [{"i": 0, "categoria": "..."}]
+ * Retorna null se não for possível interpretar.
+ */
+export function parseBatchResponse(content: string): Map<number, string> | null {
+  const fenced = content.match(/```(?:json)?\s*([\s\S]*?)\s*```/);
+  const text = fenced ? fenced[1] : content;
+  const start = text.indexOf('[');
+  const end = text.lastIndexOf(']');
+  if (start < 0 || end <= start) return null;
+
+  try {
+    const parsed = JSON.parse(text.slice(start, end + 1));
+    if (!Array.isArray(parsed)) return null;
+
+    const byIndex = new Map<number, string>();
+    for (const item of parsed) {
+      const index = Number(item?.i ?? item?.index);
+      const category = item?.categoria ?? item?.category;
+      if (Number.isInteger(index) && typeof category === 'string' && category.trim()) {
+        byIndex.set(index, category.trim());
+      }
+    }
+    return byIndex;
+  } catch {
+    return null;
+  }
 }
 
 // Função para mapear resultado da IA para categoria válida do banco
@@ -112,30 +184,152 @@ function mapAIResultToValidCategory(aiCategory: string, availableCategories: str
   return fallbackCategory || 'OUTRAS DESPESAS NOP';
 }
 
+type AICategorizationResult = {
+  category: string;
+  confidence: number;
+  reasoning?: string;
+  modelUsed?: string;
+  companyInfo?: any;
+};
+
+/**
+ * Transação já enriquecida, pronta para ir à IA
+ */
+interface PreparedAIRequest {
+  context: TransactionContext & { companyId: string };
+  enrichment: EnrichedDescription | null;
+  companyInfo: ProcessedSearchResult | null;
+  availableCategories: string[];
+  transactionType: 'credit' | 'debit';
+}
+
+interface PendingAIRequest {
+  prepared: PreparedAIRequest;
+  resolve: (result: AICategorizationResult) => void;
+  reject: (error: unknown) => void;
+}
+
 export class AICategorization implements AICategorizationService {
+  private pending: PendingAIRequest[] = [];
+  private flushTimer: ReturnType<typeof setTimeout> | null = null;
+  // Enriquecimento/pesquisa de empresa em andamento por descrição (dedupe de concorrentes)
+  private lookupsInFlight = new Map<string, Promise<{
+    enrichment: EnrichedDescription | null;
+    companyInfo: ProcessedSearchResult | null;
+  }>>();
+
   /**
    * Categoriza transação usando IA diretamente (sem HTTP fetch)
    * NOVO: Enriquece a descrição antes de enviar para a IA
+   * Com o modo lote ativo, a chamada à IA é agrupada com as concorrentes.
    */
   async categorize(
     context: TransactionContext & { companyId: string }
-  ): Promise<{
-    category: string;
-    confidence: number;
-    reasoning?: string;
-    modelUsed?: string;
-    companyInfo?: any;
-  }> {
+  ): Promise<AICategorizationResult> {
     try {
       log.info('[AI-ADAPTER] Iniciando categorizacao direta via aiProviderService');
 
+      const prepared = await this.prepare(context);
+      if ('result' in prepared) {
+        return prepared.result;
+      }
+
+      if (!AI_BATCH_CONFIG.enabled) {
+        return this.completeSingle(prepared.request);
+      }
+
+      return new Promise<AICategorizationResult>((resolve, reject) => {
+        this.enqueue({ prepared: prepared.request, resolve, reject });
+      });
+
+    } catch (error) {
+      log.error({ err: error }, '[AI-ADAPTER-ERROR]');
+      throw error;
+    }
+  }
+
+  /**
+   * Enriquecimento, pesquisa de empresa e regras determinísticas.
+   * Retorna o resultado final quando não é preciso chamar a IA.
+   */
+  private async prepare(
+    context: TransactionContext & { companyId: string }
+  ): Promise<{ result: AICategorizationResult } | { request: PreparedAIRequest }> {
+    const { enrichment, companyInfo } = await this.lookup(context);
+
+    if (companyInfo && companyInfo.confidence > 0.3) {
+      const companyBasedCategoryName = this.getCompanyBasedCategory(companyInfo, context.amount ?? 0);
+      if (companyBasedCategoryName) {
+         log.info({ category: companyBasedCategoryName }, '[AI-ADAPTER] Categoria baseada na pesquisa de empresa');
+         return {
+           result: {
+             category: companyBasedCategoryName,
+             confidence: Math.min(0.85, companyInfo.confidence),
+             reasoning: `Categoria determinada por pesquisa web: "${companyInfo.companyName}" - Atividade: ${companyInfo.activity || 'não identificada'}`,
+             modelUsed: 'company-research',
+             companyInfo
+           }
+         };
+      }
+    }
+
+    // Buscar categorias do banco de dados
+    const allCategories = await getCategoriesFromDB();
+
+    // Filtrar categorias baseado no tipo da transação
+    // Garantir que amount tenha valor default caso venha undefined
+    const amount = context.amount ?? 0;
+    const transactionType: 'credit' | 'debit' = amount >= 0 ? 'credit' : 'debit';
+    const filteredCategories = filterCategoriesByTransactionType(transactionType, allCategories);
+
+    const availableCategories = filteredCategories.map(c => c.name);
+
+    // --- REGRA DETERMINÍSTICA (Prioridade sobre IA) ---
+    // Certos termos têm significado inequívoco e devem ser categorizados diretamente
+    const forcedCategory = this.applyRuleBasedCategorization(
+      context,
+      enrichment?.bankingTerm,
+      availableCategories
+    );
+
+    if (forcedCategory) {
+      log.info({ category: forcedCategory.category }, '[AI-ADAPTER] Regra Deterministica aplicada');
+      return {
+        result: {
+          category: forcedCategory.category,
+          confidence: 1.0, // Confiança máxima
+          reasoning: forcedCategory.reasoning,
+          modelUsed: 'rule-based-override'
+        }
+      };
+    }
+    // --------------------------------------------------
+
+    return {
+      request: { context, enrichment, companyInfo, availableCategories, transactionType }
+    };
+  }
+
+  /**
+   * Enriquecimento + pesquisa de empresa. Transações concorrentes com a
+   * mesma descrição/memo compartilham a mesma consulta.
+   */
+  private lookup(context: TransactionContext): Promise<{
+    enrichment: EnrichedDescription | null;
+    companyInfo: ProcessedSearchResult | null;
+  }> {
+    const key = `${context.description.trim().toUpperCase()}|${(context.memo || '').trim().toUpperCase()}`;
+    const inFlight = this.lookupsInFlight.get(key);
+    if (inFlight) return inFlight;
+
+    const promise = (async () => {
       // NOVO: Enriquecer descrição com contexto adicional
       let enrichment: EnrichedDescription | null = null;
       try {
-        enrichment = await descriptionEnrichmentService.enrichDescription(
+        enrichment = await measureStage('enrichment', () => descriptionEnrichmentService.enrichDescription(
           context.description,
           context.memo ?? undefined // Converter null/undefined para undefined explícito
-        );
+        ));
         if (enrichment.bankingTerm) {
           log.info({ term: enrichment.bankingTerm.term, meaning: enrichment.bankingTerm.meaning }, '[AI-ADAPTER] Termo bancario detectado');
         }
@@ -144,76 +338,209 @@ export class AICategorization implements AICategorizationService {
       }
 
       // NOVO: Tentar extrair informações de empresa da descrição (DuckDuckGo)
-      // Se encontrarmos o CNPJ ou o setor da empresa, isso pode economizar uma chamada de IA 
+      // Se encontrarmos o CNPJ ou o setor da empresa, isso pode economizar uma chamada de IA
       // ou prover contexto valioso.
       log.info('[AI-ADAPTER] Tentando extrair informacoes de empresa da descricao...');
-      const companyInfo = await this.extractCompanyInfo(context.description, context.memo ?? undefined);
+      const companyInfo = await measureStage('companySearch', () => this.extractCompanyInfo(context.description, context.memo ?? undefined));
 
-      if (companyInfo && companyInfo.confidence > 0.3) {
-        const companyBasedCategoryName = this.getCompanyBasedCategory(companyInfo, context.amount ?? 0);
-        if (companyBasedCategoryName) {
-           log.info({ category: companyBasedCategoryName }, '[AI-ADAPTER] Categoria baseada na pesquisa de empresa');
-           return {
-             category: companyBasedCategoryName,
-             confidence: Math.min(0.85, companyInfo.confidence),
-             reasoning: `Categoria determinada por pesquisa web: "${companyInfo.companyName}" - Atividade: ${companyInfo.activity || 'não identificada'}`,
-             modelUsed: 'company-research',
-             companyInfo
-           };
+      return { enrichment, companyInfo };
+    })().finally(() => {
+      this.lookupsInFlight.delete(key);
+    });
+
+    this.lookupsInFlight.set(key, promise);
+    return promise;
+  }
+
+  /**
+   * Chave de deduplicação: mesma descrição/memo normalizados, mesmo tipo
+   * e mesmo contexto descoberto → mesma resposta da IA
+   */
+  private getDedupeKey(prepared: PreparedAIRequest): string {
+    return [
+      prepared.transactionType,
+      normalizeForDedupe(prepared.context.description),
+      normalizeForDedupe(prepared.context.memo || ''),
+      prepared.enrichment?.bankingTerm?.term ?? '',
+      prepared.companyInfo?.companyName ?? ''
+    ].join('|');
+  }
+
+  private enqueue(request: PendingAIRequest): void {
+    this.pending.push(request);
+
+    const distinct = new Set(this.pending.map(p => this.getDedupeKey(p.prepared))).size;
+    if (distinct >= AI_BATCH_CONFIG.maxBatchSize) {
+      this.flush();
+    } else if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => this.flush(), AI_BATCH_CONFIG.windowMs);
+    }
+  }
+
+  /**
+   * Envia as requisições pendentes: agrupa por empresa × tipo (a lista de
+   * categorias depende do tipo) e deduplica descrições idênticas
+   */
+  private flush(): void {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+
+    const requests = this.pending;
+    this.pending = [];
+    if (requests.length === 0) return;
+
+    const groups = new Map<string, Map<string, PendingAIRequest[]>>();
+    for (const request of requests) {
+      const groupKey = `${request.prepared.context.companyId}|${request.prepared.transactionType}`;
+      let group = groups.get(groupKey);
+      if (!group) {
+        group = new Map();
+        groups.set(groupKey, group);
+      }
+      const dedupeKey = this.getDedupeKey(request.prepared);
+      const duplicates = group.get(dedupeKey);
+      if (duplicates) {
+        duplicates.push(request);
+      } else {
+        group.set(dedupeKey, [request]);
+      }
+    }
+
+    for (const group of groups.values()) {
+      const unique = Array.from(group.values());
+      log.info(
+        { requests: unique.reduce((sum, dups) => sum + dups.length, 0), distinct: unique.length },
+        '[AI-BATCH] Enviando lote'
+      );
+
+      this.completeBatch(unique.map(dups => dups[0].prepared)).then(
+        results => {
+          results.forEach((result, index) => {
+            for (const request of unique[index]) request.resolve(result);
+          });
+        },
+        error => {
+          for (const dups of unique) {
+            for (const request of dups) request.reject(error);
+          }
         }
+      );
+    }
+  }
+
+  /**
+   * Uma ida à IA para várias transações (mesma lista de categorias).
+   * Itens ausentes ou inválidos na resposta caem na chamada individual.
+   */
+  private async completeBatch(items: PreparedAIRequest[]): Promise<AICategorizationResult[]> {
+    if (items.length === 1) {
+      return [await this.completeSingle(items[0])];
+    }
+
+    const { availableCategories, context: { companyId } } = items[0];
+    const formattedCategoriesList = `• ${availableCategories.join('\n• ')}`;
+
+    const transactionsList = items.map((item, index) => {
+      const { context, enrichment, companyInfo } = item;
+      let line = `${index}. DESCRIÇÃO: "${context.description}" | VALOR: R$ ${(context.amount ?? 0).toFixed(2)} | MEMO: "${context.memo || 'N/A'}"`;
+      if (enrichment?.enrichedContext) {
+        line += `\n   CONTEXTO ADICIONAL: ${enrichment.enrichedContext.replace(/\n/g, ' ')}`;
+      }
+      if (enrichment?.bankingTerm?.categoryHint) {
+        line += `\n   DICA: ${enrichment.bankingTerm.categoryHint}`;
+      }
+      if (companyInfo) {
+        line += `\n   EMPRESA: ${companyInfo.companyName} | Setor: ${companyInfo.sector} | Atividade: ${companyInfo.activity}`;
       }
+      return line;
+    }).join('\n');
 
-      // Buscar categorias do banco de dados
-      const allCategories = await getCategoriesFromDB();
+    let byIndex: Map<number, string> | null = null;
+    let provider = '';
+    let model = '';
 
-      // Filtrar categorias baseado no tipo da transação
-      // Garantir que amount tenha valor default caso venha undefined
-      const amount = context.amount ?? 0;
-      const transactionType: 'credit' | 'debit' = amount >= 0 ? 'credit' : 'debit';
-      const filteredCategories = filterCategoriesByTransactionType(transactionType, allCategories);
+    try {
+      const response = await aiProviderService.completeWithRetry({
+        model: AI_MODELS.primary,
+        messages: [
+          {
+            role: 'system' as const,
+            content: `Você é um especialista em finanças empresariais brasileiras. Sua tarefa é categorizar transações financeiras.
 
-      const availableCategories = filteredCategories.map(c => c.name);
+CATEGORIAS DISPONÍVEIS:
+${formattedCategoriesList}
 
-      // --- REGRA DETERMINÍSTICA (Prioridade sobre IA) ---
-      // Certos termos têm significado inequívoco e devem ser categorizados diretamente
-      const forcedCategory = this.applyRuleBasedCategorization(
-        context,
-        enrichment?.bankingTerm,
-        availableCategories
-      );
+REGRAS:
+1. Para cada transação, escolha o nome exato de uma das categorias listadas acima
+2. Responda APENAS com um array JSON, sem explicações: [{"i": <número da transação>, "categoria": "<nome exato>"}]
+3. Inclua todas as transações, usando o mesmo número da lista
+4. Se houver DICA, CONTEXTO ADICIONAL ou EMPRESA, use essa informação para escolher a categoria mais adequada`
+          },
+          {
+            role: 'user' as const,
+            content: `Categorize as transações:\n${transactionsList}`
+          }
+        ],
+        max_tokens: 50 + items.length * AI_BATCH_CONFIG.maxTokensPerItem,
+        temperature: 0.1,
+        logContext: { companyId, operationType: 'batch-categorization' }
+      });
+
+      provider = response.provider;
+      model = response.model;
+      byIndex = parseBatchResponse(response.content || '');
+      if (!byIndex) {
+        log.warn({ items: items.length }, '[AI-BATCH] Resposta do lote nao pode ser interpretada, usando chamadas individuais');
+      }
+    } catch (error) {
+      log.error({ err: error, items: items.length }, '[AI-BATCH] Erro no lote, usando chamadas individuais');
+    }
 
-      if (forcedCategory) {
-        log.info({ category: forcedCategory.category }, '[AI-ADAPTER] Regra Deterministica aplicada');
-        return {
-          category: forcedCategory.category,
-          confidence: 1.0, // Confiança máxima
-          reasoning: forcedCategory.reasoning,
-          modelUsed: 'rule-based-override'
-        };
+    return Promise.all(items.map(async (item, index) => {
+      const aiCategory = byIndex?.get(index);
+      if (!aiCategory) {
+        return this.completeSingle(item);
       }
-      // --------------------------------------------------
 
-      const formattedCategoriesList = `• ${availableCategories.join('\n• ')}`;
+      const validCategory = mapAIResultToValidCategory(aiCategory, item.availableCategories);
+      return {
+        category: validCategory,
+        confidence: item.enrichment?.bankingTerm ? 0.95 : 0.9,
+        reasoning: this.buildReasoning(`IA (${provider}/${model}, lote de ${items.length})`, aiCategory, validCategory, item.enrichment),
+        modelUsed: `${provider}/${model}`
+      };
+    }));
+  }
+
+  /**
+   * Uma ida à IA por transação, com fallback entre modelos
+   */
+  private async completeSingle(prepared: PreparedAIRequest): Promise<AICategorizationResult> {
+    const { context, enrichment, companyInfo, availableCategories } = prepared;
+
+    const formattedCategoriesList = `• ${availableCategories.join('\n• ')}`;
 
-      // Montar contexto enriquecido para o prompt
-      const enrichedContextText = enrichment?.enrichedContext
-        ? `\n\nCONTEXTO ADICIONAL (descoberto automaticamente):\n${enrichment.enrichedContext}`
-        : '';
+    // Montar contexto enriquecido para o prompt
+    const enrichedContextText = enrichment?.enrichedContext
+      ? `\n\nCONTEXTO ADICIONAL (descoberto automaticamente):\n${enrichment.enrichedContext}`
+      : '';
 
-      const categoryHintText = enrichment?.bankingTerm?.categoryHint
-        ? `\n\nDICA: ${enrichment.bankingTerm.categoryHint}`
-        : '';
+    const categoryHintText = enrichment?.bankingTerm?.categoryHint
+      ? `\n\nDICA: ${enrichment.bankingTerm.categoryHint}`
+      : '';
 
-      const modelsToTry = [AI_MODELS.primary, AI_MODELS.fallback];
+    const modelsToTry = [AI_MODELS.primary, AI_MODELS.fallback];
 
-      for (const model of modelsToTry) {
-        try {
-          log.info({ model }, '[AI-ADAPTER] Tentando modelo');
+    for (const model of modelsToTry) {
+      try {
+        log.info({ model }, '[AI-ADAPTER] Tentando modelo');
 
-          const messages = [
-            {
-              role: 'system' as const,
-              content: `Você é um especialista em finanças empresariais brasileiras. Sua tarefa é categorizar transações financeiras.
+        const messages = [
+          {
+            role: 'system' as const,
+            content: `Você é um especialista em finanças empresariais brasileiras. Sua tarefa é categorizar transações financeiras.
 
 CONTRATO DA TRANSAÇÃO:
 • DESCRIÇÃO: "${context.description}"
@@ -228,76 +555,82 @@ REGRAS:
 2. NÃO inclua explicações, justificativas ou análises
 3. Use uma das categorias listadas acima
 4. Se houver DICA ou CONTEXTO ADICIONAL, use essa informação para escolher a categoria mais adequada`
-            },
-            {
-              role: 'user' as const,
-              content: `Categorize a transação: "${context.description}" (R$ ${(context.amount ?? 0).toFixed(2)})${companyInfo ? `\n\nINFORMAÇÕES DA EMPRESA:\n• Nome: ${companyInfo.companyName}\n• Setor: ${companyInfo.sector}\n• Atividade: ${companyInfo.activity}` : ''}`
-            }
-          ];
-
-          const response = await aiProviderService.completeWithRetry({
-            model: model,
-            messages: messages,
-            max_tokens: 100,
-            temperature: 0.1
-          });
+          },
+          {
+            role: 'user' as const,
+            content: `Categorize a transação: "${context.description}" (R$ ${(context.amount ?? 0).toFixed(2)})${companyInfo ? `\n\nINFORMAÇÕES DA EMPRESA:\n• Nome: ${companyInfo.companyName}\n• Setor: ${companyInfo.sector}\n• Atividade: ${companyInfo.activity}` : ''}`
+          }
+        ];
 
-          const aiCategory = response.content?.trim() || 'OUTRAS DESPESAS NOP';
-          const validCategory = mapAIResultToValidCategory(aiCategory, availableCategories);
+        const response = await aiProviderService.completeWithRetry({
+          model: model,
+          messages: messages,
+          max_tokens: 100,
+          temperature: 0.1,
+          logContext: { companyId: context.companyId, operationType: 'categorization' }
+        });
 
-          log.info({ aiCategory, validCategory }, '[AI-ADAPTER] Sucesso! Categoria mapeada');
+        const aiCategory = response.content?.trim() || 'OUTRAS DESPESAS NOP';
+        const validCategory = mapAIResultToValidCategory(aiCategory, availableCategories);
 
-          // Montar reasoning com informações do enriquecimento
-          let reasoning = `IA (${response.provider}/${response.model}) categorizou como "${aiCategory}" → "${validCategory}"`;
-          if (enrichment?.bankingTerm) {
-            reasoning += ` | Termo detectado: ${enrichment.bankingTerm.term} (${enrichment.bankingTerm.meaning})`;
-          }
-          if (enrichment?.complement) {
-            reasoning += ` | Complemento: ${enrichment.complement}`;
-          }
+        log.info({ aiCategory, validCategory }, '[AI-ADAPTER] Sucesso! Categoria mapeada');
+
+        return {
+          category: validCategory,
+          confidence: enrichment?.bankingTerm ? 0.95 : 0.9, // Maior confiança quando temos contexto
+          reasoning: this.buildReasoning(`IA (${response.provider}/${response.model})`, aiCategory, validCategory, enrichment),
+          modelUsed: `${response.provider}/${response.model}`
+        };
+      } catch (error) {
+        log.error({ err: error, model }, '[AI-ADAPTER] Erro no modelo');
+
+        // Se for o último modelo, retorna fallback
+        if (model === modelsToTry[modelsToTry.length - 1]) {
+          log.info('[AI-ADAPTER] Todos os modelos falharam, usando fallback');
+
+          const fallbackCategory = availableCategories.find(cat => cat === 'OUTRAS DESPESAS NOP')
+            || availableCategories[0]
+            || 'OUTRAS DESPESAS NOP';
 
           return {
-            category: validCategory,
-            confidence: enrichment?.bankingTerm ? 0.95 : 0.9, // Maior confiança quando temos contexto
-            reasoning,
-            modelUsed: `${response.provider}/${response.model}`
+            category: fallbackCategory,
+            confidence: 0.3,
+            reasoning: `Fallback após erro: ${error instanceof Error ? error.message : 'Erro desconhecido'}`,
+            modelUsed: 'none'
           };
-        } catch (error) {
-          log.error({ err: error, model }, '[AI-ADAPTER] Erro no modelo');
-
-          // Se for o último modelo, retorna fallback
-          if (model === modelsToTry[modelsToTry.length - 1]) {
-            log.info('[AI-ADAPTER] Todos os modelos falharam, usando fallback');
-
-            const fallbackCategory = availableCategories.find(cat => cat === 'OUTRAS DESPESAS NOP')
-              || availableCategories[0]
-              || 'OUTRAS DESPESAS NOP';
-
-            return {
-              category: fallbackCategory,
-              confidence: 0.3,
-              reasoning: `Fallback após erro: ${error instanceof Error ? error.message : 'Erro desconhecido'}`,
-              modelUsed: 'none'
-            };
-          }
-
-          // Tenta próximo modelo
-          continue;
         }
+
+        // Tenta próximo modelo
+        continue;
       }
+    }
 
-      // Fallback final
-      return {
-        category: 'OUTRAS DESPESAS NOP',
-        confidence: 0.1,
-        reasoning: 'Fallback final - nenhum modelo respondeu',
-        modelUsed: 'none'
-      };
+    // Fallback final
+    return {
+      category: 'OUTRAS DESPESAS NOP',
+      confidence: 0.1,
+      reasoning: 'Fallback final - nenhum modelo respondeu',
+      modelUsed: 'none'
+    };
+  }
 
-    } catch (error) {
-      log.error({ err: error }, '[AI-ADAPTER-ERROR]');
-      throw error;
+  /**
+   * Monta reasoning com informações do enriquecimento
+   */
+  private buildReasoning(
+    source: string,
+    aiCategory: string,
+    validCategory: string,
+    enrichment: EnrichedDescription | null
+  ): string {
+    let reasoning = `${source} categorizou como "${aiCategory}" → "${validCategory}"`;
+    if (enrichment?.bankingTerm) {
+      reasoning += ` | Termo detectado: ${enrichment.bankingTerm.term} (${enrichment.bankingTerm.meaning})`;
+    }
+    if (enrichment?.complement) {
+      reasoning += ` | Complemento: ${enrichment.complement}`;
     }
+    return reasoning;
   }
 
   /**
@@ -3,6 +3,7 @@ import { transactions, accounts, categories } from '@/lib/db/schema';
 import { eq, and, gte, lte, desc, sql, isNotNull, ne } from 'drizzle-orm';
 import type { Insight, AnomalyData, InsightThresholds } from '@/lib/types';
 import { DEFAULT_THRESHOLDS } from './threshold.service';
+import MonthlyAggregatesService from './monthly-aggregates.service';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('anomaly');
@@ -210,52 +211,34 @@ export default class AnomalyService {
     try {
       const now = new Date();
 
-      // Calcular total por categoria nos últimos 6 meses
+      // Calcular total por categoria nos últimos 6 meses (uma leitura dos agregados mensais)
+      const firstMonth = new Date(now.getFullYear(), now.getMonth() - 5, 1);
+      const lastDay = new Date(now.getFullYear(), now.getMonth() + 1, 0);
+      const formatDate = (date: Date) =>
+        `${date.getFullYear()}-${(date.getMonth() + 1).toString().padStart(2, '0')}-${date.getDate().toString().padStart(2, '0')}`;
+
+      const monthlyTotals = await MonthlyAggregatesService.getMonthlyCategoryTotals({
+        startDate: formatDate(firstMonth),
+        endDate: formatDate(lastDay),
+        companyId: filters.companyId,
+        accountId: filters.accountId
+      });
+
+      // Do mês atual para trás: values[0] = mês atual (quando houve despesa)
       const monthlyStats = new Map<string, number[]>();
 
       for (let i = 0; i < 6; i++) {
-        const date = new Date();
-        date.setMonth(date.getMonth() - i);
-
-        const monthStart = `${date.getFullYear()}-${(date.getMonth() + 1).toString().padStart(2, '0')}-01`;
-        const lastDay = new Date(date.getFullYear(), date.getMonth() + 1, 0).getDate();
-        const monthEnd = `${date.getFullYear()}-${(date.getMonth() + 1).toString().padStart(2, '0')}-${lastDay}`;
-
-        const whereConditions: Parameters<typeof and>[0][] = [
-          eq(transactions.type, 'debit'),
-          gte(transactions.transactionDate, monthStart),
-          lte(transactions.transactionDate, monthEnd),
-          isNotNull(transactions.categoryId)
-        ];
-
-        if (filters.accountId && filters.accountId !== 'all') {
-          whereConditions.push(eq(transactions.accountId, filters.accountId));
-        }
-
-        if (filters.companyId && filters.companyId !== 'all') {
-          whereConditions.push(eq(accounts.companyId, filters.companyId));
-        }
-
-        const monthlyTotals = await db
-          .select({
-            categoryId: transactions.categoryId,
-            categoryName: categories.name,
-            total: sql<number>`SUM(ABS(${transactions.amount}))`.mapWith(Number)
-          })
-          .from(transactions)
-          .leftJoin(categories, eq(transactions.categoryId, categories.id))
-          .leftJoin(accounts, eq(transactions.accountId, accounts.id))
-          .where(and(...whereConditions))
-          .groupBy(transactions.categoryId, categories.name);
+        const date = new Date(now.getFullYear(), now.getMonth() - i, 1);
+        const month = formatDate(date).slice(0, 7);
 
         for (const row of monthlyTotals) {
-          if (!row.categoryId) continue;
+          if (row.month !== month || !row.categoryId || row.debitCount === 0) continue;
 
           const key = `${row.categoryId}|${row.categoryName}`;
           if (!monthlyStats.has(key)) {
             monthlyStats.set(key, []);
           }
-          monthlyStats.get(key)!.push(row.total);
+          monthlyStats.get(key)!.push(row.expenses);
         }
       }
 
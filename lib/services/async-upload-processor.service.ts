@@ -1,12 +1,52 @@
-import { parseOFXFile } from '@/lib/ofx-parser';
+/**
+ * Async Upload Processor
+ *
+ * Fila persistente de uploads OFX, com o próprio Postgres como broker:
+ * - startProcessing() só marca o upload como enfileirado (queued_at)
+ * - um pool limitado de workers por processo reivindica uploads com
+ *   SELECT ... FOR UPDATE SKIP LOCKED, então vários processos/nós podem
+ *   consumir a mesma fila sem pegar o mesmo upload
+ * - justiça entre empresas: a empresa com menos uploads em execução é
+ *   atendida primeiro, com teto por empresa
+ * - o worker renova heartbeat_at; uploads com heartbeat vencido (restart,
+ *   crash) voltam a ser reivindicáveis e retomam de lastProcessedIndex
+ * - falhas voltam para a fila com backoff (next_attempt_at), até maxAttempts;
+ *   o teto vale também para órfãos (worker morto), que passam a failed
+ *
+ * O arquivo é relido do storage (uploads.file_path) em streaming pelo
+ * OFXStreamReader, por isso a fila sobrevive a restarts. O limite de chamadas à IA fica no
+ * llmRateLimiter (lib/ai/adaptive-rate-limiter).
+ */
+
+import { hostname } from 'os';
+import { randomUUID } from 'crypto';
+import { OFXStreamReader } from '@/lib/ofx-parser';
 import { db } from '@/lib/db/connection';
-import { uploads } from '@/lib/db/schema';
-import { eq } from 'drizzle-orm';
+import { uploads, transactions } from '@/lib/db/schema';
+import { eq, and, sql } from 'drizzle-orm';
 import BatchProcessingService from '@/lib/services/batch-processing.service';
+import FileStorageService from '@/lib/storage/file-storage.service';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('async-upload');
 
+const UPLOAD_QUEUE_CONFIG = {
+  // UPLOAD_WORKER_ENABLED=false: o processo só enfileira (ex: nós que só servem a UI)
+  enabled: process.env.UPLOAD_WORKER_ENABLED !== 'false',
+  // Uploads processados simultaneamente por processo
+  concurrency: parseInt(process.env.UPLOAD_WORKER_CONCURRENCY || '2', 10),
+  // Uploads simultâneos de uma mesma empresa (somando todos os processos)
+  maxPerCompany: parseInt(process.env.UPLOAD_WORKER_MAX_PER_COMPANY || '1', 10),
+  // Intervalo de varredura da fila (uploads enfileirados por outros processos)
+  pollIntervalMs: 2000,
+  heartbeatMs: 15 * 1000,
+  // Sem heartbeat por esse tempo, o upload é considerado órfão
+  staleAfterMs: 2 * 60 * 1000,
+  maxAttempts: 3,
+  // Espera antes da próxima tentativa: attempts × retryBackoffMs
+  retryBackoffMs: 30 * 1000
+};
+
 export interface TransactionData {
   description: string;
   name?: string;
@@ -17,9 +57,24 @@ export interface TransactionData {
   balance?: number;
 }
 
+interface ClaimedUpload {
+  id: string;
+  company_id: string;
+  account_id: string;
+  file_path: string | null;
+  original_name: string;
+  processed_transactions: number | null;
+  total_transactions: number | null;
+  attempts: number;
+}
+
 export class AsyncUploadProcessorService {
   private static instance: AsyncUploadProcessorService;
-  private processingQueue: Map<string, Promise<void>> = new Map();
+  // Uploads em execução neste processo
+  private active: Map<string, Promise<void>> = new Map();
+  private readonly workerId = `${hostname()}:${process.pid}:${randomUUID().slice(0, 8)}`;
+  private pollTimer: ReturnType<typeof setInterval> | null = null;
+  private pumping = false;
 
   private constructor() {}
 
@@ -31,119 +86,267 @@ export class AsyncUploadProcessorService {
   }
 
   /**
-   * Inicia o processamento assíncrono de um upload
+   * Enfileira um upload já registrado (com arquivo salvo no storage)
    */
-  async startProcessing(
-    uploadId: string,
-    fileBuffer: Buffer,
-    accountId: string,
-    metadata: { fileName: string; bankName?: string; companyId: string }
-  ): Promise<void> {
-    // Se já está processando, não fazer nada
-    if (this.processingQueue.has(uploadId)) {
+  async startProcessing(uploadId: string): Promise<void> {
+    if (this.active.has(uploadId)) {
       log.warn({ uploadId }, 'Upload is already being processed');
       return;
     }
 
-    // Criar promise de processamento
-    const processingPromise = this.processUploadInBackground(
-      uploadId,
-      fileBuffer,
-      accountId,
-      metadata
-    );
-
-    // Adicionar à fila
-    this.processingQueue.set(uploadId, processingPromise);
-
-    // Remover da fila quando concluir (não aguardar)
-    processingPromise
-      .then(() => {
-        this.processingQueue.delete(uploadId);
+    await db
+      .update(uploads)
+      .set({
+        status: 'pending',
+        queuedAt: new Date(),
+        workerId: null,
+        heartbeatAt: null,
+        nextAttemptAt: null,
+        // Reenfileirar recomeça a contagem (claimNext ignora quem atingiu maxAttempts)
+        attempts: 0
       })
-      .catch((error) => {
-        log.error({ err: error, uploadId }, 'Error processing upload');
-        this.processingQueue.delete(uploadId);
-      });
+      .where(eq(uploads.id, uploadId));
+
+    log.info({ uploadId }, 'Upload queued');
+
+    this.start();
+    if (this.pollTimer) void this.pump();
   }
 
   /**
-   * Processa o upload em background
+   * Inicia o pool de workers deste processo (idempotente)
    */
-  private async processUploadInBackground(
-    uploadId: string,
-    fileBuffer: Buffer,
-    accountId: string,
-    metadata: { fileName: string; bankName?: string; companyId: string }
-  ): Promise<void> {
-    const startTime = Date.now();
+  start(): void {
+    if (this.pollTimer || !UPLOAD_QUEUE_CONFIG.enabled) return;
+
+    this.pollTimer = setInterval(() => void this.pump(), UPLOAD_QUEUE_CONFIG.pollIntervalMs);
+    this.pollTimer.unref?.();
+
+    log.info({ workerId: this.workerId, concurrency: UPLOAD_QUEUE_CONFIG.concurrency }, 'Upload workers started');
+    void this.pump();
+  }
+
+  /**
+   * Para de reivindicar novos uploads (os em execução terminam normalmente)
+   */
+  stop(): void {
+    if (this.pollTimer) {
+      clearInterval(this.pollTimer);
+      this.pollTimer = null;
+    }
+  }
+
+  /**
+   * Reivindica uploads enquanto houver vaga no pool
+   */
+  private async pump(): Promise<void> {
+    if (this.pumping) return;
+    this.pumping = true;
 
     try {
-      log.info({ uploadId }, 'Starting async processing');
+      await this.failExhaustedUploads();
 
-      // Atualizar status para processing
-      await db
-        .update(uploads)
-        .set({ status: 'processing' })
-        .where(eq(uploads.id, uploadId));
+      while (this.active.size < UPLOAD_QUEUE_CONFIG.concurrency) {
+        const upload = await this.claimNext();
+        if (!upload) break;
+
+        const run = this.processUpload(upload).finally(() => {
+          this.active.delete(upload.id);
+          void this.pump();
+        });
+        this.active.set(upload.id, run);
+      }
+    } catch (error) {
+      log.error({ err: error }, 'Error claiming upload');
+    } finally {
+      this.pumping = false;
+    }
+  }
+
+  /**
+   * Reivindica o próximo upload da fila.
+   * Ordem: empresas com menos uploads em execução primeiro, depois o mais
+   * antigo. O teto por empresa é best-effort (dois workers podem contar ao
+   * mesmo tempo), o que basta para não deixar uma empresa monopolizar a fila.
+   */
+  private async claimNext(): Promise<ClaimedUpload | null> {
+    const staleSeconds = UPLOAD_QUEUE_CONFIG.staleAfterMs / 1000;
+
+    const result = await db.execute(sql`
+      WITH running AS (
+        SELECT company_id, count(*)::int AS n
+        FROM financeai_uploads
+        WHERE status = 'processing'
+          AND worker_id IS NOT NULL
+          AND heartbeat_at > now() - make_interval(secs => ${staleSeconds})
+        GROUP BY company_id
+      ),
+      candidate AS (
+        SELECT u.id
+        FROM financeai_uploads u
+        LEFT JOIN running r ON r.company_id = u.company_id
+        WHERE u.queued_at IS NOT NULL
+          AND (u.next_attempt_at IS NULL OR u.next_attempt_at <= now())
+          AND (
+            u.status = 'pending'
+            OR (
+              u.status = 'processing'
+              AND (u.heartbeat_at IS NULL OR u.heartbeat_at <= now() - make_interval(secs => ${staleSeconds}))
+            )
+          )
+          AND COALESCE(u.attempts, 0) < ${UPLOAD_QUEUE_CONFIG.maxAttempts}
+          AND COALESCE(r.n, 0) < ${UPLOAD_QUEUE_CONFIG.maxPerCompany}
+        ORDER BY COALESCE(r.n, 0), u.queued_at
+        LIMIT 1
+        FOR UPDATE OF u SKIP LOCKED
+      )
+      UPDATE financeai_uploads AS u
+      SET status = 'processing',
+          worker_id = ${this.workerId},
+          heartbeat_at = now(),
+          attempts = COALESCE(u.attempts, 0) + 1
+      FROM candidate
+      WHERE u.id = candidate.id
+      RETURNING u.id, u.company_id, u.account_id, u.file_path, u.original_name,
+                u.processed_transactions, u.total_transactions, u.attempts
+    `);
 
-      // Parse do arquivo OFX
-      const ofxContent = fileBuffer.toString('utf-8');
-      const parseResult = await parseOFXFile(ofxContent);
+    return (result.rows[0] as unknown as ClaimedUpload) ?? null;
+  }
 
-      if (!parseResult.success) {
-        throw new Error(parseResult.error || 'Erro ao fazer parse do OFX');
+  /**
+   * Marca como failed os uploads órfãos (heartbeat vencido) que já usaram
+   * todas as tentativas: o worker morreu antes de registrar a falha, e
+   * claimNext não os reivindica mais.
+   */
+  private async failExhaustedUploads(): Promise<void> {
+    const staleSeconds = UPLOAD_QUEUE_CONFIG.staleAfterMs / 1000;
+
+    const result = await db.execute(sql`
+      UPDATE financeai_uploads
+      SET status = 'failed',
+          worker_id = NULL,
+          heartbeat_at = NULL,
+          processing_log = json_build_object(
+            'error', 'Processamento interrompido (worker sem heartbeat) após o limite de tentativas',
+            'attempt', attempts,
+            'timestamp', to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"')
+          )
+      WHERE queued_at IS NOT NULL
+        AND status = 'processing'
+        AND COALESCE(attempts, 0) >= ${UPLOAD_QUEUE_CONFIG.maxAttempts}
+        AND (heartbeat_at IS NULL OR heartbeat_at <= now() - make_interval(secs => ${staleSeconds}))
+      RETURNING id
+    `);
+
+    for (const row of result.rows as { id: string }[]) {
+      log.error({ uploadId: row.id, maxAttempts: UPLOAD_QUEUE_CONFIG.maxAttempts }, 'Stale upload exhausted its attempts, marked as failed');
+    }
+  }
+
+  /**
+   * Processa (ou retoma) um upload reivindicado
+   */
+  private async processUpload(upload: ClaimedUpload): Promise<void> {
+    const startTime = Date.now();
+    const uploadId = upload.id;
+    let leaseLost = false;
+
+    // Heartbeat: mantém a posse do upload; se outro worker assumiu, para
+    const heartbeat = setInterval(async () => {
+      try {
+        const renewed = await db
+          .update(uploads)
+          .set({ heartbeatAt: new Date() })
+          .where(and(eq(uploads.id, uploadId), eq(uploads.workerId, this.workerId)))
+          .returning({ id: uploads.id });
+        if (renewed.length === 0) leaseLost = true;
+      } catch (error) {
+        log.warn({ err: error, uploadId }, 'Heartbeat failed');
+      }
+    }, UPLOAD_QUEUE_CONFIG.heartbeatMs);
+    heartbeat.unref?.();
+
+    try {
+      let resumeFrom = upload.processed_transactions ?? 0;
+      log.info({ uploadId, attempt: upload.attempts, resumeFrom, workerId: this.workerId }, 'Starting async processing');
+
+      if (!upload.file_path || !upload.account_id || !upload.company_id) {
+        throw new Error('Upload sem arquivo, conta ou empresa associada');
       }
 
-      const transactions = parseResult.transactions || [];
+      // Progresso gravado em outra ordem (parseOFXFile ordena por data): recomeça do zero
+      if (resumeFrom > 0 && !(await this.resumeIndexMatchesFile(uploadId, upload.file_path))) {
+        log.warn({ uploadId, resumeFrom }, 'Saved progress does not follow file order, reprocessing upload from the start');
+        await db.delete(transactions).where(eq(transactions.uploadId, uploadId));
+        resumeFrom = 0;
+      }
 
-      // Preparar processamento em batches
+      // Leitura incremental: o arquivo não é carregado inteiro em memória
+      const fileStream = await FileStorageService.openReadStream(upload.file_path);
+      if (!fileStream) {
+        throw new Error(`Arquivo do upload não encontrado: ${upload.file_path}`);
+      }
+      const reader = new OFXStreamReader(fileStream);
       const batchService = BatchProcessingService;
-      await batchService.prepareUploadForBatchProcessing(uploadId, transactions.length);
-
-      // Converter transações para o formato esperado
-      const formattedTransactions = transactions.map((tx) => ({
-        description: tx.description,
-        memo: tx.memo,
-        amount: tx.amount,
-        date: tx.date,
-        fitid: tx.fitid,
-        balance: tx.balance
-      }));
 
-      // Processar em batches
+      // Retomada: contadores já gravados; upload novo: preparar batches
       let totalSuccessful = 0;
       let totalFailed = 0;
-      const batchSize = 15;
-
-      for (let i = 0; i < formattedTransactions.length; i += batchSize) {
-        const batchNumber = Math.floor(i / batchSize) + 1;
-        const batchTransactions = formattedTransactions.slice(i, i + batchSize);
-
-        log.info(
-          { uploadId, batchNumber, totalBatches: Math.ceil(formattedTransactions.length / batchSize) },
-          'Processing batch'
-        );
-
-        try {
-          const batchResult = await batchService.processBatch(
-            uploadId,
-            batchTransactions,
-            accountId,
-            null, // categoryId - será determinado no processamento
-            metadata,
-            batchNumber,
-            i
-          );
-
-          totalSuccessful += batchResult.success;
-          totalFailed += batchResult.failed;
-        } catch (error) {
-          log.error({ err: error, uploadId, batchNumber }, 'Error processing batch');
-          totalFailed += batchTransactions.length;
+      if (resumeFrom > 0) {
+        const [{ count }] = await db
+          .select({ count: sql<number>`count(*)::int` })
+          .from(transactions)
+          .where(eq(transactions.uploadId, uploadId));
+        totalSuccessful = count;
+        totalFailed = Math.max(0, resumeFrom - count);
+        log.info({ uploadId, resumeFrom, alreadySaved: count }, 'Resuming upload from lastProcessedIndex');
+      } else {
+        // total_transactions foi gravado pela rota de upload
+        await batchService.prepareUploadForBatchProcessing(uploadId, upload.total_transactions ?? 0);
+      }
+
+      // Converter transações para o formato esperado, à medida que são lidas
+      const formattedTransactions = (async function* (): AsyncGenerator<TransactionData> {
+        for await (const tx of reader) {
+          yield {
+            description: tx.description,
+            memo: tx.memo,
+            amount: tx.amount,
+            date: tx.date,
+            fitid: tx.fitid,
+            balance: tx.balance
+          };
         }
+      })();
+
+      const metadata = {
+        fileName: upload.original_name,
+        companyId: upload.company_id
+      };
+
+      // Processar em batches
+      const result = await batchService.processTransactionStream(
+        uploadId,
+        formattedTransactions,
+        upload.account_id,
+        metadata,
+        resumeFrom,
+        () => leaseLost
+      );
+
+      if (result.stopped) {
+        log.warn({ uploadId, workerId: this.workerId }, 'Lease lost, stopping');
+        return;
+      }
+
+      if (result.total === 0) {
+        throw new Error('Nenhuma transação encontrada no arquivo OFX');
       }
 
+      totalSuccessful += result.success;
+      totalFailed += result.failed;
+
       // Marcar upload como concluído
       await batchService.completeUpload(uploadId, {
         successful: totalSuccessful,
@@ -156,31 +359,87 @@ export class AsyncUploadProcessorService {
         'Processing completed'
       );
     } catch (error) {
-      log.error({ err: error, uploadId }, 'Fatal error in upload processing');
+      const retry = upload.attempts < UPLOAD_QUEUE_CONFIG.maxAttempts;
+      const backoffSeconds = (upload.attempts * UPLOAD_QUEUE_CONFIG.retryBackoffMs) / 1000;
+      log.error({ err: error, uploadId, attempt: upload.attempts, retry, backoffSeconds }, 'Fatal error in upload processing');
+
+      const processingLog = {
+        error: error instanceof Error ? error.message : 'Erro desconhecido',
+        attempt: upload.attempts,
+        timestamp: new Date().toISOString()
+      };
 
-      // Marcar como failed
+      // Volta para a fila com backoff (retoma de lastProcessedIndex) ou marca como failed
       await db
         .update(uploads)
-        .set({
-          status: 'failed',
-          processingLog: { error: error instanceof Error ? error.message : 'Erro desconhecido' }
-        })
-        .where(eq(uploads.id, uploadId));
+        .set(retry
+          ? {
+              status: 'pending',
+              nextAttemptAt: sql`now() + make_interval(secs => ${backoffSeconds})`,
+              processingLog
+            }
+          : { status: 'failed', processingLog })
+        .where(and(eq(uploads.id, uploadId), eq(uploads.workerId, this.workerId)));
+    } finally {
+      clearInterval(heartbeat);
+
+      // Libera a posse (se ainda for deste worker)
+      await db
+        .update(uploads)
+        .set({ workerId: null, heartbeatAt: null })
+        .where(and(eq(uploads.id, uploadId), eq(uploads.workerId, this.workerId)))
+        .catch(error => log.warn({ err: error, uploadId }, 'Failed to release upload'));
+    }
+  }
+
+  /**
+   * lastProcessedIndex conta as transações na ordem do OFXStreamReader (ordem
+   * do arquivo). Confere se a última linha gravada do upload está no mesmo
+   * índice do arquivo; progresso gravado pelo caminho antigo (parseOFXFile,
+   * ordenado por data) aponta para outras linhas e não pode ser retomado.
+   */
+  private async resumeIndexMatchesFile(uploadId: string, filePath: string): Promise<boolean> {
+    const globalIndex = sql<number>`(${transactions.metadata}->>'globalIndex')::int`;
+    const [lastSaved] = await db
+      .select({
+        description: transactions.description,
+        amount: transactions.amount,
+        fitid: sql<string | null>`${transactions.metadata}->>'fitid'`,
+        globalIndex
+      })
+      .from(transactions)
+      .where(and(eq(transactions.uploadId, uploadId), sql`${transactions.metadata}->>'globalIndex' IS NOT NULL`))
+      .orderBy(sql`${globalIndex} DESC`)
+      .limit(1);
+
+    if (!lastSaved) return true;
+
+    const fileStream = await FileStorageService.openReadStream(filePath);
+    if (!fileStream) return false;
+
+    let index = 0;
+    for await (const tx of new OFXStreamReader(fileStream)) {
+      if (index++ === Number(lastSaved.globalIndex)) {
+        return lastSaved.fitid
+          ? tx.fitid === lastSaved.fitid
+          : tx.description === lastSaved.description && tx.amount === Number(lastSaved.amount);
+      }
     }
+    return false;
   }
 
   /**
-   * Verifica se um upload está sendo processado
+   * Verifica se um upload está sendo processado neste processo
    */
   isProcessing(uploadId: string): boolean {
-    return this.processingQueue.has(uploadId);
+    return this.active.has(uploadId);
   }
 
   /**
-   * Retorna quantos uploads estão na fila
+   * Retorna quantos uploads estão em execução neste processo
    */
   getQueueSize(): number {
-    return this.processingQueue.size;
+    return this.active.size;
   }
 }
 
@@ -1,11 +1,18 @@
 import { db } from '@/lib/db/connection';
 import { uploads, processingBatches, transactions, categories } from '@/lib/db/schema';
-import { eq, and, desc } from 'drizzle-orm';
+import { eq, and, desc, inArray } from 'drizzle-orm';
 import { NewTransaction, NewProcessingBatch, ProcessingBatch } from '@/lib/db/schema';
 import _ from 'lodash';
 import categoryCacheService from '@/lib/services/category-cache.service';
 import { TransactionCategorizationService } from '@/lib/services/transaction-categorization.service';
 import { aiCategorizationAdapter } from '@/lib/services/ai-categorization-adapter.service';
+import {
+  CategorizationMetrics,
+  measureStage,
+  countDbQuery,
+  type CategorizationMetricsSnapshot,
+  type CategorizationMetricsSummary
+} from '@/lib/services/categorization-metrics';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('batch-processing');
@@ -27,6 +34,33 @@ export interface TransactionData {
   balance?: number;
 }
 
+interface ClassificationResult {
+  categoryId: string | null;
+  categoryName: string;
+  confidence: number;
+  reasoning: string;
+  reason?: any; // Structured reason
+  source: string;
+  ruleId?: string;
+}
+
+/**
+ * Categorias usadas fora do pipeline de categorização, carregadas uma vez por upload
+ */
+interface UploadCategoryIds {
+  technicalCategory: { id: string; name: string } | null;   // "Saldo Inicial"
+  fallbackCategory: { id: string; name: string } | null;    // "Não Classificado"
+}
+
+export interface UploadMetrics {
+  uploadId: string;
+  batches: number;
+  // Tempo de parede somado dos batches (categorização + gravação)
+  processingTimeMs: number;
+  transactionsPerSecond: number;
+  pipeline: CategorizationMetricsSummary;
+}
+
 export interface ProcessingProgress {
   uploadId: string;
   currentBatch: number;
@@ -42,7 +76,7 @@ export interface ProcessingProgress {
 export class BatchProcessingService {
   private static instance: BatchProcessingService;
   private config: BatchProcessingConfig = {
-    batchSize: 15, // Processar 15 transações por vez
+    batchSize: 50, // Processar 50 transações por vez (1 insert + 1 update de progresso por batch)
     maxRetries: 3,
     retryDelay: 1000,
     enableCheckpoints: true
@@ -54,6 +88,9 @@ export class BatchProcessingService {
   // CompanyId para o processamento atual
   private companyId: string = '';
 
+  // Categorias técnica/fallback por upload (evita uma query por transação)
+  private uploadCategoryIds = new Map<string, Promise<UploadCategoryIds>>();
+
   private constructor() {
     // Configurar serviço de IA
     TransactionCategorizationService.setAIService(aiCategorizationAdapter);
@@ -66,6 +103,13 @@ export class BatchProcessingService {
     return BatchProcessingService.instance;
   }
 
+  /**
+   * Tamanho de batch que os chamadores devem usar ao fatiar as transações
+   */
+  getBatchSize(): number {
+    return this.config.batchSize;
+  }
+
   /**
    * Preparar upload para processamento em batches
    */
@@ -120,6 +164,13 @@ export class BatchProcessingService {
 
   /**
    * Processar um lote de transações
+   *
+   * Pipeline em duas fases: primeiro categoriza o lote inteiro (em chunks
+   * paralelos, o que permite ao adapter de IA agrupar as chamadas), depois
+   * grava tudo numa única transação do banco: um insert multi-row, o
+   * progresso do upload e o status do batch. lastProcessedIndex só avança
+   * junto com as linhas efetivamente gravadas.
+   * As métricas do pipeline (CategorizationMetrics) vão no processingLog do batch.
    */
   async processBatch(
     uploadId: string,
@@ -143,83 +194,53 @@ export class BatchProcessingService {
     let success = 0;
     let failed = 0;
     const errors: string[] = [];
-
-    // Atualizar status do batch
-    await db.update(processingBatches)
-      .set({
-        status: 'processing',
-        startedAt: new Date()
-      })
-      .where(
-        and(
-          eq(processingBatches.uploadId, uploadId),
-          eq(processingBatches.batchNumber, batchNumber)
-        )
-      );
+    const startedAt = new Date();
+    const metrics = new CategorizationMetrics();
 
     try {
+      const companyIdToUse = context.companyId || this.companyId;
+      const categoryIds = await metrics.run(() => this.getUploadCategoryIds(uploadId));
+
+      // Fase 1: categorizar o lote inteiro
       // 🚀 OTIMIZAÇÃO: Processamento paralelo em chunks
       // Divide transações em grupos de PARALLEL_LIMIT para processar simultaneamente
       const chunks = _.chunk(batchTransactions, this.PARALLEL_LIMIT);
+      const rows: NewTransaction[] = [];
 
-      log.info({ totalTransactions: batchTransactions.length, chunks: chunks.length, parallelLimit: this.PARALLEL_LIMIT }, '[PARALLEL] Processando transacoes em chunks paralelos');
+      log.info({ totalTransactions: batchTransactions.length, chunks: chunks.length, parallelLimit: this.PARALLEL_LIMIT }, '[PARALLEL] Categorizando transacoes em chunks paralelos');
 
       for (let chunkIndex = 0; chunkIndex < chunks.length; chunkIndex++) {
         const chunk = chunks[chunkIndex];
 
-        // Processar todas transações do chunk em paralelo
+        // Classificar todas transações do chunk em paralelo
         const chunkResults = await Promise.allSettled(
           chunk.map(async (transaction, idx) => {
             const globalIndex = startIndex + (chunkIndex * this.PARALLEL_LIMIT) + idx;
 
             // Classificar transação usando novo sistema unificado
-            const companyIdToUse = context.companyId || this.companyId;
             if (!companyIdToUse) {
               throw new Error('companyId is required for categorization');
             }
 
-            const classificationResult = await this.classifyTransaction(transaction, companyIdToUse);
+            const classificationResult = await metrics.run(() =>
+              measureStage('total', () => this.classifyTransaction(transaction, companyIdToUse, categoryIds))
+            );
+            metrics.recordOutcome(classificationResult.source);
 
-            // Preparar dados para inserção
-            const transactionData: NewTransaction = {
+            return this.buildTransactionRow(transaction, classificationResult, {
               accountId,
-              categoryId: classificationResult.categoryId,
               uploadId,
-              description: transaction.description,
-              name: transaction.name,
-              memo: transaction.memo,
-              amount: transaction.amount.toString(),
-              type: transaction.amount >= 0 ? 'credit' : 'debit',
-              transactionDate: new Date(transaction.date).toISOString(),
-              rawDescription: transaction.description,
-              metadata: {
-                fitid: transaction.fitid,
-                originalAmount: transaction.amount,
-                batchNumber,
-                globalIndex
-              },
-              manuallyCategorized: false,
-              verified: false,
-              confidence: classificationResult.confidence.toString(),
-              reasoning: classificationResult.reason ? JSON.stringify(classificationResult.reason) : classificationResult.reasoning,
-              // Novos campos para rastreamento
-              categorizationSource: classificationResult.source,
-              ruleId: classificationResult.ruleId || null
-            };
-
-            // Inserir transação
-            await db.insert(transactions).values(transactionData);
-
-            return { success: true, globalIndex };
+              batchNumber,
+              globalIndex
+            });
           })
         );
 
-        // Processar resultados do chunk
         chunkResults.forEach((result, idx) => {
           const globalIndex = startIndex + (chunkIndex * this.PARALLEL_LIMIT) + idx;
 
           if (result.status === 'fulfilled') {
-            success++;
+            rows.push(result.value);
           } else {
             failed++;
             const errorMsg = `Erro na transação ${globalIndex}: ${result.reason?.message || 'Erro desconhecido'}`;
@@ -228,52 +249,74 @@ export class BatchProcessingService {
           }
         });
 
-        // Atualizar progresso após cada chunk
-        const processedSoFar = startIndex + (chunkIndex + 1) * this.PARALLEL_LIMIT;
-        await this.updateUploadProgress(uploadId, Math.min(processedSoFar, startIndex + batchTransactions.length), batchNumber);
-
-        log.info({ chunkIndex: chunkIndex + 1, totalChunks: chunks.length, chunkSize: chunk.length, success, failed }, '[PARALLEL-CHUNK] Chunk concluido');
+        log.info({ chunkIndex: chunkIndex + 1, totalChunks: chunks.length, chunkSize: chunk.length, categorized: rows.length, failed }, '[PARALLEL-CHUNK] Chunk categorizado');
       }
 
-      // Atualizar batch como concluído
-      await db.update(processingBatches)
-        .set({
-          status: 'completed',
-          processedTransactions: success,
-          completedAt: new Date(),
-          processingLog: {
-            success,
-            failed,
-            errors,
-            processingTime: Date.now()
-          }
-        })
-        .where(
-          and(
-            eq(processingBatches.uploadId, uploadId),
-            eq(processingBatches.batchNumber, batchNumber)
-          )
-        );
+      // Fase 2: gravar lote, progresso e status do batch numa única transação
+      const processedTransactions = startIndex + batchTransactions.length;
 
-      // Atualizar progresso final do batch
-      await this.updateUploadProgress(uploadId, startIndex + batchTransactions.length, batchNumber);
+      const persistStartedAt = performance.now();
+      let completedValues: Partial<NewProcessingBatch>;
+
+      // Dentro do coletor: cada statement de gravação conta em dbQueries.persist
+      await metrics.run(async () => {
+        try {
+          await db.transaction(async (tx) => {
+            if (rows.length > 0) {
+              countDbQuery('persist');
+              await tx.insert(transactions).values(rows);
+            }
+            await this.updateUploadProgress(uploadId, processedTransactions, batchNumber, tx);
+            completedValues = this.completedBatchValues(startedAt, rows.length, failed, errors, metrics);
+            await this.saveBatch(uploadId, batchNumber, batchTransactions.length, completedValues, tx);
+          });
+          success = rows.length;
+        } catch (bulkError) {
+          // Uma linha inválida derruba o insert multi-row: isola as linhas com inserts
+          // individuais (um savepoint cada), ainda na mesma transação do progresso,
+          // para que uma retomada nunca encontre linhas gravadas além de lastProcessedIndex
+          log.warn({ err: bulkError, batchNumber, rows: rows.length }, '[BATCH-INSERT] Insert em lote falhou, gravando linha a linha');
+
+          await db.transaction(async (tx) => {
+            for (const row of rows) {
+              try {
+                countDbQuery('persist');
+                await tx.transaction(async (savepoint) => {
+                  await savepoint.insert(transactions).values(row);
+                });
+                success++;
+              } catch (rowError) {
+                failed++;
+                const globalIndex = (row.metadata as { globalIndex: number }).globalIndex;
+                const errorMsg = `Erro na transação ${globalIndex}: ${rowError instanceof Error ? rowError.message : 'Erro desconhecido'}`;
+                errors.push(errorMsg);
+                log.error({ globalIndex, errorMsg }, '[BATCH-ERROR]');
+              }
+            }
+
+            await this.updateUploadProgress(uploadId, processedTransactions, batchNumber, tx);
+            completedValues = this.completedBatchValues(startedAt, success, failed, errors, metrics);
+            await this.saveBatch(uploadId, batchNumber, batchTransactions.length, completedValues, tx);
+          });
+        }
+
+        // A latência de persist inclui o commit, então só existe depois da transação:
+        // regrava o processing log do batch (o snapshot de métricas é o mesmo objeto)
+        metrics.recordLatency('persist', performance.now() - persistStartedAt);
+        await this.saveBatchLog(uploadId, batchNumber, completedValues!.processingLog);
+      });
 
       log.info({ batchNumber, success, failed, uploadId }, '[BATCH-COMPLETE] Batch concluido');
 
     } catch (error) {
       // Marcar batch como falha
-      await db.update(processingBatches)
-        .set({
-          status: 'failed',
-          errorMessage: error instanceof Error ? error.message : 'Erro desconhecido',
-          completedAt: new Date()
-        })
-        .where(
-          and(
-            eq(processingBatches.uploadId, uploadId),
-            eq(processingBatches.batchNumber, batchNumber)
-          )
-        );
+      await this.saveBatch(uploadId, batchNumber, batchTransactions.length, {
+        status: 'failed',
+        errorMessage: error instanceof Error ? error.message : 'Erro desconhecido',
+        startedAt,
+        completedAt: new Date(),
+        processingLog: { metrics: metrics.toJSON() }
+      });
 
       log.error({ err: error, batchNumber }, '[BATCH-FAIL] Batch falhou');
       throw error;
@@ -282,10 +325,207 @@ export class BatchProcessingService {
     return { success, failed, errors };
   }
 
+  /**
+   * Processa transações vindas de um iterador (ex: OFXStreamReader) em
+   * batches de config.batchSize, sem materializar a lista inteira.
+   * Com startIndex > 0 (retomada), os itens já processados são descartados.
+   * shouldStop é consultado antes de cada batch (ex: worker perdeu o upload).
+   * Um batch que falha interrompe o stream com erro: os batches seguintes
+   * avançariam lastProcessedIndex além das linhas não gravadas, então quem
+   * chama (o worker) devolve o upload para a fila e retoma desse ponto.
+   */
+  async processTransactionStream(
+    uploadId: string,
+    source: AsyncIterable<TransactionData>,
+    accountId: string,
+    context: {
+      fileName?: string;
+      bankName?: string;
+      companyId?: string;
+    },
+    startIndex = 0,
+    shouldStop?: () => boolean
+  ): Promise<{
+    success: number;
+    failed: number;
+    total: number;
+    stopped: boolean;
+  }> {
+    const batchSize = this.config.batchSize;
+    let success = 0;
+    let failed = 0;
+    let index = 0;
+    let batch: TransactionData[] = [];
+    let batchStart = startIndex;
+
+    const flush = async () => {
+      const batchNumber = Math.floor(batchStart / batchSize) + 1;
+      const result = await this.processBatch(uploadId, batch, accountId, null, context, batchNumber, batchStart);
+      success += result.success;
+      failed += result.failed;
+      batchStart += batch.length;
+      batch = [];
+    };
+
+    try {
+      for await (const transaction of source) {
+        if (index++ < startIndex) continue;
+
+        batch.push(transaction);
+        if (batch.length === batchSize) {
+          if (shouldStop?.()) return { success, failed, total: index, stopped: true };
+          await flush();
+        }
+      }
+
+      if (batch.length > 0) {
+        if (shouldStop?.()) return { success, failed, total: index, stopped: true };
+        await flush();
+      }
+
+      return { success, failed, total: index, stopped: false };
+    } finally {
+      this.releaseUpload(uploadId);
+    }
+  }
+
+  /**
+   * Linha de financeai_transactions a partir da transação classificada
+   */
+  private buildTransactionRow(
+    transaction: TransactionData,
+    classificationResult: ClassificationResult,
+    target: { accountId: string; uploadId: string; batchNumber: number; globalIndex: number }
+  ): NewTransaction {
+    return {
+      accountId: target.accountId,
+      categoryId: classificationResult.categoryId,
+      uploadId: target.uploadId,
+      description: transaction.description,
+      name: transaction.name,
+      memo: transaction.memo,
+      amount: transaction.amount.toString(),
+      type: transaction.amount >= 0 ? 'credit' : 'debit',
+      transactionDate: new Date(transaction.date).toISOString(),
+      rawDescription: transaction.description,
+      metadata: {
+        fitid: transaction.fitid,
+        originalAmount: transaction.amount,
+        batchNumber: target.batchNumber,
+        globalIndex: target.globalIndex
+      },
+      manuallyCategorized: false,
+      verified: false,
+      confidence: classificationResult.confidence.toString(),
+      reasoning: classificationResult.reason ? JSON.stringify(classificationResult.reason) : classificationResult.reasoning,
+      // Novos campos para rastreamento
+      categorizationSource: classificationResult.source,
+      ruleId: classificationResult.ruleId || null
+    };
+  }
+
+  private completedBatchValues(
+    startedAt: Date,
+    success: number,
+    failed: number,
+    errors: string[],
+    metrics: CategorizationMetrics
+  ): Partial<NewProcessingBatch> {
+    return {
+      status: 'completed',
+      processedTransactions: success,
+      startedAt,
+      completedAt: new Date(),
+      processingLog: {
+        success,
+        failed,
+        errors,
+        processingTime: Date.now() - startedAt.getTime(),
+        metrics: metrics.toJSON()
+      }
+    };
+  }
+
+  /**
+   * Grava o estado final do batch: upsert em (upload, batchNumber), que cobre a
+   * retomada e dois workers gravando o mesmo batch depois de uma perda de lease
+   */
+  private async saveBatch(
+    uploadId: string,
+    batchNumber: number,
+    totalTransactions: number,
+    values: Partial<NewProcessingBatch>,
+    executor: Pick<typeof db, 'insert'> = db
+  ): Promise<void> {
+    countDbQuery('persist');
+    await executor.insert(processingBatches)
+      .values({ ...values, uploadId, batchNumber, totalTransactions })
+      .onConflictDoUpdate({
+        target: [processingBatches.uploadId, processingBatches.batchNumber],
+        set: { ...values, totalTransactions }
+      });
+  }
+
+  /**
+   * Regrava só o processing log de um batch já salvo (métricas medidas após o commit).
+   * Falha aqui não desfaz o batch: as linhas e o progresso já estão gravados
+   */
+  private async saveBatchLog(uploadId: string, batchNumber: number, processingLog: unknown): Promise<void> {
+    try {
+      countDbQuery('persist');
+      await db.update(processingBatches)
+        .set({ processingLog })
+        .where(and(
+          eq(processingBatches.uploadId, uploadId),
+          eq(processingBatches.batchNumber, batchNumber)
+        ));
+    } catch (error) {
+      log.warn({ err: error, uploadId, batchNumber }, '[BATCH-LOG] Falha ao gravar métricas do batch');
+    }
+  }
+
+  /**
+   * Categorias "Saldo Inicial" (pré-filtro técnico) e "Não Classificado"
+   * (fallback de erro), buscadas numa única query na primeira vez que o
+   * upload precisa delas
+   */
+  private getUploadCategoryIds(uploadId: string): Promise<UploadCategoryIds> {
+    let pending = this.uploadCategoryIds.get(uploadId);
+    if (!pending) {
+      countDbQuery('uploadCategories');
+      pending = db.select({ id: categories.id, name: categories.name, active: categories.active })
+        .from(categories)
+        .where(inArray(categories.name, ['Saldo Inicial', 'Não Classificado']))
+        .then(rows => {
+          const technical = rows.find(c => c.name === 'Saldo Inicial');
+          const fallback = rows.find(c => c.name === 'Não Classificado' && c.active);
+          return {
+            technicalCategory: technical ? { id: technical.id, name: technical.name } : null,
+            fallbackCategory: fallback ? { id: fallback.id, name: fallback.name } : null
+          };
+        });
+      pending.catch(() => this.uploadCategoryIds.delete(uploadId));
+      this.uploadCategoryIds.set(uploadId, pending);
+    }
+    return pending;
+  }
+
+  /**
+   * Descarta o estado em memória do upload (categorias pré-carregadas).
+   * Chamado ao concluir o upload e ao fim de cada processTransactionStream,
+   * inclusive quando ele falha ou é interrompido.
+   */
+  releaseUpload(uploadId: string): void {
+    this.uploadCategoryIds.delete(uploadId);
+  }
+
   /**
    * Pré-filtra transações técnicas (Saldos, Snapshots) para evitar custo de IA
    */
-  private async preFilterTechnicalTransactions(description: string): Promise<{ categoryId: string; categoryName: string; confidence: number; reasoning: string; source: string } | null> {
+  private preFilterTechnicalTransactions(
+    description: string,
+    technicalCategory: UploadCategoryIds['technicalCategory']
+  ): { categoryId: string; categoryName: string; confidence: number; reasoning: string; source: string } | null {
     const upperDesc = description.toUpperCase();
     
     // Padrões que indicam snapshots de saldo técnico (OFX)
@@ -303,16 +543,11 @@ export class BatchProcessingService {
     ];
 
     if (technicalPatterns.some(pattern => upperDesc.includes(pattern))) {
-      // Buscar a categoria "Saldo Inicial" (que já temos is_ignored=true nela)
-      const [saldoCategory] = await db.select()
-        .from(categories)
-        .where(eq(categories.name, 'Saldo Inicial'))
-        .limit(1);
-
-      if (saldoCategory) {
+      // Categoria "Saldo Inicial" (que já temos is_ignored=true nela), pré-carregada por upload
+      if (technicalCategory) {
         return {
-          categoryId: saldoCategory.id,
-          categoryName: saldoCategory.name,
+          categoryId: technicalCategory.id,
+          categoryName: technicalCategory.name,
           confidence: 100,
           reasoning: 'Otimização: Transação técnica de saldo detectada via descrição (Bypass IA)',
           source: 'pre-filter'
@@ -328,19 +563,12 @@ export class BatchProcessingService {
    */
   private async classifyTransaction(
     transaction: TransactionData,
-    companyId: string
-  ): Promise<{
-    categoryId: string | null;
-    categoryName: string;
-    confidence: number;
-    reasoning: string;
-    reason?: any; // Structured reason
-    source: string;
-    ruleId?: string;
-  }> {
+    companyId: string,
+    categoryIds: UploadCategoryIds
+  ): Promise<ClassificationResult> {
     try {
       // 1. OTIMIZAÇÃO: Pré-filtro determinístico (Custo Zero)
-      const preFilterResult = await this.preFilterTechnicalTransactions(transaction.description);
+      const preFilterResult = this.preFilterTechnicalTransactions(transaction.description, categoryIds.technicalCategory);
       if (preFilterResult) {
         log.info({ description: transaction.description, categoryName: preFilterResult.categoryName }, '[PRE-FILTER] Bypass IA');
         return preFilterResult;
@@ -385,13 +613,7 @@ export class BatchProcessingService {
       // Fallback para categoria "Não Classificado"
       log.error({ err: error }, 'Erro na classificacao');
 
-      const [fallbackCategory] = await db.select()
-        .from(categories)
-        .where(and(
-          eq(categories.name, 'Não Classificado'),
-          eq(categories.active, true)
-        ))
-        .limit(1);
+      const { fallbackCategory } = categoryIds;
 
       return {
         categoryId: fallbackCategory?.id || null,
@@ -409,9 +631,11 @@ export class BatchProcessingService {
   private async updateUploadProgress(
     uploadId: string,
     processedTransactions: number,
-    currentBatch: number
+    currentBatch: number,
+    executor: Pick<typeof db, 'update'> = db
   ): Promise<void> {
-    await db.update(uploads)
+    countDbQuery('persist');
+    await executor.update(uploads)
       .set({
         processedTransactions,
         currentBatch,
@@ -480,6 +704,48 @@ export class BatchProcessingService {
     return remainingBatches * avgTimePerBatch;
   }
 
+  /**
+   * Métricas do pipeline de categorização de um upload (soma dos batches)
+   */
+  async getUploadMetrics(uploadId: string, companyId: string): Promise<UploadMetrics | null> {
+    const [upload] = await db.select({ id: uploads.id })
+      .from(uploads)
+      .where(and(eq(uploads.id, uploadId), eq(uploads.companyId, companyId)))
+      .limit(1);
+
+    if (!upload) return null;
+
+    const batches = await db.select({
+      startedAt: processingBatches.startedAt,
+      completedAt: processingBatches.completedAt,
+      processingLog: processingBatches.processingLog
+    })
+      .from(processingBatches)
+      .where(eq(processingBatches.uploadId, uploadId));
+
+    const snapshots: CategorizationMetricsSnapshot[] = [];
+    let processingTimeMs = 0;
+    for (const batch of batches) {
+      const metrics = (batch.processingLog as { metrics?: CategorizationMetricsSnapshot } | null)?.metrics;
+      if (metrics) snapshots.push(metrics);
+      if (batch.startedAt && batch.completedAt) {
+        processingTimeMs += new Date(batch.completedAt).getTime() - new Date(batch.startedAt).getTime();
+      }
+    }
+
+    const pipeline = CategorizationMetrics.summarize(CategorizationMetrics.merge(snapshots));
+
+    return {
+      uploadId,
+      batches: batches.length,
+      processingTimeMs,
+      transactionsPerSecond: processingTimeMs > 0
+        ? Math.round((pipeline.transactions / processingTimeMs) * 1000 * 100) / 100
+        : 0,
+      pipeline
+    };
+  }
+
   /**
    * Marcar upload como concluído
    */
@@ -488,21 +754,25 @@ export class BatchProcessingService {
     failed: number;
     totalTime: number;
   }): Promise<void> {
-    await db.update(uploads)
-      .set({
-        status: 'completed',
-        successfulTransactions: stats.successful,
-        failedTransactions: stats.failed,
-        processedAt: new Date(),
-        currentBatch: 0, // Reset para indicar conclusão
-        processingLog: {
-          totalProcessed: stats.successful + stats.failed,
-          successful: stats.successful,
-          failed: stats.failed,
-          processingTime: stats.totalTime
-        }
-      })
-      .where(eq(uploads.id, uploadId));
+    try {
+      await db.update(uploads)
+        .set({
+          status: 'completed',
+          successfulTransactions: stats.successful,
+          failedTransactions: stats.failed,
+          processedAt: new Date(),
+          currentBatch: 0, // Reset para indicar conclusão
+          processingLog: {
+            totalProcessed: stats.successful + stats.failed,
+            successful: stats.successful,
+            failed: stats.failed,
+            processingTime: stats.totalTime
+          }
+        })
+        .where(eq(uploads.id, uploadId));
+    } finally {
+      this.releaseUpload(uploadId);
+    }
 
     log.info({ uploadId, ...stats }, '[UPLOAD-COMPLETE] Upload concluido');
 
@@ -28,6 +28,7 @@ import {
 import { nanoid } from 'nanoid';
 import { getFinancialExclusionClause, getCategoryExclusionClause, getTransactionDescriptionExclusionClause } from './financial-exclusion';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from './rule-index.service';
 
 const log = createLogger('categories');
 
@@ -632,6 +633,8 @@ export default class CategoriesService {
         })
         .returning();
 
+      RuleIndexService.invalidate(newRule.companyId);
+
       return {
         id: newRule.id,
         name: `Regra: ${newRule.rulePattern}`,
@@ -671,6 +674,8 @@ export default class CategoriesService {
         throw new Error('Category rule not found');
       }
 
+      RuleIndexService.invalidate(updatedRule.companyId);
+
       return {
         id: updatedRule.id,
         name: `Regra: ${updatedRule.rulePattern}`,
@@ -696,9 +701,12 @@ export default class CategoriesService {
     try {
       this.checkDatabaseConnection();
 
-      await db
+      const [deletedRule] = await db
         .delete(categoryRules)
-        .where(eq(categoryRules.id, id));
+        .where(eq(categoryRules.id, id))
+        .returning({ companyId: categoryRules.companyId });
+
+      RuleIndexService.invalidate(deletedRule?.companyId);
 
     } catch (error) {
       log.error({ err: error }, 'Error deleting category rule');
@@ -0,0 +1,239 @@
+/**
+ * Categorization Metrics
+ *
+ * Instrumentação do pipeline de categorização por upload: histogramas de
+ * latência por etapa (cache → regras → histórico → IA, validação, enriquecimento),
+ * contagem de queries ao banco e resultado final de cada transação.
+ *
+ * O coletor ativo é propagado por AsyncLocalStorage: o BatchProcessingService
+ * executa cada transação dentro de metrics.run(), e as camadas só chamam
+ * measureStage()/countDbQuery(). Fora de um coletor (ex: rotas de API que
+ * categorizam uma transação avulsa) as chamadas não registram nada.
+ *
+ * dbQueries conta os statements emitidos pelo pipeline e pela gravação do batch
+ * (BEGIN/COMMIT/SAVEPOINT não entram). Trabalho disparado em segundo plano
+ * (ex: auto-aprendizado) só aparece se terminar antes do batch ser gravado.
+ */
+
+import { AsyncLocalStorage } from 'async_hooks';
+
+export type PipelineStage =
+  | 'total'        // classifyTransaction inteira
+  | 'cache'
+  | 'rules'
+  | 'history'
+  | 'ai'           // inclui espera da janela do lote e enriquecimento
+  | 'validation'   // validateHardConstraints
+  | 'enrichment'   // dicionário de termos bancários
+  | 'companySearch'
+  | 'persist';     // insert do lote + progresso + status do batch, até o commit
+
+// Limites superiores dos buckets (ms); o último bucket conta o que passar de 10s
+export const LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+
+export interface LatencyHistogram {
+  count: number;
+  sumMs: number;
+  maxMs: number;
+  buckets: number[]; // LATENCY_BUCKETS_MS.length + 1 posições
+}
+
+export interface StageStats {
+  calls: number;
+  hits: number; // Etapa devolveu um resultado (candidato de categoria)
+}
+
+export interface CategorizationMetricsSnapshot {
+  transactions: number;
+  outcomes: Record<string, number>; // Fonte final: cache-exact, rule, history, ai, manual, pre-filter, error...
+  stages: Partial<Record<PipelineStage, StageStats>>;
+  latency: Partial<Record<PipelineStage, LatencyHistogram>>;
+  dbQueries: Record<string, number>;
+}
+
+export interface CategorizationMetricsSummary extends CategorizationMetricsSnapshot {
+  hitRatios: {
+    cache: number;
+    rules: number;
+    history: number;
+    ai: number;
+    preFilter: number;
+    unclassified: number;
+  };
+  latencySummary: Partial<Record<PipelineStage, { avgMs: number; p50Ms: number; p95Ms: number; maxMs: number }>>;
+  dbQueriesPerTransaction: number;
+}
+
+function emptyHistogram(): LatencyHistogram {
+  return { count: 0, sumMs: 0, maxMs: 0, buckets: new Array(LATENCY_BUCKETS_MS.length + 1).fill(0) };
+}
+
+/**
+ * Percentil aproximado: limite superior do bucket que contém a amostra
+ */
+export function percentile(histogram: LatencyHistogram, p: number): number {
+  if (histogram.count === 0) return 0;
+  const target = Math.ceil(histogram.count * p);
+  let seen = 0;
+  for (let i = 0; i < histogram.buckets.length; i++) {
+    seen += histogram.buckets[i];
+    if (seen >= target) {
+      return i < LATENCY_BUCKETS_MS.length ? Math.min(LATENCY_BUCKETS_MS[i], histogram.maxMs) : histogram.maxMs;
+    }
+  }
+  return histogram.maxMs;
+}
+
+const storage = new AsyncLocalStorage<CategorizationMetrics>();
+
+export class CategorizationMetrics {
+  private snapshot: CategorizationMetricsSnapshot = {
+    transactions: 0,
+    outcomes: {},
+    stages: {},
+    latency: {},
+    dbQueries: {}
+  };
+
+  /**
+   * Coletor ativo no contexto assíncrono atual (se houver)
+   */
+  static current(): CategorizationMetrics | undefined {
+    return storage.getStore();
+  }
+
+  /**
+   * Executa fn com este coletor ativo
+   */
+  run<T>(fn: () => Promise<T>): Promise<T> {
+    return storage.run(this, fn);
+  }
+
+  recordLatency(stage: PipelineStage, ms: number): void {
+    const histogram = this.snapshot.latency[stage] ?? (this.snapshot.latency[stage] = emptyHistogram());
+    histogram.count++;
+    histogram.sumMs += ms;
+    if (ms > histogram.maxMs) histogram.maxMs = ms;
+
+    const bucket = LATENCY_BUCKETS_MS.findIndex(limit => ms <= limit);
+    histogram.buckets[bucket === -1 ? LATENCY_BUCKETS_MS.length : bucket]++;
+  }
+
+  recordStage(stage: PipelineStage, hit: boolean): void {
+    const stats = this.snapshot.stages[stage] ?? (this.snapshot.stages[stage] = { calls: 0, hits: 0 });
+    stats.calls++;
+    if (hit) stats.hits++;
+  }
+
+  countDbQuery(name: string, count = 1): void {
+    this.snapshot.dbQueries[name] = (this.snapshot.dbQueries[name] || 0) + count;
+  }
+
+  recordOutcome(source: string): void {
+    this.snapshot.transactions++;
+    this.snapshot.outcomes[source] = (this.snapshot.outcomes[source] || 0) + 1;
+  }
+
+  toJSON(): CategorizationMetricsSnapshot {
+    return this.snapshot;
+  }
+
+  /**
+   * Soma snapshots (ex: todos os batches de um upload)
+   */
+  static merge(snapshots: CategorizationMetricsSnapshot[]): CategorizationMetricsSnapshot {
+    const merged = new CategorizationMetrics();
+    const target = merged.snapshot;
+
+    for (const snapshot of snapshots) {
+      target.transactions += snapshot.transactions;
+
+      for (const [source, count] of Object.entries(snapshot.outcomes)) {
+        target.outcomes[source] = (target.outcomes[source] || 0) + count;
+      }
+
+      for (const [name, count] of Object.entries(snapshot.dbQueries)) {
+        target.dbQueries[name] = (target.dbQueries[name] || 0) + count;
+      }
+
+      for (const [stage, stats] of Object.entries(snapshot.stages) as [PipelineStage, StageStats][]) {
+        const current = target.stages[stage] ?? (target.stages[stage] = { calls: 0, hits: 0 });
+        current.calls += stats.calls;
+        current.hits += stats.hits;
+      }
+
+      for (const [stage, histogram] of Object.entries(snapshot.latency) as [PipelineStage, LatencyHistogram][]) {
+        const current = target.latency[stage] ?? (target.latency[stage] = emptyHistogram());
+        current.count += histogram.count;
+        current.sumMs += histogram.sumMs;
+        current.maxMs = Math.max(current.maxMs, histogram.maxMs);
+        histogram.buckets.forEach((count, i) => { current.buckets[i] += count; });
+      }
+    }
+
+    return target;
+  }
+
+  /**
+   * Snapshot + razões de acerto por camada e percentis de latência
+   */
+  static summarize(snapshot: CategorizationMetricsSnapshot): CategorizationMetricsSummary {
+    const total = snapshot.transactions;
+    const ratio = (...sources: string[]) => {
+      if (total === 0) return 0;
+      const count = sources.reduce((sum, source) => sum + (snapshot.outcomes[source] || 0), 0);
+      return Math.round((count / total) * 1000) / 1000;
+    };
+
+    const latencySummary: CategorizationMetricsSummary['latencySummary'] = {};
+    for (const [stage, histogram] of Object.entries(snapshot.latency) as [PipelineStage, LatencyHistogram][]) {
+      latencySummary[stage] = {
+        avgMs: histogram.count > 0 ? Math.round((histogram.sumMs / histogram.count) * 100) / 100 : 0,
+        p50Ms: Math.round(percentile(histogram, 0.5) * 100) / 100,
+        p95Ms: Math.round(percentile(histogram, 0.95) * 100) / 100,
+        maxMs: Math.round(histogram.maxMs * 100) / 100
+      };
+    }
+
+    const queries = Object.values(snapshot.dbQueries).reduce((sum, count) => sum + count, 0);
+
+    return {
+      ...snapshot,
+      hitRatios: {
+        cache: ratio('cache', 'cache-exact', 'cache-similar'),
+        rules: ratio('rule'),
+        history: ratio('history'),
+        ai: ratio('ai'),
+        preFilter: ratio('pre-filter'),
+        unclassified: ratio('manual', 'error')
+      },
+      latencySummary,
+      dbQueriesPerTransaction: total > 0 ? Math.round((queries / total) * 100) / 100 : 0
+    };
+  }
+}
+
+/**
+ * Mede a duração de uma etapa no coletor ativo; hit = etapa devolveu resultado
+ */
+export async function measureStage<T>(stage: PipelineStage, fn: () => Promise<T>): Promise<T> {
+  const metrics = storage.getStore();
+  if (!metrics) return fn();
+
+  const startedAt = performance.now();
+  let result: T | undefined;
+  try {
+    result = await fn();
+    return result;
+  } finally {
+    metrics.recordLatency(stage, performance.now() - startedAt);
+    metrics.recordStage(stage, result !== null && result !== undefined);
+  }
+}
+
+/**
+ * Conta uma query ao banco no coletor ativo
+ */
+export function countDbQuery(name: string, count = 1): void {
+  storage.getStore()?.countDbQuery(name, count);
+}
@@ -6,6 +6,12 @@
  *   - Guarda categoryId (não apenas nome)
  *   - Normalização menos destrutiva (preserva dígitos curtos)
  *
+ * v3.0 - Busca sub-linear e memória limitada:
+ *   - Partição por empresa (sem varrer/splitar chaves de outras empresas)
+ *   - Índice de trigramas + filtro de tamanho para podar candidatos
+ *   - Levenshtein em faixa (banded, duas linhas) com saída antecipada
+ *   - LRU + TTL para o Map não crescer indefinidamente no processo Next.js
+ *
  * Evita chamadas desnecessárias para IA cacheando descrições similares
  */
 
@@ -41,6 +47,16 @@ export interface CacheStats {
   oldestEntry: Date | null;
   newestEntry: Date | null;
   byCompany: Record<string, number>;
+  // Contadores de desempenho
+  totalLookups: number;
+  exactHits: number;
+  similarHits: number;
+  misses: number;
+  evictions: number;
+  expired: number;
+  avgLookupMs: number;
+  maxLookupMs: number;
+  avgCandidatesPerMiss: number; // Candidatas verificadas por busca por similaridade
 }
 
 export interface CacheLookupResult {
@@ -50,10 +66,48 @@ export interface CacheLookupResult {
   source: 'cache-exact' | 'cache-similar';
 }
 
-class CategoryCacheService {
-  private cache = new Map<string, CachedCategory>();
+export interface CategoryCacheConfig {
+  maxEntries: number;           // Limite global de entradas (LRU)
+  maxEntriesPerCompany: number; // Limite por empresa (LRU)
+  ttlMs: number;                // Idade máxima de uma entrada
+}
+
+const DEFAULT_CACHE_CONFIG: CategoryCacheConfig = {
+  maxEntries: 50_000,
+  maxEntriesPerCompany: 10_000,
+  ttlMs: 30 * 24 * 60 * 60 * 1000 // 30 dias (mesmo default de cleanOldEntries)
+};
+
+const TRIGRAM_SIZE = 3;
+
+/**
+ * Partição de uma empresa.
+ * A ordem de inserção do Map é a ordem LRU (acesso = delete + set).
+ */
+interface CompanyPartition {
+  entries: Map<string, CachedCategory>;  // descrição normalizada → entrada
+  postings: Map<string, Set<string>>;    // trigrama → descrições normalizadas
+}
+
+export class CategoryCacheService {
+  private partitions = new Map<string, CompanyPartition>();
+  private size = 0;
+  private config: CategoryCacheConfig;
+
   private totalHits = 0;
   private totalLookups = 0;
+  private exactHits = 0;
+  private similarHits = 0;
+  private evictions = 0;
+  private expired = 0;
+  private similarSearches = 0;
+  private candidatesScanned = 0;
+  private totalLookupMs = 0;
+  private maxLookupMs = 0;
+
+  constructor(config: Partial<CategoryCacheConfig> = {}) {
+    this.config = { ...DEFAULT_CACHE_CONFIG, ...config };
+  }
 
   /**
    * Normaliza descrição da transação para matching.
@@ -73,80 +127,127 @@ class CategoryCacheService {
   }
 
   /**
-   * Gera chave de cache segmentada por empresa.
-   * Formato: "companyId::normalizedDescription"
+   * Trigramas distintos de uma descrição normalizada
    */
-  private generateCacheKey(description: string, companyId: string): string {
-    const normalized = this.normalizeDescription(description);
-    return `${companyId}::${normalized}`;
+  private getTrigrams(text: string): Set<string> {
+    const trigrams = new Set<string>();
+    for (let i = 0; i + TRIGRAM_SIZE <= text.length; i++) {
+      trigrams.add(text.slice(i, i + TRIGRAM_SIZE));
+    }
+    return trigrams;
   }
 
   /**
-   * Calcula distância de Levenshtein entre duas strings
-   * Usado para medir similaridade
+   * Distância de Levenshtein limitada a maxDistance.
+   * Calcula só a faixa |i - j| <= maxDistance com duas linhas e retorna
+   * maxDistance + 1 assim que nenhuma célula da linha fica dentro do limite.
    */
-  private levenshteinDistance(str1: string, str2: string): number {
-    const matrix: number[][] = [];
-
-    for (let i = 0; i <= str1.length; i++) {
-      matrix[i] = [i];
-    }
-    for (let j = 0; j <= str2.length; j++) {
-      matrix[0][j] = j;
+  private boundedLevenshtein(str1: string, str2: string, maxDistance: number): number {
+    const overflow = maxDistance + 1;
+    if (Math.abs(str1.length - str2.length) > maxDistance) return overflow;
+
+    let previous = new Array<number>(str2.length + 1).fill(overflow);
+    let current = new Array<number>(str2.length + 1).fill(overflow);
+    for (let j = 0; j <= Math.min(str2.length, maxDistance); j++) {
+      previous[j] = j;
     }
 
     for (let i = 1; i <= str1.length; i++) {
-      for (let j = 1; j <= str2.length; j++) {
-        if (str1[i - 1] === str2[j - 1]) {
-          matrix[i][j] = matrix[i - 1][j - 1];
-        } else {
-          matrix[i][j] = Math.min(
-            matrix[i - 1][j - 1] + 1,
-            matrix[i][j - 1] + 1,
-            matrix[i - 1][j] + 1
-          );
-        }
+      const from = Math.max(1, i - maxDistance);
+      const to = Math.min(str2.length, i + maxDistance);
+
+      // Borda esquerda da faixa (coluna 0 só existe enquanto i <= maxDistance)
+      current[from - 1] = from === 1 && i <= maxDistance ? i : overflow;
+      let rowMin = current[from - 1];
+
+      for (let j = from; j <= to; j++) {
+        let value = previous[j - 1] + (str1[i - 1] === str2[j - 1] ? 0 : 1);
+        if (current[j - 1] + 1 < value) value = current[j - 1] + 1;
+        if (previous[j] + 1 < value) value = previous[j] + 1;
+        current[j] = value > overflow ? overflow : value;
+        if (current[j] < rowMin) rowMin = current[j];
       }
+      // Borda direita: a próxima linha lê previous[to + 1]
+      if (to < str2.length) current[to + 1] = overflow;
+
+      if (rowMin > maxDistance) return overflow;
+      [previous, current] = [current, previous];
     }
 
-    return matrix[str1.length][str2.length];
+    return Math.min(previous[str2.length], overflow);
   }
 
   /**
-   * Calcula similaridade entre duas strings (0-1)
-   * 1.0 = idênticas, 0.0 = completamente diferentes
+   * Similaridade (0-1) entre strings, ou 0 se abaixo do threshold.
+   * 1.0 = idênticas. Mesma fórmula de antes: (maior - distância) / maior
    */
-  private calculateSimilarity(str1: string, str2: string): number {
+  private similarityAtLeast(str1: string, str2: string, threshold: number): number {
     if (str1 === str2) return 1.0;
 
-    const longer = str1.length > str2.length ? str1 : str2;
-    const shorter = str1.length > str2.length ? str2 : str1;
+    const longest = Math.max(str1.length, str2.length);
+    if (longest === 0) return 1.0;
+
+    const maxDistance = Math.floor((1 - threshold) * longest + 1e-9);
+    const distance = this.boundedLevenshtein(str1, str2, maxDistance);
+    if (distance > maxDistance) return 0;
 
-    if (longer.length === 0) return 1.0;
+    return (longest - distance) / longest;
+  }
 
-    const distance = this.levenshteinDistance(longer, shorter);
-    return (longer.length - distance) / longer.length;
+  private isExpired(entry: CachedCategory, now = Date.now()): boolean {
+    return now - entry.timestamp.getTime() > this.config.ttlMs;
   }
 
   /**
-   * Extrai o sufixo de descrição normalizada da chave (remove prefixo companyId::)
+   * Move a empresa e a entrada para o fim da fila LRU
    */
-  private getDescriptionFromKey(key: string): string {
-    const separatorIndex = key.indexOf('::');
-    return separatorIndex >= 0 ? key.substring(separatorIndex + 2) : key;
+  private touch(companyId: string, partition: CompanyPartition, key: string, entry: CachedCategory): void {
+    partition.entries.delete(key);
+    partition.entries.set(key, entry);
+    this.partitions.delete(companyId);
+    this.partitions.set(companyId, partition);
+  }
+
+  private removeEntry(partition: CompanyPartition, key: string): void {
+    if (!partition.entries.delete(key)) return;
+    this.size--;
+
+    for (const trigram of this.getTrigrams(key)) {
+      const posting = partition.postings.get(trigram);
+      if (!posting) continue;
+      posting.delete(key);
+      if (posting.size === 0) partition.postings.delete(trigram);
+    }
   }
 
   /**
-   * Extrai o companyId do prefixo da chave
+   * Remove a entrada menos usada recentemente (da empresa informada ou,
+   * sem empresa, da empresa acessada há mais tempo)
    */
-  private getCompanyIdFromKey(key: string): string {
-    const separatorIndex = key.indexOf('::');
-    return separatorIndex >= 0 ? key.substring(0, separatorIndex) : '';
+  private evictOne(companyId?: string): void {
+    const targetId = companyId ?? this.partitions.keys().next().value;
+    if (targetId === undefined) return;
+
+    const partition = this.partitions.get(targetId);
+    if (!partition) return;
+
+    const oldestKey = partition.entries.keys().next().value;
+    if (oldestKey !== undefined) {
+      this.removeEntry(partition, oldestKey);
+      this.evictions++;
+    }
+    if (partition.entries.size === 0) this.partitions.delete(targetId);
+  }
+
+  private recordLookup(startedAt: number): void {
+    const elapsed = performance.now() - startedAt;
+    this.totalLookupMs += elapsed;
+    if (elapsed > this.maxLookupMs) this.maxLookupMs = elapsed;
   }
 
   /**
    * Busca categoria no cache (match exato ou por similaridade)
-   * SEGURO: filtra obrigatoriamente por companyId
+   * SEGURO: busca apenas na partição da empresa
    *
    * @param description - Descrição original da transação
    * @param companyId - ID da empresa (obrigatório para isolamento)
@@ -159,68 +260,133 @@ class CategoryCacheService {
     similarityThreshold = 0.90
   ): CacheLookupResult | null {
     this.totalLookups++;
+    const startedAt = performance.now();
 
-    const cacheKey = this.generateCacheKey(description, companyId);
-    const normalized = this.normalizeDescription(description);
+    try {
+      const normalized = this.normalizeDescription(description);
 
-    // Trava de segurança: bloquear buscas de termos genéricos
-    if (this.isBlocklisted(normalized)) {
-      log.info({ description }, '[CACHE-SKIP] Termo generico bloqueado (blocklist)');
+      // Trava de segurança: bloquear buscas de termos genéricos
+      if (this.isBlocklisted(normalized)) {
+        log.info({ description }, '[CACHE-SKIP] Termo generico bloqueado (blocklist)');
+        return null;
+      }
+
+      const partition = this.partitions.get(companyId);
+      if (!partition) {
+        log.info({ companyId: companyId.slice(0,8), description }, '[CACHE-MISS]');
+        return null;
+      }
+
+      // 1. Match exato (rápido)
+      const exact = partition.entries.get(normalized);
+      if (exact && this.isExpired(exact)) {
+        this.removeEntry(partition, normalized);
+        this.expired++;
+      } else if (exact) {
+        exact.hitCount++;
+        this.totalHits++;
+        this.exactHits++;
+        this.touch(companyId, partition, normalized, exact);
+
+        log.info({ companyId: companyId.slice(0,8), description, categoryName: exact.categoryName, hitCount: exact.hitCount }, '[CACHE-HIT-EXACT]');
+        return {
+          categoryId: exact.categoryId,
+          categoryName: exact.categoryName,
+          confidence: exact.confidence,
+          source: 'cache-exact'
+        };
+      }
+
+      // 2. Busca por similaridade (apenas candidatas da mesma empresa)
+      const bestMatch = this.findSimilar(partition, normalized, similarityThreshold);
+
+      if (bestMatch) {
+        bestMatch.entry.hitCount++;
+        this.totalHits++;
+        this.similarHits++;
+        this.touch(companyId, partition, bestMatch.key, bestMatch.entry);
+
+        log.info(
+          { companyId: companyId.slice(0,8), description, categoryName: bestMatch.entry.categoryName, similarity: (bestMatch.similarity * 100).toFixed(1), hitCount: bestMatch.entry.hitCount },
+          '[CACHE-HIT-SIMILAR]'
+        );
+
+        return {
+          categoryId: bestMatch.entry.categoryId,
+          categoryName: bestMatch.entry.categoryName,
+          confidence: bestMatch.entry.confidence * bestMatch.similarity, // Desconta pela similaridade
+          source: 'cache-similar'
+        };
+      }
+
+      // 3. Cache miss
+      log.info({ companyId: companyId.slice(0,8), description }, '[CACHE-MISS]');
       return null;
+    } finally {
+      this.recordLookup(startedAt);
     }
+  }
 
-    // 1. Match exato (rápido)
-    if (this.cache.has(cacheKey)) {
-      const entry = this.cache.get(cacheKey)!;
-      entry.hitCount++;
-      this.totalHits++;
-
-      log.info({ companyId: companyId.slice(0,8), description, categoryName: entry.categoryName, hitCount: entry.hitCount }, '[CACHE-HIT-EXACT]');
-      return {
-        categoryId: entry.categoryId,
-        categoryName: entry.categoryName,
-        confidence: entry.confidence,
-        source: 'cache-exact'
-      };
+  /**
+   * Melhor entrada com similaridade >= threshold.
+   *
+   * Poda: o tamanho da candidata precisa estar em [len * t, len / t]
+   * (senão a distância já estoura o limite). Quando o limite de distância
+   * garante ao menos um trigrama em comum (|q| - 2 - 3d >= 1), só as
+   * candidatas das postings dos trigramas da busca são verificadas.
+   */
+  private findSimilar(
+    partition: CompanyPartition,
+    normalized: string,
+    threshold: number
+  ): { key: string; similarity: number; entry: CachedCategory } | null {
+    const minLength = Math.ceil(normalized.length * threshold - 1e-9);
+    const maxLength = threshold > 0 ? Math.floor(normalized.length / threshold + 1e-9) : Infinity;
+    const maxDistance = Math.floor((1 - threshold) * maxLength + 1e-9);
+
+    let candidates: Iterable<string>;
+    if (normalized.length - (TRIGRAM_SIZE - 1) - TRIGRAM_SIZE * maxDistance >= 1) {
+      const union = new Set<string>();
+      for (const trigram of this.getTrigrams(normalized)) {
+        const posting = partition.postings.get(trigram);
+        if (!posting) continue;
+        for (const key of posting) union.add(key);
+      }
+      candidates = union;
+    } else {
+      candidates = partition.entries.keys();
     }
 
-    // 2. Busca por similaridade (apenas dentro da mesma empresa)
+    this.similarSearches++;
+    const now = Date.now();
+    const expiredKeys: string[] = [];
     let bestMatch: { key: string; similarity: number; entry: CachedCategory } | null = null;
 
-    for (const [key, entry] of this.cache.entries()) {
-      // ISOLAMENTO: só comparar com entradas da mesma empresa
-      if (this.getCompanyIdFromKey(key) !== companyId) continue;
+    for (const key of candidates) {
+      if (key.length < minLength || key.length > maxLength) continue;
+
+      const entry = partition.entries.get(key)!;
+      if (this.isExpired(entry, now)) {
+        expiredKeys.push(key);
+        continue;
+      }
 
-      const cachedDescription = this.getDescriptionFromKey(key);
-      const similarity = this.calculateSimilarity(normalized, cachedDescription);
+      this.candidatesScanned++;
+      const similarity = this.similarityAtLeast(normalized, key, threshold);
 
-      if (similarity >= similarityThreshold) {
+      if (similarity >= threshold) {
         if (!bestMatch || similarity > bestMatch.similarity) {
           bestMatch = { key, similarity, entry };
         }
       }
     }
 
-    if (bestMatch) {
-      bestMatch.entry.hitCount++;
-      this.totalHits++;
-
-      log.info(
-        { companyId: companyId.slice(0,8), description, categoryName: bestMatch.entry.categoryName, similarity: (bestMatch.similarity * 100).toFixed(1), hitCount: bestMatch.entry.hitCount },
-        '[CACHE-HIT-SIMILAR]'
-      );
-
-      return {
-        categoryId: bestMatch.entry.categoryId,
-        categoryName: bestMatch.entry.categoryName,
-        confidence: bestMatch.entry.confidence * bestMatch.similarity, // Desconta pela similaridade
-        source: 'cache-similar'
-      };
+    for (const key of expiredKeys) {
+      this.removeEntry(partition, key);
+      this.expired++;
     }
 
-    // 3. Cache miss
-    log.info({ companyId: companyId.slice(0,8), description }, '[CACHE-MISS]');
-    return null;
+    return bestMatch;
   }
 
   /**
@@ -254,27 +420,55 @@ class CategoryCacheService {
       return;
     }
 
-    const cacheKey = this.generateCacheKey(description, companyId);
+    let partition = this.partitions.get(companyId);
+    if (!partition) {
+      partition = { entries: new Map(), postings: new Map() };
+      this.partitions.set(companyId, partition);
+    }
 
     // Atualizar timestamp se já existir
-    if (this.cache.has(cacheKey)) {
-      const existing = this.cache.get(cacheKey)!;
+    const existing = partition.entries.get(normalized);
+    if (existing) {
       existing.timestamp = new Date();
       existing.categoryId = categoryId;
       existing.categoryName = categoryName;
+      this.touch(companyId, partition, normalized, existing);
       log.info({ companyId: companyId.slice(0,8), description, categoryName }, '[CACHE-UPDATE]');
       return;
     }
 
+    // Abrir espaço antes de inserir (LRU por empresa e global)
+    if (partition.entries.size >= this.config.maxEntriesPerCompany) {
+      this.evictOne(companyId);
+    }
+    if (this.size >= this.config.maxEntries) {
+      this.evictOne();
+    }
+    // A partição pode ter sido removida ao ficar vazia
+    if (!this.partitions.has(companyId)) {
+      this.partitions.set(companyId, partition);
+    }
+
     // Adicionar nova entrada
-    this.cache.set(cacheKey, {
+    const entry: CachedCategory = {
       categoryId,
       categoryName,
       companyId,
       confidence,
       timestamp: new Date(),
       hitCount: 0
-    });
+    };
+    partition.entries.set(normalized, entry);
+    this.size++;
+    for (const trigram of this.getTrigrams(normalized)) {
+      let posting = partition.postings.get(trigram);
+      if (!posting) {
+        posting = new Set();
+        partition.postings.set(trigram, posting);
+      }
+      posting.add(normalized);
+    }
+    this.touch(companyId, partition, normalized, entry);
 
     log.info({ companyId: companyId.slice(0,8), description, categoryName, confidence }, '[CACHE-ADD]');
   }
@@ -283,24 +477,35 @@ class CategoryCacheService {
    * Obtém estatísticas do cache
    */
   public getStats(): CacheStats {
-    const entries = Array.from(this.cache.values());
     const byCompany: Record<string, number> = {};
-
-    for (const entry of entries) {
-      byCompany[entry.companyId] = (byCompany[entry.companyId] || 0) + 1;
+    let oldest: number | null = null;
+    let newest: number | null = null;
+
+    for (const [companyId, partition] of this.partitions) {
+      byCompany[companyId] = partition.entries.size;
+      for (const entry of partition.entries.values()) {
+        const time = entry.timestamp.getTime();
+        if (oldest === null || time < oldest) oldest = time;
+        if (newest === null || time > newest) newest = time;
+      }
     }
 
     return {
-      totalEntries: this.cache.size,
+      totalEntries: this.size,
       totalHits: this.totalHits,
       hitRate: this.totalLookups > 0 ? (this.totalHits / this.totalLookups) * 100 : 0,
-      oldestEntry: entries.length > 0
-        ? new Date(Math.min(...entries.map(e => e.timestamp.getTime())))
-        : null,
-      newestEntry: entries.length > 0
-        ? new Date(Math.max(...entries.map(e => e.timestamp.getTime())))
-        : null,
-      byCompany
+      oldestEntry: oldest !== null ? new Date(oldest) : null,
+      newestEntry: newest !== null ? new Date(newest) : null,
+      byCompany,
+      totalLookups: this.totalLookups,
+      exactHits: this.exactHits,
+      similarHits: this.similarHits,
+      misses: this.totalLookups - this.totalHits,
+      evictions: this.evictions,
+      expired: this.expired,
+      avgLookupMs: this.totalLookups > 0 ? this.totalLookupMs / this.totalLookups : 0,
+      maxLookupMs: this.maxLookupMs,
+      avgCandidatesPerMiss: this.similarSearches > 0 ? this.candidatesScanned / this.similarSearches : 0
     };
   }
 
@@ -308,10 +513,19 @@ class CategoryCacheService {
    * Limpa cache (útil para testes ou reset)
    */
   public clear(): void {
-    const beforeSize = this.cache.size;
-    this.cache.clear();
+    const beforeSize = this.size;
+    this.partitions.clear();
+    this.size = 0;
     this.totalHits = 0;
     this.totalLookups = 0;
+    this.exactHits = 0;
+    this.similarHits = 0;
+    this.evictions = 0;
+    this.expired = 0;
+    this.similarSearches = 0;
+    this.candidatesScanned = 0;
+    this.totalLookupMs = 0;
+    this.maxLookupMs = 0;
     log.info({ entriesRemoved: beforeSize }, '[CACHE-CLEAR]');
   }
 
@@ -319,13 +533,10 @@ class CategoryCacheService {
    * Limpa cache apenas de uma empresa específica
    */
   public clearByCompany(companyId: string): number {
-    let removed = 0;
-    for (const key of this.cache.keys()) {
-      if (this.getCompanyIdFromKey(key) === companyId) {
-        this.cache.delete(key);
-        removed++;
-      }
-    }
+    const partition = this.partitions.get(companyId);
+    const removed = partition?.entries.size ?? 0;
+    this.partitions.delete(companyId);
+    this.size -= removed;
     if (removed > 0) {
       log.info({ entriesRemoved: removed, companyId: companyId.slice(0,8) }, '[CACHE-CLEAR-COMPANY]');
     }
@@ -351,11 +562,14 @@ class CategoryCacheService {
     const maxAge = maxAgeDays * 24 * 60 * 60 * 1000;
     let removed = 0;
 
-    for (const [key, value] of this.cache.entries()) {
-      if (now - value.timestamp.getTime() > maxAge) {
-        this.cache.delete(key);
-        removed++;
+    for (const [companyId, partition] of this.partitions) {
+      for (const [key, value] of partition.entries) {
+        if (now - value.timestamp.getTime() > maxAge) {
+          this.removeEntry(partition, key);
+          removed++;
+        }
       }
+      if (partition.entries.size === 0) this.partitions.delete(companyId);
     }
 
     if (removed > 0) {
@@ -373,9 +587,16 @@ class CategoryCacheService {
 
     log.info({
       totalEntries: stats.totalEntries,
-      totalLookups: this.totalLookups,
+      totalLookups: stats.totalLookups,
       totalHits: stats.totalHits,
-      hitRate: `${stats.hitRate.toFixed(2)}%`
+      hitRate: `${stats.hitRate.toFixed(2)}%`,
+      exactHits: stats.exactHits,
+      similarHits: stats.similarHits,
+      evictions: stats.evictions,
+      expired: stats.expired,
+      avgLookupMs: stats.avgLookupMs.toFixed(3),
+      maxLookupMs: stats.maxLookupMs.toFixed(3),
+      avgCandidatesPerMiss: stats.avgCandidatesPerMiss.toFixed(1)
     }, '[CACHE-STATS] Summary');
 
     // Entradas por empresa
@@ -392,13 +613,13 @@ class CategoryCacheService {
     }
 
     // Top 10 mais reutilizadas
-    const topEntries = Array.from(this.cache.entries())
+    const topEntries = Array.from(this.partitions.values())
+      .flatMap(partition => Array.from(partition.entries.entries()))
       .sort((a, b) => b[1].hitCount - a[1].hitCount)
       .slice(0, 10);
 
     if (topEntries.length > 0) {
-      const topList = topEntries.map(([key, value], index) => {
-        const desc = this.getDescriptionFromKey(key);
+      const topList = topEntries.map(([desc, value], index) => {
         return { rank: index + 1, companyId: value.companyId.slice(0,8), description: desc, categoryName: value.categoryName, hitCount: value.hitCount };
       });
       log.info({ top10: topList }, '[CACHE-STATS] Top 10 most reused');
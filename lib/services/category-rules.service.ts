@@ -2,6 +2,7 @@ import { db } from '@/lib/db/drizzle';
 import { categoryRules, transactions, categories, accounts } from '@/lib/db/schema';
 import { ilike, or, and, eq, desc, isNull, sql } from 'drizzle-orm';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from './rule-index.service';
 
 const log = createLogger('category-rules');
 
@@ -439,6 +440,7 @@ export class CategoryRulesService {
           .where(eq(categoryRules.id, rule.id));
       }
 
+      RuleIndexService.invalidate(companyId);
       log.info({ count: orphanRules.length }, '[ORPHAN-CLEANUP] Desativadas regras orfas');
       return orphanRules.length;
 
@@ -742,6 +744,8 @@ export class CategoryRulesService {
         })
         .returning();
 
+      RuleIndexService.invalidate(newRule.companyId);
+
       return { rule: newRule, validation };
 
     } catch (error) {
@@ -776,6 +780,8 @@ export class CategoryRulesService {
         throw new Error('Rule not found');
       }
 
+      RuleIndexService.invalidate(updatedRule.companyId);
+
       return updatedRule;
 
     } catch (error) {
@@ -791,9 +797,12 @@ export class CategoryRulesService {
     try {
       this.checkDatabaseConnection();
 
-      await db
+      const [deletedRule] = await db
         .delete(categoryRules)
-        .where(eq(categoryRules.id, id));
+        .where(eq(categoryRules.id, id))
+        .returning({ companyId: categoryRules.companyId });
+
+      RuleIndexService.invalidate(deletedRule?.companyId);
 
     } catch (error) {
       log.error({ err: error }, 'Error deleting category rule');
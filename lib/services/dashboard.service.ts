@@ -11,6 +11,7 @@ import {
 import { eq, and, gte, lte, lt, desc, sum, count, avg, sql, not, ilike } from 'drizzle-orm';
 import { Transaction } from '@/lib/db/schema';
 import { getFinancialExclusionClause } from './financial-exclusion';
+import MonthlyAggregatesService, { MonthlyAggregateFilters } from './monthly-aggregates.service';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('dashboard');
@@ -65,31 +66,6 @@ export default class DashboardService {
     }
   }
 
-  /**
-   * Retorna condições de filtro de conta/banco para uso inline
-   */
-  private static getAccountFilterConditions(filters: DashboardFilters): (ReturnType<typeof eq> | undefined)[] {
-    const conditions: (ReturnType<typeof eq> | undefined)[] = [];
-
-    if (filters.accountId && filters.accountId !== 'all') {
-      if (this.isUUID(filters.accountId)) {
-        conditions.push(sql`combined_transactions.account_id = ${filters.accountId}` as any);
-      } else {
-        conditions.push(eq(accounts.bankName, filters.accountId));
-      }
-    }
-
-    if (filters.bankName && filters.bankName !== 'all') {
-      conditions.push(eq(accounts.bankName, filters.bankName));
-    }
-
-    if (filters.companyId && filters.companyId !== 'all') {
-      conditions.push(eq(accounts.companyId, filters.companyId));
-    }
-
-    return conditions;
-  }
-
   /**
    * Retorna todas as condições de filtro formatadas para o subquery combined_transactions
    */
@@ -124,6 +100,31 @@ export default class DashboardService {
     return conditions;
   }
 
+  /**
+   * Converte os filtros do dashboard para a leitura dos agregados mensais
+   */
+  private static getAggregateFilters(
+    filters: DashboardFilters,
+    startDate = filters.startDate,
+    endDate = filters.endDate
+  ): MonthlyAggregateFilters {
+    const byUUID = !!filters.accountId && filters.accountId !== 'all' && this.isUUID(filters.accountId);
+    const bankFromAccountId = !!filters.accountId && filters.accountId !== 'all' && !byUUID;
+
+    // accountId não-UUID é nome de banco e vale junto com bankName
+    // (mesma regra de getCombinedWhereConditions)
+    const bankNames = [bankFromAccountId ? filters.accountId : undefined, filters.bankName]
+      .filter((bankName): bankName is string => !!bankName && bankName !== 'all');
+
+    return {
+      startDate,
+      endDate,
+      companyId: filters.companyId,
+      accountId: byUUID ? filters.accountId : undefined,
+      bankName: bankNames
+    };
+  }
+
   /**
    * Verifica se o banco de dados está disponível
    */
@@ -194,32 +195,16 @@ export default class DashboardService {
 
         this.checkDatabaseConnection();
 
-        // Construir where clause
-        const combinedConditions = this.getCombinedWhereConditions(cleanFilters);
-        const whereClause = and(...combinedConditions);
-        log.info({ conditionCount: combinedConditions.length, hasFilters: !!whereClause }, 'WhereClause final');
-
-        // Métricas principais
-        const metricsResult = await innerTx
-          .select({
-            totalIncome: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE 0 END`).mapWith(Number),
-            totalExpenses: sum(sql`CASE WHEN type_to_sum = 'debit' THEN ABS(amount_to_sum) ELSE 0 END`).mapWith(Number),
-            transactionCount: count(sql`transaction_id`).mapWith(Number),
-            incomeCount: count(sql`CASE WHEN type_to_sum = 'credit' THEN 1 END`).mapWith(Number),
-            expenseCount: count(sql`CASE WHEN type_to_sum = 'debit' THEN 1 END`).mapWith(Number),
-            averageTicket: avg(sql`ABS(amount_to_sum)`).mapWith(Number),
-          })
-          .from(this.getCombinedTransactionsSubquery())
-          .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-          .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-          .where(
-            and(
-              whereClause,
-              getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
-            )
-          );
-
-        const metrics = metricsResult[0];
+        // Métricas principais (agregados mensais + pontas parciais do período)
+        const totals = await MonthlyAggregatesService.getTotals(this.getAggregateFilters(cleanFilters), innerTx);
+        const metrics = {
+          totalIncome: totals.income,
+          totalExpenses: totals.expenses,
+          transactionCount: totals.transactionCount,
+          incomeCount: totals.creditCount,
+          expenseCount: totals.debitCount,
+          averageTicket: totals.transactionCount > 0 ? totals.absAmount / totals.transactionCount : 0,
+        };
 
         // Calcular saldo e taxa de crescimento
         const netBalance = (metrics.totalIncome || 0) - (metrics.totalExpenses || 0);
@@ -268,31 +253,11 @@ export default class DashboardService {
     const execute = async (innerTx: any) => {
       try {
         this.checkDatabaseConnection();
-        const whereClause = and(...this.getCombinedWhereConditions(cleanFilters));
-
         // Buscar totais por categoria
-        const categoryTotals = await innerTx
-          .select({
-            categoryId: sql`combined_transactions.category_id`,
-            categoryName: categories.name,
-            categoryType: categories.type,
-            colorHex: categories.colorHex,
-            icon: categories.icon,
-            totalAmount: sum(sql`ABS(amount_to_sum)`).mapWith(Number),
-            transactionCount: count(sql`transaction_id`).mapWith(Number),
-          })
-          .from(this.getCombinedTransactionsSubquery())
-          .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-          .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-          .where(
-            and(
-              whereClause,
-              getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
-            )
-          )
-          .groupBy(sql`combined_transactions.category_id`, categories.name, categories.type, categories.colorHex, categories.icon);
-        // Removendo ORDER BY para evitar erro de GROUP BY
-        // .orderBy(desc(sql`ABS(${transactions.amount})`));
+        const categoryTotals = (await MonthlyAggregatesService.getCategoryTotals(
+          this.getAggregateFilters(cleanFilters),
+          innerTx
+        )).map(cat => ({ ...cat, totalAmount: cat.absAmount }));
 
         // Calcular total geral para porcentagens
         const totalAmount = categoryTotals.reduce((sum: number, cat: any) => sum + (cat.totalAmount || 0), 0);
@@ -641,49 +606,14 @@ export default class DashboardService {
 
       log.info({ currentStart: filters.startDate, currentEnd: filters.endDate, previousStart: previousStartDate, previousEnd: previousEndDate }, 'Comparando periodos');
 
-      // Obter condições de filtro de conta/banco
-      const accountConditions = this.getAccountFilterConditions(filters);
-
-      // Mês atual - SQL direto sem chamar getMetrics novamente
-      const currentMetricsResult = await innerTx
-        .select({
-          totalIncome: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE 0 END`).mapWith(Number),
-          totalExpenses: sum(sql`CASE WHEN type_to_sum = 'debit' THEN ABS(amount_to_sum) ELSE 0 END`).mapWith(Number),
-          transactionCount: count(sql`transaction_id`).mapWith(Number),
-        })
-        .from(this.getCombinedTransactionsSubquery())
-        .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-        .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-        .where(
-          and(
-            sql`combined_transactions.transaction_date >= ${filters.startDate!}`,
-            sql`combined_transactions.transaction_date <= ${filters.endDate!}`,
-            getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` }),
-            ...accountConditions
-          )
-        );
-
-      // Mês anterior - SQL direto
-      const previousMetricsResult = await innerTx
-        .select({
-          totalIncome: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE 0 END`).mapWith(Number),
-          totalExpenses: sum(sql`CASE WHEN type_to_sum = 'debit' THEN ABS(amount_to_sum) ELSE 0 END`).mapWith(Number),
-          transactionCount: count(sql`transaction_id`).mapWith(Number),
-        })
-        .from(this.getCombinedTransactionsSubquery())
-        .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-        .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-        .where(
-          and(
-            sql`combined_transactions.transaction_date >= ${previousStartDate}`,
-            sql`combined_transactions.transaction_date <= ${previousEndDate}`,
-            getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` }),
-            ...accountConditions
-          )
-        );
+      // Período atual e mês anterior - agregados mensais, sem chamar getMetrics novamente
+      const [current, previous] = await Promise.all([
+        MonthlyAggregatesService.getTotals(this.getAggregateFilters(filters), innerTx),
+        MonthlyAggregatesService.getTotals(this.getAggregateFilters(filters, previousStartDate, previousEndDate), innerTx)
+      ]);
 
-      const currentMetrics = currentMetricsResult[0];
-      const previousMetrics = previousMetricsResult[0];
+      const currentMetrics = { totalIncome: current.income, totalExpenses: current.expenses, transactionCount: current.transactionCount };
+      const previousMetrics = { totalIncome: previous.income, totalExpenses: previous.expenses, transactionCount: previous.transactionCount };
 
       log.info({ currentMetrics }, 'Metricas atuais');
       log.info({ previousMetrics }, 'Metricas anteriores');
@@ -0,0 +1,81 @@
+import { db } from '@/lib/db/drizzle';
+import { transactions, categories, accounts } from '@/lib/db/schema';
+import { eq, and, gte, isNotNull, sql, SQL } from 'drizzle-orm';
+
+export interface SimilarDescriptionOptions {
+  limit?: number;
+  sinceDate?: string; // YYYY-MM-DD (inclusive)
+  labeledOnly?: boolean; // Só transações com categoria (padrão: true)
+}
+
+export interface SimilarDescription {
+  id: string;
+  description: string;
+  categoryId: string | null;
+  categoryName: string | null;
+  confidence: string | null;
+  transactionDate: string;
+  similarity: number; // Similaridade de trigramas (0-1)
+}
+
+const DEFAULT_LIMIT = 20;
+
+/**
+ * Busca de descrições similares dentro de uma empresa.
+ *
+ * Usa financeai_transactions.normalized_description (coluna gerada por
+ * financeai_normalize_description) e o índice GIN de trigramas: o banco filtra
+ * pelo operador % do pg_trgm e devolve só os top-k por similaridade. Quem chama
+ * aplica a métrica fina (Levenshtein, Jaccard) apenas nesses candidatos.
+ */
+export default class DescriptionSimilarityService {
+  static async findSimilar(
+    description: string,
+    companyId: string,
+    options: SimilarDescriptionOptions = {},
+    tx: any = db
+  ): Promise<SimilarDescription[]> {
+    const { limit = DEFAULT_LIMIT, sinceDate, labeledOnly = true } = options;
+
+    if (!description.trim()) return [];
+
+    // Mesma normalização da coluna, feita no banco (constante para o planner)
+    const query = sql`financeai_normalize_description(${description})`;
+    const similarity = sql<number>`similarity(${transactions.normalizedDescription}, ${query})`;
+
+    const conditions: SQL[] = [
+      eq(accounts.companyId, companyId),
+      sql`${transactions.normalizedDescription} % ${query}`
+    ];
+
+    if (sinceDate) {
+      conditions.push(gte(transactions.transactionDate, sinceDate));
+    }
+
+    if (labeledOnly) {
+      conditions.push(isNotNull(transactions.categoryId));
+    }
+
+    const rows = await tx
+      .select({
+        id: transactions.id,
+        description: transactions.description,
+        categoryId: transactions.categoryId,
+        categoryName: categories.name,
+        confidence: transactions.confidence,
+        transactionDate: transactions.transactionDate,
+        similarity
+      })
+      .from(transactions)
+      .innerJoin(accounts, eq(transactions.accountId, accounts.id))
+      .leftJoin(categories, eq(transactions.categoryId, categories.id))
+      .where(and(...conditions))
+      .orderBy(sql`${similarity} DESC`, sql`${transactions.transactionDate} DESC`)
+      .limit(limit);
+
+    return rows.map((row: any) => ({
+      ...row,
+      similarity: Number(row.similarity)
+    }));
+  }
+}
@@ -1,24 +1,15 @@
 import { db } from '@/lib/db/drizzle';
 import { transactions, categories, accounts, transactionSplits } from '@/lib/db/schema';
-import { DREStatement, DRECategory } from '@/lib/types';
-import { eq, and, gte, lte, sum, count, isNull } from 'drizzle-orm';
+import { DREStatement, DRECategory, DREDrilldownPage } from '@/lib/types';
+import { eq, and, gte, lte, lt, or, isNull } from 'drizzle-orm';
 import { sql } from 'drizzle-orm';
-import { getFinancialExclusionClause } from './financial-exclusion';
+import MonthlyAggregatesService from './monthly-aggregates.service';
+import { getTransactionDescriptionExclusionClause } from './financial-exclusion';
 import { DreGroupKey, EXCLUDED_DRE_GROUPS } from '@/lib/constants/dre-utils';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('dre');
 
-interface DrilldownTransaction {
-  id: string;
-  date: string;
-  description: string;
-  category: string;
-  amount: number;
-  type: 'income' | 'expense';
-  bank?: string;
-}
-
 export interface DREFilters {
   period?: string;
   companyId?: string;
@@ -28,6 +19,32 @@ export interface DREFilters {
   userId?: string;
 }
 
+export interface DREDrilldownParams {
+  // ID da categoria ou 'uncategorized-revenue' / 'uncategorized-expense'
+  categoryId: string;
+  startDate: string;
+  endDate: string;
+  accountId?: string;
+  companyId?: string;
+  userId?: string;
+  cursor?: string | null;
+  limit?: number;
+}
+
+const DRILLDOWN_DEFAULT_LIMIT = 25;
+const DRILLDOWN_MAX_LIMIT = 100;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+/**
+ * Cursor de drilldown que não foi gerado por getCategoryDrilldown (erro do cliente)
+ */
+export class InvalidDrilldownCursorError extends Error {
+  constructor() {
+    super('Cursor de drilldown inválido');
+    this.name = 'InvalidDrilldownCursorError';
+  }
+}
+
 // Tipos de dreGroup válidos - usando DreGroupKey centralizado de dre-utils.ts
 
 // Grupos excluídos do DRE — definição centralizada em dre-utils.ts (EMP, TRANSF)
@@ -260,7 +277,7 @@ export default class DREService {
    * Buscar dados de DRE do banco
    */
   static async getDREStatement(filters: DREFilters = {}): Promise<DREStatement> {
-    const { userId, ...cleanFilters } = filters;
+    const { userId } = filters;
 
     const execute = async (tx: any) => {
       try {
@@ -277,81 +294,19 @@ export default class DREService {
         endDate = dates.endDate;
       }
 
-      const whereConditions = [];
-
-      if (startDate) {
-        whereConditions.push(sql`combined_transactions.transaction_date >= ${startDate}`);
-      }
-
-      if (endDate) {
-        whereConditions.push(sql`combined_transactions.transaction_date <= ${endDate}`);
-      }
-
-      if (filters.accountId && filters.accountId !== 'all') {
-        whereConditions.push(sql`combined_transactions.account_id = ${filters.accountId}`);
-      }
-
-      if (filters.companyId && filters.companyId !== 'all') {
-        whereConditions.push(eq(accounts.companyId, filters.companyId));
-      }
-
-      const whereClause = and(
-        ...whereConditions,
-        getFinancialExclusionClause({ 
-          descriptionColumn: sql`combined_transactions.transaction_description` 
-        })
-      );
-
-      // Buscar totais por categoria
-      // Nova lógica: Combina transações sem splits + splits individuais
-      const categoryData = await tx
-        .select({
-          categoryId: categories.id,
-          categoryName: categories.name,
-          categoryType: categories.type,
-          categoryGroup: categories.categoryGroup,
-          dreGroup: categories.dreGroup,
-          colorHex: categories.colorHex,
-          icon: categories.icon,
-          totalAmount: sum(sql`ABS(amount_to_sum)`).mapWith(Number),
-          incomeAmount: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE 0 END`).mapWith(Number),
-          expenseAmount: sum(sql`CASE WHEN type_to_sum = 'debit' THEN ABS(amount_to_sum) ELSE 0 END`).mapWith(Number),
-          transactionCount: count(sql`transaction_id`).mapWith(Number),
-          creditCount: sum(sql`CASE WHEN type_to_sum = 'credit' THEN 1 ELSE 0 END`).mapWith(Number),
-          debitCount: sum(sql`CASE WHEN type_to_sum = 'debit' THEN 1 ELSE 0 END`).mapWith(Number),
-        })
-        .from(sql`(
-          -- Transações que NÃO possuem desmembramentos
-          SELECT 
-            t.id as transaction_id,
-            t.description as transaction_description,
-            t.category_id as category_id,
-            t.amount as amount_to_sum,
-            t.type as type_to_sum,
-            t.transaction_date,
-            t.account_id
-          FROM ${transactions} t
-          WHERE t.id NOT IN (SELECT transaction_id FROM ${transactionSplits})
-          
-          UNION ALL
-          
-          -- Desmembramentos individuais
-          SELECT 
-            ts.transaction_id,
-            t.description as transaction_description,
-            ts.category_id,
-            ts.amount as amount_to_sum,
-            t.type as type_to_sum, -- Mantém o tipo original da transação
-            t.transaction_date,
-            t.account_id
-          FROM ${transactionSplits} ts
-          JOIN ${transactions} t ON ts.transaction_id = t.id
-        ) as combined_transactions`)
-        .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-        .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-        .where(whereClause) // O whereClause agora opera sobre as colunas da subquery/join
-        .groupBy(categories.id, categories.name, categories.type, categories.categoryGroup, categories.dreGroup, categories.colorHex, categories.icon)
-        .orderBy(sql`SUM(ABS(combined_transactions.amount_to_sum)) DESC`);
+      // Totais por categoria: meses inteiros vêm dos agregados mensais,
+      // pontas parciais do período são somadas das transações (splits já aplicados)
+      const categoryData = (await MonthlyAggregatesService.getCategoryTotals({
+        startDate,
+        endDate,
+        companyId: filters.companyId,
+        accountId: filters.accountId
+      }, tx)).map(cat => ({
+        ...cat,
+        totalAmount: cat.absAmount,
+        incomeAmount: cat.income,
+        expenseAmount: cat.expenses
+      }));
 
       // Processar categorias - excluir movimentações financeiras (empréstimos, transferências)
       const categorizedData = categoryData.filter((cat: any) => {
@@ -566,29 +521,6 @@ export default class DREService {
       // Obter período formatado
       const periodLabel = this.formatPeriodLabel(filters.period || 'current', startDate, endDate);
 
-      // Buscar transações de cada categoria em paralelo para o drilldown
-      const categoryTransactionsPromises = dreCategories.map(async (cat) => {
-        const categoryId = cat.id.startsWith('uncategorized') ? null : cat.id;
-          const txns = await this.getTransactionsByCategoryId(
-            categoryId,
-            startDate,
-            endDate,
-            cleanFilters.accountId,
-            cleanFilters.companyId,
-            userId,
-            tx
-          );
-        return { categoryId: cat.id, transactions: txns };
-      });
-
-      const categoryTransactionsResults = await Promise.all(categoryTransactionsPromises);
-
-      // Criar mapa de transações por categoria
-      const transactionsByCategory = new Map<string, DrilldownTransaction[]>();
-      categoryTransactionsResults.forEach(result => {
-        transactionsByCategory.set(result.categoryId, result.transactions);
-      });
-
       // Mapear categorias para o formato esperado pelo componente
       const mappedCategories = dreCategories.map(cat => ({
         id: cat.id,
@@ -602,8 +534,7 @@ export default class DREService {
         icon: cat.icon,
         subcategories: cat.subcategories,
         growthRate: cat.growthRate,
-        transactions: cat.transactions || 0,
-        drilldown: transactionsByCategory.get(cat.id) || []
+        transactions: cat.transactions || 0
       }));
 
       // ========== SEPARAR CATEGORIAS POR dreGroup PARA DETALHAMENTO ==========
@@ -617,8 +548,7 @@ export default class DREService {
         percentage: cat.percentage,
         color: cat.color,
         icon: cat.icon,
-        transactions: cat.transactions || 0,
-        drilldown: transactionsByCategory.get(cat.id) || []
+        transactions: cat.transactions || 0
       });
 
       // RECEITAS BRUTAS (RoB)
@@ -691,49 +621,49 @@ export default class DREService {
             value: cat.value,
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           taxes: taxCategories.map(cat => ({
             label: cat.name,
             value: -cat.value,
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           financialCosts: financialCostCategoriesFiltered.map(cat => ({
             label: cat.name,
             value: -cat.value,
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           variableCosts: variableCostCategories.map(cat => ({
             label: cat.name,
             value: -cat.value, // Negar valor para mostrar como despesa
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           fixedCosts: fixedCostCategories.map(cat => ({
             label: cat.name,
             value: -cat.value, // Negar valor para mostrar como despesa
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           nonOperationalRevenue: nonOperationalRevenueCategories.map(cat => ({
             label: cat.name,
             value: cat.value,
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           nonOperationalExpenses: nonOperationalCategories.map(cat => ({
             label: cat.name,
             value: -cat.value, // Negar valor para mostrar como despesa
             categoryGroup: cat.categoryGroup,
             transactions: cat.transactions,
-            drilldown: cat.drilldown
+            categoryId: cat.id
           })),
           unclassified: dreCategories
             .filter(cat => cat.id.startsWith('uncategorized'))
@@ -742,7 +672,7 @@ export default class DREService {
               value: cat.actual * (cat.type === 'revenue' ? 1 : -1),
               categoryGroup: null,
               transactions: cat.transactions || 0,
-              drilldown: transactionsByCategory.get(cat.id) || []
+              categoryId: cat.id
             }))
         },
 
@@ -754,6 +684,8 @@ export default class DREService {
         totalExpenses,
         operatingIncome,
         netIncome,
+        startDate,
+        endDate,
         generatedAt: new Date().toISOString(),
       };
 
@@ -825,75 +757,135 @@ export default class DREService {
   }
 
   /**
-   * Buscar transações por categoria para drilldown
+   * Drilldown paginado das transações de uma categoria no período.
+   * Usa as mesmas linhas que alimentam o DRE (financeai_transaction_monthly_aggregates):
+   * transações sem desmembramento + cada split com a sua categoria, sem snapshots
+   * de saldo. Assim a lista bate com a quantidade exibida na categoria; linhas de
+   * split saem com o id do split.
+   * Paginação por keyset em (transaction_date DESC, id DESC), sem OFFSET;
+   * o cursor é opaco para o cliente.
    */
-  static async getTransactionsByCategoryId(
-    categoryId: string | null,
-    startDate: string,
-    endDate: string,
-    accountId?: string,
-    companyId?: string,
-    userId?: string,
-    tx: any = db
-  ): Promise<DrilldownTransaction[]> {
-    const execute = async (innerTx: any) => {
-      const whereConditions = [];
-
-    // Filtro por categoria (null = não categorizadas)
-    if (categoryId === null || categoryId === 'uncategorized-revenue' || categoryId === 'uncategorized-expense') {
-      whereConditions.push(isNull(transactions.categoryId));
-    } else {
-      whereConditions.push(eq(transactions.categoryId, categoryId));
-    }
+  static async getCategoryDrilldown(params: DREDrilldownParams): Promise<DREDrilldownPage> {
+    const { categoryId, startDate, endDate, accountId, companyId, userId } = params;
+    const limit = Math.min(Math.max(params.limit || DRILLDOWN_DEFAULT_LIMIT, 1), DRILLDOWN_MAX_LIMIT);
+    const cursor = params.cursor ? this.decodeDrilldownCursor(params.cursor) : null;
+
+    const row = {
+      id: sql<string>`drilldown_rows.id`,
+      categoryId: sql`drilldown_rows.category_id`,
+      amount: sql<string>`drilldown_rows.amount`,
+      type: sql<string>`drilldown_rows.type`,
+      date: sql<string>`drilldown_rows.transaction_date`,
+      accountId: sql`drilldown_rows.account_id`,
+      description: sql<string>`drilldown_rows.description`
+    };
 
-    // Filtros de data
-    whereConditions.push(gte(transactions.transactionDate, startDate));
-    whereConditions.push(lte(transactions.transactionDate, endDate));
+    const execute = async (tx: any) => {
+      const whereConditions = [
+        gte(row.date, startDate),
+        lte(row.date, endDate),
+        // Snapshot de saldo pela descrição da transação original, como nos agregados
+        getTransactionDescriptionExclusionClause(sql`drilldown_rows.parent_description`)!
+      ];
+
+      // Não categorizadas: separadas por tipo, como no DRE
+      if (categoryId === 'uncategorized-revenue') {
+        whereConditions.push(isNull(row.categoryId), eq(row.type, 'credit'));
+      } else if (categoryId === 'uncategorized-expense') {
+        whereConditions.push(isNull(row.categoryId), eq(row.type, 'debit'));
+      } else {
+        whereConditions.push(eq(row.categoryId, categoryId));
+      }
 
-    // Filtros opcionais
-    if (accountId && accountId !== 'all') {
-      whereConditions.push(eq(transactions.accountId, accountId));
-    }
+      if (accountId && accountId !== 'all') {
+        whereConditions.push(eq(row.accountId, accountId));
+      }
 
-    if (companyId && companyId !== 'all') {
-      whereConditions.push(eq(accounts.companyId, companyId));
-    }
+      if (companyId && companyId !== 'all') {
+        whereConditions.push(eq(accounts.companyId, companyId));
+      }
 
-    const whereClause = and(...whereConditions);
+      // Próxima página: linhas estritamente depois do último (data, id) entregue
+      if (cursor) {
+        whereConditions.push(
+          lte(row.date, cursor.date),
+          or(
+            lt(row.date, cursor.date),
+            lt(row.id, cursor.id)
+          )!
+        );
+      }
 
-      const transactionList = await innerTx
+      const rows = await tx
         .select({
-          id: transactions.id,
-          date: transactions.transactionDate,
-          description: transactions.description,
+          id: row.id,
+          date: row.date,
+          description: row.description,
           categoryName: categories.name,
-          amount: transactions.amount,
-          type: transactions.type,
+          amount: row.amount,
+          type: row.type,
           bankName: accounts.name,
         })
-        .from(transactions)
-        .leftJoin(categories, eq(transactions.categoryId, categories.id))
-        .leftJoin(accounts, eq(transactions.accountId, accounts.id))
-        .where(whereClause)
-        .orderBy(sql`${transactions.transactionDate} DESC`)
-        .limit(50); // Limitar a 50 transações para performance
-
-      return transactionList.map((t: any) => ({
-        id: t.id,
-        date: t.date || '',
-        description: t.description || 'Sem descrição',
-        category: t.categoryName || 'Sem categoria',
-        amount: Math.abs(Number(t.amount)),
-        type: t.type === 'credit' ? 'income' : 'expense',
-        bank: t.bankName || undefined,
-      }));
+        .from(this.getDrilldownRowsSubquery())
+        .leftJoin(categories, eq(row.categoryId, categories.id))
+        .leftJoin(accounts, eq(row.accountId, accounts.id))
+        .where(and(...whereConditions))
+        .orderBy(sql`drilldown_rows.transaction_date DESC`, sql`drilldown_rows.id DESC`)
+        .limit(limit + 1);
+
+      const page = rows.slice(0, limit);
+      const last = page[page.length - 1];
+
+      return {
+        transactions: page.map((t: any) => ({
+          id: t.id,
+          date: t.date || '',
+          description: t.description || 'Sem descrição',
+          category: t.categoryName || 'Sem categoria',
+          amount: Math.abs(Number(t.amount)),
+          type: t.type === 'credit' ? 'income' : 'expense',
+          bank: t.bankName || undefined,
+        })),
+        nextCursor: rows.length > limit ? this.encodeDrilldownCursor(last.date, last.id) : null
+      };
     };
 
-    if (userId && tx === db) {
+    if (userId) {
       const { withUser } = await import('@/lib/db/connection');
       return withUser(userId, execute);
     }
-    return execute(tx);
+    return execute(db);
+  }
+
+  /**
+   * Transações sem desmembramento + splits (mesmas linhas de MonthlyAggregatesService)
+   */
+  private static getDrilldownRowsSubquery() {
+    return sql`(
+      SELECT t.id, t.category_id, t.amount, t.type, t.transaction_date, t.account_id,
+             t.description, t.description AS parent_description
+      FROM ${transactions} t
+      WHERE NOT EXISTS (SELECT 1 FROM ${transactionSplits} ts WHERE ts.transaction_id = t.id)
+
+      UNION ALL
+
+      SELECT ts.id, ts.category_id, ts.amount, t.type, t.transaction_date, t.account_id,
+             COALESCE(ts.description, t.description), t.description
+      FROM ${transactionSplits} ts
+      JOIN ${transactions} t ON ts.transaction_id = t.id
+    ) as drilldown_rows`;
+  }
+
+  private static encodeDrilldownCursor(date: string, id: string): string {
+    return Buffer.from(`${date}|${id}`).toString('base64url');
+  }
+
+  private static decodeDrilldownCursor(cursor: string): { date: string; id: string } {
+    const [date, id] = Buffer.from(cursor, 'base64url').toString('utf-8').split('|');
+    if (!/^\d{4}-\d{2}-\d{2}$/.test(date || '') || !UUID_PATTERN.test(id || '')) {
+      throw new InvalidDrilldownCursorError();
+    }
+    return { date, id };
   }
 
   /**
@@ -1,9 +1,12 @@
 import { db } from '@/lib/db/drizzle';
-import { transactions, categories, accounts, projections, transactionSplits } from '@/lib/db/schema';
+import { projections } from '@/lib/db/schema';
 import { DashboardFilters } from '@/lib/api/dashboard';
-import { eq, and, gte, lte, sum, sql, notInArray } from 'drizzle-orm';
-import { DRE_GROUPS, EXCLUDED_DRE_GROUPS } from '@/lib/constants/dre-utils';
-import { getFinancialExclusionClause } from './financial-exclusion';
+import { eq, and, gte, lte, sql } from 'drizzle-orm';
+import { DRE_GROUPS, EXCLUDED_DRE_GROUPS, DreGroupKey } from '@/lib/constants/dre-utils';
+import MonthlyAggregatesService from './monthly-aggregates.service';
+
+// Mesmo formato de TO_CHAR(date, 'Mon')
+const MONTH_ABBREVIATIONS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
 
 export interface ExecutiveDashboardData {
     summary: {
@@ -29,39 +32,6 @@ export interface ExecutiveDashboardData {
 }
 
 export default class ExecutiveDashboardService {
-    /**
-     * Helper para obter a query de transações combinadas (normais + splits)
-     */
-    private static getCombinedTransactionsSubquery() {
-        return sql`(
-          -- Transações que NÃO possuem desmembramentos
-          SELECT 
-            t.id as transaction_id,
-            t.category_id as category_id,
-            t.amount as amount_to_sum,
-            t.type as type_to_sum,
-            t.transaction_date,
-            t.account_id,
-            t.description
-          FROM ${transactions} t
-          WHERE t.id NOT IN (SELECT transaction_id FROM ${transactionSplits})
-          
-          UNION ALL
-          
-          -- Desmembramentos individuais
-          SELECT 
-            ts.transaction_id,
-            ts.category_id,
-            ts.amount as amount_to_sum,
-            t.type as type_to_sum,
-            t.transaction_date,
-            t.account_id,
-            COALESCE(ts.description, t.description) as description
-          FROM ${transactionSplits} ts
-          JOIN ${transactions} t ON ts.transaction_id = t.id
-        ) as combined_transactions`;
-    }
-
     /**
      * Obtém os dados para o Dashboard Executivo
      */
@@ -72,41 +42,26 @@ export default class ExecutiveDashboardService {
         // O saldo inicial é o saldo de todas as transações antes do startDate
         // Nota: O balance de transactions é acumulado. Para saber o saldo *no início* do dia startDate,
         // somamos tudo antes de startDate.
-        const initialBalanceResult = await db
-            .select({
-                balance: sum(sql`amount_to_sum`).mapWith(Number),
-            })
-            .from(this.getCombinedTransactionsSubquery())
-            .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-            .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-            .where(and(
-                sql`combined_transactions.transaction_date <= ${startDate}::date - interval '1 day'`,
-                filters.companyId && filters.companyId !== 'all' ? eq(accounts.companyId, filters.companyId) : undefined,
-                filters.accountId && filters.accountId !== 'all' ? sql`combined_transactions.account_id = ${filters.accountId}` : undefined,
-                getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
-            ));
-
-        const initialBalance = initialBalanceResult[0]?.balance || 0;
+        const aggregateFilters = {
+            companyId: filters.companyId,
+            accountId: filters.accountId,
+        };
+        const dayBeforeStart = new Date(`${startDate}T00:00:00Z`);
+        dayBeforeStart.setUTCDate(dayBeforeStart.getUTCDate() - 1);
 
         // 2. Calcular Entradas e Saídas no período
-        const periodMetrics = await db
-            .select({
-                inflow: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE 0 END`).mapWith(Number),
-                outflow: sum(sql`CASE WHEN type_to_sum = 'debit' THEN ABS(amount_to_sum) ELSE 0 END`).mapWith(Number),
-            })
-            .from(this.getCombinedTransactionsSubquery())
-            .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-            .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-            .where(and(
-                sql`combined_transactions.transaction_date >= ${startDate}`,
-                sql`combined_transactions.transaction_date <= ${endDate}`,
-                filters.companyId && filters.companyId !== 'all' ? eq(accounts.companyId, filters.companyId) : undefined,
-                filters.accountId && filters.accountId !== 'all' ? sql`combined_transactions.account_id = ${filters.accountId}` : undefined,
-                getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
-            ));
-
-        const totalInflow = periodMetrics[0]?.inflow || 0;
-        const totalOutflow = periodMetrics[0]?.outflow || 0;
+        // Ambos saem dos agregados mensais (pontas parciais somadas das transações)
+        const [balanceBefore, periodMetrics] = await Promise.all([
+            MonthlyAggregatesService.getTotals({
+                ...aggregateFilters,
+                endDate: dayBeforeStart.toISOString().split('T')[0],
+            }),
+            MonthlyAggregatesService.getTotals({ ...aggregateFilters, startDate, endDate }),
+        ]);
+
+        const initialBalance = balanceBefore.amount;
+        const totalInflow = periodMetrics.income;
+        const totalOutflow = periodMetrics.expenses;
         const finalBalance = initialBalance + totalInflow - totalOutflow;
 
         // 3. Dados para os 6 Gráficos (Real vs Projetado por Grupo DRE)
@@ -220,32 +175,29 @@ export default class ExecutiveDashboardService {
         const startDate = sixMonthsAgo.toISOString().split('T')[0];
         const endDate = today.toISOString().split('T')[0];
 
-        // Query para dados reais por mês e dreGroup
-        const actualData = await db
-            .select({
-                yearMonth: sql<string>`TO_CHAR(combined_transactions.transaction_date, 'YYYY-MM')`,
-                monthName: sql<string>`TO_CHAR(combined_transactions.transaction_date, 'Mon')`,
-                dreGroup: categories.dreGroup,
-                // Mantém o sinal: credit = positivo, debit = negativo
-                amount: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE -ABS(amount_to_sum) END`).mapWith(Number),
-            })
-            .from(this.getCombinedTransactionsSubquery())
-            .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-            .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-            .where(and(
-                sql`combined_transactions.transaction_date >= ${startDate}`,
-                sql`combined_transactions.transaction_date <= ${endDate}`,
-                sql`${categories.dreGroup} IS NOT NULL`,
-                notInArray(categories.dreGroup, EXCLUDED_DRE_GROUPS),
-                getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` }),
-                companyId !== 'all' ? eq(accounts.companyId, companyId) : undefined
-            ))
-            .groupBy(
-                sql`TO_CHAR(combined_transactions.transaction_date, 'YYYY-MM')`,
-                sql`TO_CHAR(combined_transactions.transaction_date, 'Mon')`,
-                categories.dreGroup
-            )
-            .orderBy(sql`TO_CHAR(combined_transactions.transaction_date, 'YYYY-MM')`);
+        // Dados reais por mês e dreGroup (agregados mensais)
+        const monthlyTotals = await MonthlyAggregatesService.getMonthlyCategoryTotals({
+            startDate,
+            endDate,
+            companyId,
+        });
+
+        const actualByMonthGroup = new Map<string, { yearMonth: string; dreGroup: string; amount: number }>();
+        for (const row of monthlyTotals) {
+            if (!row.dreGroup || EXCLUDED_DRE_GROUPS.includes(row.dreGroup as DreGroupKey)) continue;
+
+            const key = `${row.month}-${row.dreGroup}`;
+            const entry = actualByMonthGroup.get(key) ?? { yearMonth: row.month, dreGroup: row.dreGroup, amount: 0 };
+            // Mantém o sinal: credit = positivo, debit = negativo
+            entry.amount += row.income - row.expenses;
+            actualByMonthGroup.set(key, entry);
+        }
+        const actualData = Array.from(actualByMonthGroup.values())
+            .sort((a, b) => a.yearMonth.localeCompare(b.yearMonth))
+            .map(item => ({
+                ...item,
+                monthName: MONTH_ABBREVIATIONS[parseInt(item.yearMonth.slice(5, 7), 10) - 1],
+            }));
 
         // Query para dados projetados (da tabela projections)
         const projectedData = await db
@@ -286,47 +238,29 @@ export default class ExecutiveDashboardService {
     }
 
     private static async getDRETableData(filters: DashboardFilters, startDate: string, endDate: string) {
-        // Agrupa transações pelo novo dreGroup
-        const actualsByGroup = await db
-            .select({
-                dreGroup: categories.dreGroup,
-                // amount já vem somado com sinal correto (credit +, debit -)
-                amount: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE -ABS(amount_to_sum) END`).mapWith(Number),
-            })
-            .from(this.getCombinedTransactionsSubquery())
-            .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-            .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-            .where(and(
-                sql`combined_transactions.transaction_date >= ${startDate}`,
-                sql`combined_transactions.transaction_date <= ${endDate}`,
-                filters.companyId && filters.companyId !== 'all' ? eq(accounts.companyId, filters.companyId) : undefined,
-                filters.accountId && filters.accountId !== 'all' ? sql`combined_transactions.account_id = ${filters.accountId}` : undefined,
-                sql`${categories.dreGroup} IS NOT NULL`,
-                notInArray(categories.dreGroup, EXCLUDED_DRE_GROUPS),
-                getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
-            ))
-            .groupBy(categories.dreGroup);
-
-        // Query for unclassified transactions (no category or category without dreGroup)
-        const unclassifiedResult = await db
-            .select({
-                amount: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE -ABS(amount_to_sum) END`).mapWith(Number),
-            })
-            .from(this.getCombinedTransactionsSubquery())
-            .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
-            .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
-            .where(and(
-                sql`combined_transactions.transaction_date >= ${startDate}`,
-                sql`combined_transactions.transaction_date <= ${endDate}`,
-                filters.companyId && filters.companyId !== 'all' ? eq(accounts.companyId, filters.companyId) : undefined,
-                filters.accountId && filters.accountId !== 'all' ? sql`combined_transactions.account_id = ${filters.accountId}` : undefined,
-                sql`(${categories.dreGroup} IS NULL OR combined_transactions.category_id IS NULL)`,
-                // Exclude categories explicitly assigned to EMP/TRANSF groups
-                sql`(${categories.dreGroup} IS NULL OR ${categories.dreGroup} NOT IN ('EMP', 'TRANSF'))`,
-                getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
-            ));
+        // Totais por categoria do período (agregados mensais), agrupados por dreGroup
+        const categoryTotals = await MonthlyAggregatesService.getCategoryTotals({
+            startDate,
+            endDate,
+            companyId: filters.companyId,
+            accountId: filters.accountId,
+        });
 
-        const unclassifiedTotal = unclassifiedResult[0]?.amount || 0;
+        const actualsByGroup: Array<{ dreGroup: string; amount: number }> = [];
+        let unclassifiedTotal = 0;
+        for (const cat of categoryTotals) {
+            // amount com sinal correto (credit +, debit -)
+            const amount = cat.income - cat.expenses;
+
+            if (cat.categoryId && cat.dreGroup) {
+                if (!EXCLUDED_DRE_GROUPS.includes(cat.dreGroup as DreGroupKey)) {
+                    actualsByGroup.push({ dreGroup: cat.dreGroup, amount });
+                }
+            } else {
+                // Unclassified: no category or category without dreGroup
+                unclassifiedTotal += amount;
+            }
+        }
 
         // Build a map of actuals by group code
         const totals = new Map<string, number>();
@@ -49,21 +49,30 @@ export function getCategoryExclusionClause() {
     );
 }
 
+/**
+ * Padrões (ILIKE) de descrição que identificam snapshots de saldo do extrato.
+ * Também usados pela função financeai_is_balance_snapshot() que alimenta
+ * financeai_transaction_monthly_aggregates (scripts/apply-monthly-aggregates-migration.ts)
+ */
+export const BALANCE_SNAPSHOT_PATTERNS = [
+    '%SALDO TOTAL%',
+    '%SALDO ANTERIOR%',
+    '%SALDO DISPONIVEL%',
+    '%SALDO DO DIA%',
+    '%SALDO FINAL%',
+    '%SALDO CONTA%',
+    '%SALDO CONSOLIDADO%',
+    '%SALDO EM%',
+    '%S A L D O%'
+];
+
 /**
  * Cláusula de exclusão SOMENTE para Descrição de Transações
  * Útil para filtrar snapshots de saldo
  */
 export function getTransactionDescriptionExclusionClause(descriptionCol: any = transactions.description) {
     return and(
-        not(ilike(descriptionCol, '%SALDO TOTAL%')),
-        not(ilike(descriptionCol, '%SALDO ANTERIOR%')),
-        not(ilike(descriptionCol, '%SALDO DISPONIVEL%')),
-        not(ilike(descriptionCol, '%SALDO DO DIA%')),
-        not(ilike(descriptionCol, '%SALDO FINAL%')),
-        not(ilike(descriptionCol, '%SALDO CONTA%')),
-        not(ilike(descriptionCol, '%SALDO CONSOLIDADO%')),
-        not(ilike(descriptionCol, '%SALDO EM%')),
-        not(ilike(descriptionCol, '%S A L D O%'))
+        ...BALANCE_SNAPSHOT_PATTERNS.map(pattern => not(ilike(descriptionCol, pattern)))
     );
 }
 
@@ -7,6 +7,7 @@ import ThresholdService, { DEFAULT_THRESHOLDS } from './threshold.service';
 import SeasonalityService from './seasonality.service';
 import RecurrenceService from './recurrence.service';
 import AnomalyService from './anomaly.service';
+import MonthlyAggregatesService from './monthly-aggregates.service';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('insights');
@@ -223,7 +224,7 @@ export default class InsightsService {
       const whereClause = and(...whereConditions);
 
       // Buscar dados para análise
-      const analysisData = await this.getAnalysisData(whereClause, filters);
+      const analysisData = await this.getAnalysisData(whereClause, { ...filters, startDate, endDate });
 
       // Gerar insights baseados na análise
       const insights = await this.generateInsights(analysisData, filters);
@@ -263,35 +264,34 @@ export default class InsightsService {
   /**
    * Buscar dados para análise
    */
-  private static async getAnalysisData(whereClause: any, filters?: InsightsFilters) {
-    // Métricas gerais
-    const metrics = await db
-      .select({
-        totalIncome: sum(sql`CASE WHEN ${transactions.type} = 'credit' THEN ${transactions.amount} ELSE 0 END`).mapWith(Number),
-        totalExpenses: sum(sql`CASE WHEN ${transactions.type} = 'debit' THEN ABS(${transactions.amount}) ELSE 0 END`).mapWith(Number),
-        transactionCount: count(transactions.id).mapWith(Number),
-        avgTransaction: avg(sql`ABS(${transactions.amount})`).mapWith(Number),
-      })
-      .from(transactions)
-      .leftJoin(accounts, eq(transactions.accountId, accounts.id))
-      .where(whereClause);
+  private static async getAnalysisData(whereClause: any, filters: InsightsFilters = {}) {
+    const aggregateFilters = {
+      startDate: filters.startDate,
+      endDate: filters.endDate,
+      companyId: filters.companyId,
+      accountId: filters.accountId
+    };
 
-    // Análise por categoria
-    const categoryAnalysis = await db
-      .select({
-        categoryName: categories.name,
-        categoryType: categories.type,
-        totalAmount: sum(sql`ABS(${transactions.amount})`).mapWith(Number),
-        transactionCount: count(transactions.id).mapWith(Number),
-        avgAmount: avg(sql`ABS(${transactions.amount})`).mapWith(Number),
-      })
-      .from(transactions)
-      .leftJoin(categories, eq(transactions.categoryId, categories.id))
-      .leftJoin(accounts, eq(transactions.accountId, accounts.id))
-      .where(whereClause)
-      .groupBy(categories.name, categories.type)
-      .orderBy(desc(sql`SUM(ABS(${transactions.amount}))`))
-      .limit(10);
+    // Métricas gerais e análise por categoria (agregados mensais)
+    const [totals, categoryTotals] = await Promise.all([
+      MonthlyAggregatesService.getTotals(aggregateFilters),
+      MonthlyAggregatesService.getCategoryTotals(aggregateFilters)
+    ]);
+
+    const metrics = {
+      totalIncome: totals.income,
+      totalExpenses: totals.expenses,
+      transactionCount: totals.transactionCount,
+      avgTransaction: totals.transactionCount > 0 ? totals.absAmount / totals.transactionCount : 0,
+    };
+
+    const categoryAnalysis = categoryTotals.slice(0, 10).map(cat => ({
+      categoryName: cat.categoryName,
+      categoryType: cat.categoryType,
+      totalAmount: cat.absAmount,
+      transactionCount: cat.transactionCount,
+      avgAmount: cat.transactionCount > 0 ? cat.absAmount / cat.transactionCount : 0,
+    }));
 
     // Maiores despesas
     const topExpenses = await db
@@ -312,12 +312,7 @@ export default class InsightsService {
     const trends = await this.getTrendData(filters);
 
     return {
-      metrics: metrics[0] || {
-        totalIncome: 0,
-        totalExpenses: 0,
-        transactionCount: 0,
-        avgTransaction: 0,
-      },
+      metrics,
       categoryAnalysis,
       topExpenses,
       trends
@@ -559,46 +554,15 @@ export default class InsightsService {
       const prevPeriodStr = `${prevYear}-${prevMonth.toString().padStart(2, '0')}`;
       const prevPeriod = this.convertPeriodToDates(prevPeriodStr);
 
-      // Filtros base comuns
-      const baseConditions: any[] = [];
-      if (filters.accountId && filters.accountId !== 'all') {
-        baseConditions.push(eq(transactions.accountId, filters.accountId));
-      }
-      if (filters.companyId && filters.companyId !== 'all') {
-        baseConditions.push(eq(accounts.companyId, filters.companyId));
-      }
-
-      // Receita Atual
-      const currentConditions = [
-        ...baseConditions,
-        gte(transactions.transactionDate, currentPeriod.startDate),
-        lte(transactions.transactionDate, currentPeriod.endDate),
-        eq(transactions.type, 'credit')
-      ];
-
-      const currentIncomeResult = await db
-        .select({ total: sum(transactions.amount).mapWith(Number) })
-        .from(transactions)
-        .leftJoin(accounts, eq(transactions.accountId, accounts.id))
-        .where(and(...currentConditions));
-      
-      const currentIncome = currentIncomeResult[0]?.total || 0;
-
-      // Receita Anterior
-      const prevConditions = [
-        ...baseConditions,
-        gte(transactions.transactionDate, prevPeriod.startDate),
-        lte(transactions.transactionDate, prevPeriod.endDate),
-        eq(transactions.type, 'credit')
-      ];
+      // Receita atual e anterior (meses inteiros: leitura direta dos agregados mensais)
+      const baseFilters = { companyId: filters.companyId, accountId: filters.accountId };
+      const [currentTotals, prevTotals] = await Promise.all([
+        MonthlyAggregatesService.getTotals({ ...baseFilters, ...currentPeriod }),
+        MonthlyAggregatesService.getTotals({ ...baseFilters, ...prevPeriod })
+      ]);
 
-      const prevIncomeResult = await db
-        .select({ total: sum(transactions.amount).mapWith(Number) })
-        .from(transactions)
-        .leftJoin(accounts, eq(transactions.accountId, accounts.id))
-        .where(and(...prevConditions));
-      
-      const prevIncome = prevIncomeResult[0]?.total || 0;
+      const currentIncome = currentTotals.income;
+      const prevIncome = prevTotals.income;
 
       // Calcular crescimento
       let growthRate = 0;
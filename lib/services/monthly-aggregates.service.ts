@@ -0,0 +1,364 @@
+import { db } from '@/lib/db/drizzle';
+import { transactions, categories, accounts, transactionSplits, transactionMonthlyAggregates } from '@/lib/db/schema';
+import { eq, and, or, gte, lte, sum, count, isNull, sql, SQL } from 'drizzle-orm';
+import { getCategoryExclusionClause, getFinancialExclusionClause } from './financial-exclusion';
+
+export interface MonthlyAggregateFilters {
+  startDate?: string; // YYYY-MM-DD (inclusive)
+  endDate?: string; // YYYY-MM-DD (inclusive)
+  companyId?: string;
+  accountId?: string; // UUID da conta
+  bankName?: string | string[]; // Vários nomes: todos precisam bater (AND)
+}
+
+export interface AggregateTotals {
+  income: number; // Soma dos créditos
+  expenses: number; // Soma de ABS dos débitos
+  amount: number; // Soma com sinal, como gravada
+  absAmount: number; // Soma de ABS(amount)
+  transactionCount: number;
+  creditCount: number;
+  debitCount: number;
+}
+
+export interface CategoryAggregate extends AggregateTotals {
+  categoryId: string | null;
+  categoryName: string | null;
+  categoryType: string | null;
+  categoryGroup: string | null;
+  dreGroup: string | null;
+  colorHex: string | null;
+  icon: string | null;
+}
+
+export interface MonthlyCategoryAggregate extends CategoryAggregate {
+  month: string; // YYYY-MM
+}
+
+interface DateRange {
+  start?: string;
+  end?: string;
+}
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+
+function toDate(value: string): Date {
+  const [year, month, day] = value.split('-').map(Number);
+  return new Date(Date.UTC(year, month - 1, day));
+}
+
+function formatDate(date: Date): string {
+  return date.toISOString().split('T')[0];
+}
+
+/**
+ * Leitura dos totais financeiros a partir de financeai_transaction_monthly_aggregates.
+ *
+ * Meses inteiros do período saem da tabela de agregados (mantida por trigger);
+ * só as pontas parciais (ex: 'last_30_days', 'this_year' até hoje) são somadas
+ * das transações. Aplica as mesmas regras de getFinancialExclusionClause:
+ * splits substituem a transação, snapshots de saldo e categorias ignoradas ficam de fora.
+ */
+export default class MonthlyAggregatesService {
+  /**
+   * Divide o período em meses inteiros (agregados) e pontas parciais (transações)
+   */
+  static splitPeriod(startDate?: string, endDate?: string): { months: DateRange | null; partial: DateRange[] } {
+    if ((startDate && !DATE_PATTERN.test(startDate)) || (endDate && !DATE_PATTERN.test(endDate))) {
+      return { months: null, partial: [{ start: startDate, end: endDate }] };
+    }
+
+    // Primeiro dia do primeiro mês inteiro
+    let monthsStart: string | undefined;
+    if (startDate) {
+      const start = toDate(startDate);
+      monthsStart = start.getUTCDate() === 1
+        ? startDate
+        : formatDate(new Date(Date.UTC(start.getUTCFullYear(), start.getUTCMonth() + 1, 1)));
+    }
+
+    // Último dia do último mês inteiro
+    let monthsEnd: string | undefined;
+    if (endDate) {
+      const end = toDate(endDate);
+      const lastDay = new Date(Date.UTC(end.getUTCFullYear(), end.getUTCMonth() + 1, 0));
+      monthsEnd = end.getTime() === lastDay.getTime()
+        ? endDate
+        : formatDate(new Date(Date.UTC(end.getUTCFullYear(), end.getUTCMonth(), 0)));
+    }
+
+    if (monthsStart && monthsEnd && monthsStart > monthsEnd) {
+      return { months: null, partial: [{ start: startDate, end: endDate }] };
+    }
+
+    const partial: DateRange[] = [];
+    if (startDate && monthsStart && startDate < monthsStart) {
+      const dayBefore = toDate(monthsStart);
+      dayBefore.setUTCDate(dayBefore.getUTCDate() - 1);
+      partial.push({ start: startDate, end: formatDate(dayBefore) });
+    }
+    if (endDate && monthsEnd && endDate > monthsEnd) {
+      const dayAfter = toDate(monthsEnd);
+      dayAfter.setUTCDate(dayAfter.getUTCDate() + 1);
+      partial.push({ start: formatDate(dayAfter), end: endDate });
+    }
+
+    return { months: { start: monthsStart, end: monthsEnd }, partial };
+  }
+
+  /**
+   * Totais do período (sem agrupamento)
+   */
+  static async getTotals(filters: MonthlyAggregateFilters, tx: any = db): Promise<AggregateTotals> {
+    const rows = await this.aggregate(filters, { byCategory: false, byMonth: false }, tx);
+    return rows[0] ?? this.emptyTotals();
+  }
+
+  /**
+   * Totais por categoria (maior volume primeiro). categoryId null = sem categoria.
+   */
+  static async getCategoryTotals(filters: MonthlyAggregateFilters, tx: any = db): Promise<CategoryAggregate[]> {
+    const rows = await this.aggregate(filters, { byCategory: true, byMonth: false }, tx);
+    return rows as CategoryAggregate[];
+  }
+
+  /**
+   * Totais por mês × categoria, em ordem cronológica
+   */
+  static async getMonthlyCategoryTotals(
+    filters: MonthlyAggregateFilters,
+    tx: any = db
+  ): Promise<MonthlyCategoryAggregate[]> {
+    const rows = await this.aggregate(filters, { byCategory: true, byMonth: true }, tx);
+    return (rows as MonthlyCategoryAggregate[]).sort((a, b) => a.month.localeCompare(b.month));
+  }
+
+  private static emptyTotals(): AggregateTotals {
+    return {
+      income: 0,
+      expenses: 0,
+      amount: 0,
+      absAmount: 0,
+      transactionCount: 0,
+      creditCount: 0,
+      debitCount: 0
+    };
+  }
+
+  private static categoryColumns() {
+    return {
+      categoryId: categories.id,
+      categoryName: categories.name,
+      categoryType: categories.type,
+      categoryGroup: categories.categoryGroup,
+      dreGroup: categories.dreGroup,
+      colorHex: categories.colorHex,
+      icon: categories.icon
+    };
+  }
+
+  private static categoryGroupBy() {
+    return [
+      categories.id,
+      categories.name,
+      categories.type,
+      categories.categoryGroup,
+      categories.dreGroup,
+      categories.colorHex,
+      categories.icon
+    ];
+  }
+
+  /**
+   * Executa a leitura nos agregados (meses inteiros) e nas transações (pontas) e soma os resultados
+   */
+  private static async aggregate(
+    filters: MonthlyAggregateFilters,
+    grouping: { byCategory: boolean; byMonth: boolean },
+    tx: any
+  ): Promise<Array<AggregateTotals & Partial<MonthlyCategoryAggregate>>> {
+    const { months, partial } = this.splitPeriod(filters.startDate, filters.endDate);
+
+    const [fromAggregates, fromTransactions] = await Promise.all([
+      months ? this.queryAggregates(filters, months, grouping, tx) : Promise.resolve([]),
+      partial.length > 0 ? this.queryTransactions(filters, partial, grouping, tx) : Promise.resolve([])
+    ]);
+
+    if (fromTransactions.length === 0) return fromAggregates;
+    if (fromAggregates.length === 0) return fromTransactions;
+
+    // Somar as duas fontes pela mesma chave (mês × categoria)
+    const merged = new Map<string, AggregateTotals & Partial<MonthlyCategoryAggregate>>();
+    for (const row of [...fromAggregates, ...fromTransactions]) {
+      const key = `${row.month ?? ''}|${row.categoryId ?? ''}`;
+      const current = merged.get(key);
+      if (!current) {
+        merged.set(key, { ...row });
+        continue;
+      }
+      current.income += row.income;
+      current.expenses += row.expenses;
+      current.amount += row.amount;
+      current.absAmount += row.absAmount;
+      current.transactionCount += row.transactionCount;
+      current.creditCount += row.creditCount;
+      current.debitCount += row.debitCount;
+    }
+
+    return Array.from(merged.values()).sort((a, b) => b.absAmount - a.absAmount);
+  }
+
+  private static async queryAggregates(
+    filters: MonthlyAggregateFilters,
+    months: DateRange,
+    grouping: { byCategory: boolean; byMonth: boolean },
+    tx: any
+  ) {
+    const agg = transactionMonthlyAggregates;
+    const monthColumn = sql<string>`TO_CHAR(${agg.month}, 'YYYY-MM')`;
+
+    const conditions: (SQL | undefined)[] = [
+      months.start ? gte(agg.month, months.start) : undefined,
+      months.end ? lte(agg.month, months.end) : undefined,
+      filters.companyId && filters.companyId !== 'all' ? eq(agg.companyId, filters.companyId) : undefined,
+      filters.accountId && filters.accountId !== 'all' ? eq(agg.accountId, filters.accountId) : undefined,
+      ...this.bankNameConditions(filters),
+      // Mesmas regras de getFinancialExclusionClause (descrição já classificada na escrita)
+      eq(agg.balanceSnapshot, false),
+      or(isNull(categories.id), getCategoryExclusionClause())
+    ];
+
+    let query = tx
+      .select({
+        ...(grouping.byMonth ? { month: monthColumn } : {}),
+        ...(grouping.byCategory ? this.categoryColumns() : {}),
+        income: sum(sql`CASE WHEN ${agg.type} = 'credit' THEN ${agg.totalAmount} ELSE 0 END`).mapWith(Number),
+        expenses: sum(sql`CASE WHEN ${agg.type} = 'debit' THEN ${agg.absAmount} ELSE 0 END`).mapWith(Number),
+        amount: sum(agg.totalAmount).mapWith(Number),
+        absAmount: sum(agg.absAmount).mapWith(Number),
+        transactionCount: sum(agg.transactionCount).mapWith(Number),
+        creditCount: sum(sql`CASE WHEN ${agg.type} = 'credit' THEN ${agg.transactionCount} ELSE 0 END`).mapWith(Number),
+        debitCount: sum(sql`CASE WHEN ${agg.type} = 'debit' THEN ${agg.transactionCount} ELSE 0 END`).mapWith(Number)
+      })
+      .from(agg)
+      .leftJoin(categories, eq(agg.categoryId, categories.id))
+      .leftJoin(accounts, eq(agg.accountId, accounts.id))
+      .where(and(...conditions));
+
+    const groupBy = [
+      ...(grouping.byMonth ? [monthColumn] : []),
+      ...(grouping.byCategory ? this.categoryGroupBy() : [])
+    ];
+    if (groupBy.length > 0) {
+      query = query.groupBy(...groupBy).orderBy(sql`SUM(${agg.absAmount}) DESC`);
+    }
+
+    const rows = await query;
+    return this.normalize(rows);
+  }
+
+  private static async queryTransactions(
+    filters: MonthlyAggregateFilters,
+    ranges: DateRange[],
+    grouping: { byCategory: boolean; byMonth: boolean },
+    tx: any
+  ) {
+    const monthColumn = sql<string>`TO_CHAR(combined_transactions.transaction_date, 'YYYY-MM')`;
+
+    const rangeConditions = ranges.map(range => and(
+      range.start ? sql`combined_transactions.transaction_date >= ${range.start}` : undefined,
+      range.end ? sql`combined_transactions.transaction_date <= ${range.end}` : undefined
+    ));
+
+    const conditions: (SQL | undefined)[] = [
+      or(...rangeConditions),
+      filters.companyId && filters.companyId !== 'all' ? eq(accounts.companyId, filters.companyId) : undefined,
+      filters.accountId && filters.accountId !== 'all' ? sql`combined_transactions.account_id = ${filters.accountId}` : undefined,
+      ...this.bankNameConditions(filters),
+      getFinancialExclusionClause({ descriptionColumn: sql`combined_transactions.description` })
+    ];
+
+    let query = tx
+      .select({
+        ...(grouping.byMonth ? { month: monthColumn } : {}),
+        ...(grouping.byCategory ? this.categoryColumns() : {}),
+        income: sum(sql`CASE WHEN type_to_sum = 'credit' THEN amount_to_sum ELSE 0 END`).mapWith(Number),
+        expenses: sum(sql`CASE WHEN type_to_sum = 'debit' THEN ABS(amount_to_sum) ELSE 0 END`).mapWith(Number),
+        amount: sum(sql`amount_to_sum`).mapWith(Number),
+        absAmount: sum(sql`ABS(amount_to_sum)`).mapWith(Number),
+        transactionCount: count(sql`transaction_id`).mapWith(Number),
+        creditCount: sum(sql`CASE WHEN type_to_sum = 'credit' THEN 1 ELSE 0 END`).mapWith(Number),
+        debitCount: sum(sql`CASE WHEN type_to_sum = 'debit' THEN 1 ELSE 0 END`).mapWith(Number)
+      })
+      .from(this.getCombinedTransactionsSubquery())
+      .leftJoin(categories, eq(sql`combined_transactions.category_id`, categories.id))
+      .leftJoin(accounts, eq(sql`combined_transactions.account_id`, accounts.id))
+      .where(and(...conditions));
+
+    const groupBy = [
+      ...(grouping.byMonth ? [monthColumn] : []),
+      ...(grouping.byCategory ? this.categoryGroupBy() : [])
+    ];
+    if (groupBy.length > 0) {
+      query = query.groupBy(...groupBy).orderBy(sql`SUM(ABS(combined_transactions.amount_to_sum)) DESC`);
+    }
+
+    const rows = await query;
+    return this.normalize(rows);
+  }
+
+  private static bankNameConditions(filters: MonthlyAggregateFilters): SQL[] {
+    return [filters.bankName ?? []].flat()
+      .filter(bankName => bankName && bankName !== 'all')
+      .map(bankName => eq(accounts.bankName, bankName));
+  }
+
+  /**
+   * SUM de conjunto vazio vem null: normaliza para 0
+   */
+  private static normalize(rows: any[]): Array<AggregateTotals & Partial<MonthlyCategoryAggregate>> {
+    return rows.map(row => ({
+      ...row,
+      income: row.income || 0,
+      expenses: row.expenses || 0,
+      amount: row.amount || 0,
+      absAmount: row.absAmount || 0,
+      transactionCount: row.transactionCount || 0,
+      creditCount: row.creditCount || 0,
+      debitCount: row.debitCount || 0
+    }));
+  }
+
+  /**
+   * Transações normais + splits (mesma definição usada pelo trigger dos agregados)
+   */
+  private static getCombinedTransactionsSubquery() {
+    return sql`(
+      -- Transações que NÃO possuem desmembramentos
+      SELECT
+        t.id as transaction_id,
+        t.category_id as category_id,
+        t.amount as amount_to_sum,
+        t.type as type_to_sum,
+        t.transaction_date,
+        t.account_id,
+        t.description
+      FROM ${transactions} t
+      WHERE t.id NOT IN (SELECT transaction_id FROM ${transactionSplits})
+
+      UNION ALL
+
+      -- Desmembramentos individuais
+      SELECT
+        ts.transaction_id,
+        ts.category_id,
+        ts.amount as amount_to_sum,
+        t.type as type_to_sum,
+        t.transaction_date,
+        t.account_id,
+        t.description
+      FROM ${transactionSplits} ts
+      JOIN ${transactions} t ON ts.transaction_id = t.id
+    ) as combined_transactions`;
+  }
+}
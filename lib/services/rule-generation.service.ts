@@ -15,6 +15,7 @@ import { db } from '@/lib/db/drizzle';
 import { categoryRules, categories } from '@/lib/db/schema';
 import { eq, and } from 'drizzle-orm';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from './rule-index.service';
 
 const log = createLogger('rule-generation');
 
@@ -958,6 +959,8 @@ export class RuleGenerationService {
           updatedAt: new Date()
         });
 
+      RuleIndexService.invalidate(companyId);
+
       log.info(
         { pattern: extraction.pattern, ruleType, strategy, categoryName, confidence: (ruleConfidence * 100).toFixed(0) },
         'Auto-rule created'
@@ -0,0 +1,352 @@
+/**
+ * Rule Index Service
+ *
+ * Índice compilado de regras de categorização por empresa.
+ *
+ * Antes, cada chamada de tryRules recarregava todas as regras do Postgres e
+ * o RuleScoringService recompilava um RegExp por regra wildcard/regex a cada
+ * transação. O índice é montado uma vez por empresa e reaproveitado:
+ *   - exact: Map pattern → regras (lookup O(1))
+ *   - contains: Map prefixo (3 chars) → regras, verificado com startsWith
+ *   - tokens: Map primeiro token → regras
+ *   - wildcard/regex: RegExp compilado uma única vez (wildcard filtrado por trecho literal)
+ *   - fuzzy e padrões curtos: avaliação linear (poucas regras)
+ *
+ * Invalidação: category-rules.service, rule-lifecycle.service e demais pontos
+ * que alteram regras chamam invalidate(companyId). Um TTL cobre escritas
+ * feitas fora do processo (scripts, outra instância).
+ */
+
+import { db } from '@/lib/db/drizzle';
+import { categoryRules, categories } from '@/lib/db/schema';
+import { eq, and, sql } from 'drizzle-orm';
+import type { CategoryRule, Category } from '@/lib/db/schema';
+import { RuleScoringService } from './rule-scoring.service';
+import { countDbQuery } from './categorization-metrics';
+import type { ScoredRule, TransactionContext } from './rule-scoring.service';
+import { createLogger } from '@/lib/logger';
+
+const log = createLogger('rule-index');
+
+const RULE_INDEX_CONFIG = {
+  // Tamanho do prefixo usado como chave do índice de contains
+  prefixLength: 3,
+  // Tempo máximo de vida de um índice (rede de segurança para escritas externas)
+  ttlMs: 5 * 60 * 1000
+};
+
+export interface RuleWithCategory {
+  financeai_category_rules: CategoryRule;
+  financeai_categories: Category;
+}
+
+export interface IndexedRule {
+  rule: CategoryRule;
+  category: Category;
+  order: number;           // Posição original (desempate igual ao sort estável)
+}
+
+interface CompiledRegexRule extends IndexedRule {
+  regex: RegExp | null;    // null = pattern inválido → fallback contains
+  fallback: string;
+  anchor: string;          // Trecho literal obrigatório (wildcard) para descartar candidatas sem rodar o RegExp
+}
+
+/**
+ * Índice imutável de uma empresa. Puro (sem acesso ao banco) para poder
+ * ser usado em benchmarks e testes.
+ */
+export class CompiledRuleIndex {
+  readonly size: number;
+  readonly builtAt: number;
+
+  private byId = new Map<string, IndexedRule>();
+  private exact = new Map<string, IndexedRule[]>();
+  private containsByPrefix = new Map<string, IndexedRule[]>();
+  private shortContains: IndexedRule[] = [];
+  private tokensByFirst = new Map<string, IndexedRule[]>();
+  private tokenPatterns = new Map<string, string[]>();
+  private compiled: CompiledRegexRule[] = [];
+  private linear: IndexedRule[] = [];
+
+  constructor(rows: RuleWithCategory[]) {
+    this.builtAt = Date.now();
+    this.size = rows.length;
+
+    rows.forEach((row, order) => {
+      const entry: IndexedRule = {
+        rule: row.financeai_category_rules,
+        category: row.financeai_categories,
+        order
+      };
+      this.byId.set(entry.rule.id, entry);
+      this.add(entry);
+    });
+  }
+
+  private add(entry: IndexedRule): void {
+    const pattern = entry.rule.rulePattern.toLowerCase();
+    const type = entry.rule.ruleType.toLowerCase();
+
+    switch (type) {
+      case 'exact':
+        push(this.exact, pattern, entry);
+        break;
+
+      case 'wildcard':
+      case 'regex': {
+        let regex: RegExp | null = null;
+        try {
+          regex = type === 'wildcard'
+            ? new RegExp(RuleScoringService.wildcardToRegexSource(pattern), 'i')
+            : new RegExp(pattern, 'i');
+        } catch {
+          log.warn({ ruleId: entry.rule.id, pattern }, 'Invalid pattern in rule');
+        }
+        this.compiled.push({
+          ...entry,
+          regex,
+          fallback: pattern.replace(/[*?]/g, ''),
+          anchor: type === 'wildcard' ? longestLiteral(pattern) : ''
+        });
+        break;
+      }
+
+      case 'tokens': {
+        const tokens = pattern.split(/\s+/).filter(t => t.length > 0);
+        if (tokens.length === 0) {
+          this.linear.push(entry);
+        } else {
+          this.tokenPatterns.set(entry.rule.id, tokens);
+          push(this.tokensByFirst, tokens[0], entry);
+        }
+        break;
+      }
+
+      case 'fuzzy':
+        this.linear.push(entry);
+        break;
+
+      default:
+        // contains (e tipos desconhecidos, que caem em contains no scoring)
+        if (pattern.length < RULE_INDEX_CONFIG.prefixLength) {
+          this.shortContains.push(entry);
+        } else {
+          push(this.containsByPrefix, pattern.slice(0, RULE_INDEX_CONFIG.prefixLength), entry);
+        }
+    }
+  }
+
+  getRule(ruleId: string): IndexedRule | undefined {
+    return this.byId.get(ruleId);
+  }
+
+  /**
+   * Retorna as regras que fazem match, com o texto que casou.
+   * Mesma semântica de RuleScoringService.testRuleMatch: os campos são
+   * testados em ordem (description, memo, name) e vale o primeiro que casar.
+   */
+  match(context: TransactionContext): Array<{ entry: IndexedRule; matchedText: string }> {
+    const matched = new Map<string, { entry: IndexedRule; matchedText: string }>();
+    const searchTexts = [
+      context.description,
+      context.memo || '',
+      context.name || ''
+    ].filter(Boolean);
+
+    const hit = (entry: IndexedRule, text: string) => {
+      if (!matched.has(entry.rule.id)) {
+        matched.set(entry.rule.id, { entry, matchedText: text });
+      }
+    };
+
+    for (const text of searchTexts) {
+      const lowered = text.toLowerCase();
+      const normalized = lowered.trim();
+
+      // exact
+      for (const entry of this.exact.get(normalized) ?? []) hit(entry, text);
+
+      // contains: cada posição do texto consulta o prefixo correspondente
+      const prefixLength = RULE_INDEX_CONFIG.prefixLength;
+      for (let i = 0; i + prefixLength <= normalized.length; i++) {
+        const candidates = this.containsByPrefix.get(normalized.slice(i, i + prefixLength));
+        if (!candidates) continue;
+        for (const entry of candidates) {
+          if (normalized.startsWith(entry.rule.rulePattern.toLowerCase(), i)) hit(entry, text);
+        }
+      }
+      for (const entry of this.shortContains) {
+        if (normalized.includes(entry.rule.rulePattern.toLowerCase())) hit(entry, text);
+      }
+
+      // tokens
+      const textTokens = new Set(normalized.split(/\s+/).filter(t => t.length > 0));
+      for (const token of textTokens) {
+        for (const entry of this.tokensByFirst.get(token) ?? []) {
+          const patternTokens = this.tokenPatterns.get(entry.rule.id)!;
+          if (patternTokens.every(t => textTokens.has(t))) hit(entry, text);
+        }
+      }
+
+      // wildcard/regex pré-compilados
+      for (const entry of this.compiled) {
+        if (entry.regex) {
+          if (entry.anchor && !lowered.includes(entry.anchor)) continue;
+          // wildcard testa o texto original, regex o normalizado (igual ao scoring)
+          const subject = entry.rule.ruleType.toLowerCase() === 'wildcard' ? text : normalized;
+          if (entry.regex.test(subject)) hit(entry, text);
+        } else if (normalized.includes(entry.fallback)) {
+          hit(entry, text);
+        }
+      }
+    }
+
+    // fuzzy (e tokens vazios): poucas regras, delega ao scoring original
+    for (const entry of this.linear) {
+      const { matched: isMatch, matchedText } = RuleScoringService.testRuleMatch(entry.rule, context);
+      if (isMatch) hit(entry, matchedText);
+    }
+
+    return Array.from(matched.values());
+  }
+
+  /**
+   * Melhor regra para a transação, opcionalmente filtrando candidatas
+   * (ex: restrições de tipo de movimento). Empates seguem a ordem original.
+   */
+  findBestMatch(
+    context: TransactionContext,
+    filter?: (entry: IndexedRule) => boolean
+  ): (ScoredRule & { entry: IndexedRule }) | null {
+    let best: (ScoredRule & { entry: IndexedRule }) | null = null;
+
+    for (const { entry, matchedText } of this.match(context)) {
+      if (!entry.rule.active) continue;
+      if (filter && !filter(entry)) continue;
+
+      const scored = RuleScoringService.calculateScore(entry.rule, matchedText, context);
+      if (
+        !best ||
+        scored.score > best.score ||
+        (scored.score === best.score && entry.order < best.entry.order)
+      ) {
+        best = { ...scored, entry };
+      }
+    }
+
+    return best;
+  }
+}
+
+/**
+ * Maior trecho literal ASCII de um wildcard. Com a flag 'i' (sem 'u'),
+ * caracteres ASCII do pattern só casam com variantes ASCII, então o trecho
+ * em minúsculas sempre aparece no texto em minúsculas quando há match.
+ */
+function longestLiteral(pattern: string): string {
+  return pattern
+    .split(/[*?]/)
+    .filter(segment => /^[\x00-\x7f]+$/.test(segment))
+    .reduce((longest, segment) => (segment.length > longest.length ? segment : longest), '');
+}
+
+function push<K, V>(map: Map<K, V[]>, key: K, value: V): void {
+  const list = map.get(key);
+  if (list) {
+    list.push(value);
+  } else {
+    map.set(key, [value]);
+  }
+}
+
+export class RuleIndexService {
+  private static indexes = new Map<string, CompiledRuleIndex>();
+  private static pending = new Map<string, Promise<CompiledRuleIndex>>();
+  // Incrementado a cada invalidação para descartar builds que ficaram obsoletos
+  private static generation = 0;
+
+  /**
+   * Retorna o índice compilado da empresa, montando-o se necessário.
+   * Builds concorrentes da mesma empresa compartilham a mesma promise.
+   */
+  static async getIndex(companyId: string): Promise<CompiledRuleIndex> {
+    const cached = this.indexes.get(companyId);
+    if (cached && Date.now() - cached.builtAt < RULE_INDEX_CONFIG.ttlMs) {
+      return cached;
+    }
+
+    const inFlight = this.pending.get(companyId);
+    if (inFlight) return inFlight;
+
+    const generation = this.generation;
+    const build = this.loadRules(companyId)
+      .then(rows => {
+        const index = new CompiledRuleIndex(rows);
+        if (generation === this.generation) {
+          this.indexes.set(companyId, index);
+        }
+        log.info({ companyId: companyId.slice(0, 8), rules: index.size }, '[RULE-INDEX] Built');
+        return index;
+      })
+      .finally(() => {
+        // Um build obsoleto (anterior a invalidate) não remove o build mais novo
+        if (this.pending.get(companyId) === build) {
+          this.pending.delete(companyId);
+        }
+      });
+
+    this.pending.set(companyId, build);
+    return build;
+  }
+
+  /**
+   * Invalida o índice de uma empresa. Sem companyId (ou regra global),
+   * invalida todos.
+   */
+  static invalidate(companyId?: string | null): void {
+    this.generation++;
+    if (companyId) {
+      this.indexes.delete(companyId);
+      this.pending.delete(companyId);
+    } else {
+      this.indexes.clear();
+      this.pending.clear();
+    }
+  }
+
+  /**
+   * Reflete um uso positivo no índice em memória sem reconstruí-lo
+   * (usageCount entra no score via bônus de uso).
+   */
+  static recordUse(ruleId: string): void {
+    for (const index of this.indexes.values()) {
+      const entry = index.getRule(ruleId);
+      if (entry) {
+        entry.rule.usageCount = (entry.rule.usageCount || 0) + 1;
+        return;
+      }
+    }
+  }
+
+  /**
+   * Regras ativas e maduras da empresa, já com a categoria (join)
+   */
+  private static async loadRules(companyId: string): Promise<RuleWithCategory[]> {
+    countDbQuery('ruleIndex');
+    return db
+      .select()
+      .from(categoryRules)
+      .innerJoin(categories, eq(categoryRules.categoryId, categories.id))
+      .where(
+        and(
+          eq(categoryRules.active, true),
+          eq(categoryRules.companyId, companyId),
+          // PR2: Apenas regras maduras ou aceitas (status allowed)
+          sql`${categoryRules.status} IN ('active', 'refined', 'consolidated')`
+        )
+      );
+  }
+}
+
+export default RuleIndexService;
@@ -12,6 +12,7 @@ import { db } from '@/lib/db/drizzle';
 import { categoryRules, ruleFeedback, transactions, categories } from '@/lib/db/schema';
 import { eq, and, sql, desc, lt, gt } from 'drizzle-orm';
 import { createLogger } from '@/lib/logger';
+import { RuleIndexService } from './rule-index.service';
 
 const log = createLogger('rule-lifecycle');
 
@@ -240,6 +241,7 @@ export class RuleLifecycleService {
           })
           .where(eq(categoryRules.id, ruleId));
 
+        RuleIndexService.invalidate(rule.companyId);
         log.info({ ruleId, oldStatus: currentStatus, newStatus, reason }, 'Rule status changed');
 
         return {
@@ -287,6 +289,8 @@ export class RuleLifecycleService {
         })
         .where(eq(categoryRules.id, ruleId));
 
+      RuleIndexService.invalidate(rule.companyId);
+
       return {
         ruleId,
         oldStatus: currentStatus,
@@ -306,15 +310,17 @@ export class RuleLifecycleService {
     try {
       this.checkDatabase();
 
-      await db!
+      const [rule] = await db!
         .update(categoryRules)
         .set({
           status: 'inactive',
           active: false,
           updatedAt: new Date()
         })
-        .where(eq(categoryRules.id, ruleId));
+        .where(eq(categoryRules.id, ruleId))
+        .returning({ companyId: categoryRules.companyId });
 
+      RuleIndexService.invalidate(rule?.companyId);
       log.info({ ruleId, reason }, 'Rule deactivated');
       return true;
     } catch (error) {
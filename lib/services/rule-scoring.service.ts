@@ -195,10 +195,7 @@ export class RuleScoringService {
 
           case 'wildcard':
             // Converter wildcard para regex
-            const wildcardRegex = pattern
-              .replace(/[.+^${}()|[\]\\]/g, '\\$&')
-              .replace(/\*/g, '.*')
-              .replace(/\?/g, '.');
+            const wildcardRegex = this.wildcardToRegexSource(pattern);
             if (new RegExp(wildcardRegex, 'i').test(text)) {
               return { matched: true, matchedText: text };
             }
@@ -246,6 +243,16 @@ export class RuleScoringService {
     return { matched: false, matchedText: '' };
   }
 
+  /**
+   * Converte pattern wildcard (* e ?) em fonte de regex
+   */
+  static wildcardToRegexSource(pattern: string): string {
+    return pattern
+      .replace(/[.+^${}()|[\]\\]/g, '\\$&')
+      .replace(/\*/g, '.*')
+      .replace(/\?/g, '.');
+  }
+
   /**
    * Helper para fuzzy matching usando Levenshtein
    */
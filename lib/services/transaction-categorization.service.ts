@@ -8,10 +8,11 @@
  */
 
 import { db } from '@/lib/db/drizzle';
-import { categoryRules, transactions, categories, accounts } from '@/lib/db/schema';
+import { transactions, categories } from '@/lib/db/schema';
 import { eq, and, sql } from 'drizzle-orm';
 import categoryCacheService from './category-cache.service';
-import { RuleScoringService } from './rule-scoring.service';
+import { RuleIndexService } from './rule-index.service';
+import type { IndexedRule } from './rule-index.service';
 import type { TransactionContext } from './rule-scoring.service';
 import { MovementTypeService } from './movement-type.service';
 import type { MovementType } from './movement-type.service';
@@ -19,11 +20,15 @@ import { CategorizationValidators } from './categorization-validators';
 import { RuleGenerationService } from './rule-generation.service';
 import { RuleLifecycleService } from './rule-lifecycle.service';
 import { TransactionClusteringService } from './transaction-clustering.service';
-import type { CategoryRule } from '@/lib/db/schema';
+import DescriptionSimilarityService from './description-similarity.service';
+import { measureStage, countDbQuery } from './categorization-metrics';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('tx-categorization');
 
+// Candidatos do histórico avaliados com Levenshtein (pré-selecionados por trigramas no banco)
+const HISTORY_CANDIDATE_LIMIT = 20;
+
 // Configuração do sistema de auto-learning
 const AUTO_LEARNING_CONFIG = {
   // 🛑 DESABILITADO TEMPORARIAMENTE
@@ -171,7 +176,7 @@ export class TransactionCategorizationService {
     // CAMADA 1: Cache (SKIP se termo genérico)
     if (!skipCache && !isGenericTerm) {
       attemptedSources.push('cache');
-      let cacheResult = await this.tryCache(context, companyId);
+      let cacheResult = await measureStage('cache', () => this.tryCache(context, companyId));
 
       if (cacheResult) {
         // [PR5] Hard Validation: Validar antes de aceitar
@@ -191,7 +196,7 @@ export class TransactionCategorizationService {
     // CAMADA 2: Regras (SKIP se termo genérico)
     if (!skipRules && !isGenericTerm) {
       attemptedSources.push('rules');
-      let rulesResult = await this.tryRules(context, companyId, movementType);
+      let rulesResult = await measureStage('rules', () => this.tryRules(context, companyId, movementType));
 
       if (rulesResult) {
         // [PR5] Hard Validation
@@ -224,7 +229,7 @@ export class TransactionCategorizationService {
     // CAMADA 3: Histórico (SKIP se termo genérico)
     if (!skipHistory && !isGenericTerm) {
       attemptedSources.push('history');
-      let historyResult = await this.tryHistory(context, companyId, historyDaysLimit);
+      let historyResult = await measureStage('history', () => this.tryHistory(context, companyId, historyDaysLimit));
 
       if (historyResult) {
          // [PR5] Hard Validation
@@ -255,7 +260,7 @@ export class TransactionCategorizationService {
     // CAMADA 4: IA
     if (!skipAI) {
       attemptedSources.push('ai');
-      let aiResult = await this.tryAI(context, companyId);
+      let aiResult = await measureStage('ai', () => this.tryAI(context, companyId));
 
       if (aiResult) {
         // [PR5] Hard Validation
@@ -413,7 +418,14 @@ export class TransactionCategorizationService {
    * [PR5] Validador Duro: Garante integridade contábil
    * Bloquear resultados que violam regras contábeis básicas (DRE Reliability)
    */
-  private static async validateHardConstraints(
+  private static validateHardConstraints(
+    result: CategorizationResult,
+    context: TransactionContext
+  ): Promise<CategorizationResult> {
+    return measureStage('validation', () => this.checkHardConstraints(result, context));
+  }
+
+  private static async checkHardConstraints(
     result: CategorizationResult,
     context: TransactionContext
   ): Promise<CategorizationResult> {
@@ -424,6 +436,7 @@ export class TransactionCategorizationService {
 
     try {
       // Buscar metadados da categoria para validação
+      countDbQuery('validation');
       const categoryMetadata = await db
         .select({
           type: categories.type,
@@ -473,31 +486,17 @@ export class TransactionCategorizationService {
     movementType?: MovementType
   ): Promise<CategorizationResult | null> {
     try {
-      // 1. Buscar todas as regras ativas da empresa
-      const activeRules = await db
-        .select()
-        .from(categoryRules)
-        .innerJoin(categories, eq(categoryRules.categoryId, categories.id))
-        .where(
-          and(
-            eq(categoryRules.active, true),
-            eq(categoryRules.companyId, companyId),
-            // PR2: Apenas regras maduras ou aceitas (status allowed)
-             sql`${categoryRules.status} IN ('active', 'refined', 'consolidated')`
-          )
-        );
+      // 1. Índice compilado das regras ativas da empresa (montado uma vez, invalidado em escritas)
+      const ruleIndex = await RuleIndexService.getIndex(companyId);
+      if (ruleIndex.size === 0) return null;
 
-      // 2. Filtrar regras (Memória)
-      let validRules = activeRules;
-      
-      // PR4: Filtrar regras que violam restrições de tipo de movimento
+      // 2. PR4: Filtrar regras que violam restrições de tipo de movimento
+      let isAllowed: ((entry: IndexedRule) => boolean) | undefined;
       if (movementType) {
         const allowedTypes = CategorizationValidators.getValidCategoryTypes(movementType);
         const forbiddenGroups = CategorizationValidators.getForbiddenCategoryGroups(movementType);
-        
-        validRules = activeRules.filter(r => {
-          const cat = r.financeai_categories;
-          
+
+        isAllowed = ({ category: cat }) => {
           // 1. Checar Whitelist de Tipos
           if (allowedTypes && !allowedTypes.includes(cat.type as any)) {
              return false;
@@ -509,30 +508,23 @@ export class TransactionCategorizationService {
           }
 
           return true;
-        });
+        };
       }
-      
-      if (validRules.length === 0) return null;
 
-      // 3. Match Logic
-      // Converter para formato CategoryRule
-      const rulesToCheck: CategoryRule[] = validRules.map(r => r.financeai_category_rules);
-      
-      // Usar o sistema de scoring para encontrar a melhor regra
-      const bestMatch = RuleScoringService.findBestMatch(rulesToCheck, context);
+      // 3. Match Logic: candidatas vêm do índice, scoring igual ao RuleScoringService
+      const bestMatch = ruleIndex.findBestMatch(context, isAllowed);
 
       if (!bestMatch) {
          return null;
       }
-      
-      // Buscar info da categoria (já temos no join)
-      const ruleWithCategory = validRules.find(r => r.financeai_category_rules.id === bestMatch.ruleId);
-      const category = ruleWithCategory?.financeai_categories;
 
-      if (!category) return null;
+      // Categoria já vem do join do índice
+      const category = bestMatch.entry.category;
 
       // Registrar uso positivo da regra (atualiza contadores e avalia promoção)
       // Não bloqueia o retorno
+      RuleIndexService.recordUse(bestMatch.ruleId);
+      countDbQuery('ruleUsage');
       RuleLifecycleService.recordPositiveUse(bestMatch.ruleId).catch(err => {
         log.warn({ err }, 'Failed to record positive rule use');
       });
@@ -569,29 +561,20 @@ export class TransactionCategorizationService {
     companyId: string,
     daysLimit: number
   ): Promise<CategorizationResult | null> {
-    // Buscar transações similares nos últimos X dias
+    // Candidatos: top-k descrições rotuladas da empresa mais próximas por
+    // trigramas (índice GIN), nos últimos X dias
     const cutoffDate = new Date();
     cutoffDate.setDate(cutoffDate.getDate() - daysLimit);
 
-    const similarTransactions = await db
-      .select({
-        id: transactions.id,
-        description: transactions.description,
-        categoryId: transactions.categoryId,
-        categoryName: categories.name,
-        confidence: transactions.confidence,
-        transactionDate: transactions.transactionDate
-      })
-      .from(transactions)
-      .innerJoin(categories, eq(transactions.categoryId, categories.id))
-      .innerJoin(accounts, eq(transactions.accountId, accounts.id))
-      .where(
-        and(
-          eq(accounts.companyId, companyId),
-          sql`${transactions.transactionDate} >= ${cutoffDate.toISOString().split('T')[0]}`
-        )
-      )
-      .limit(100); // Limitar para não sobrecarregar
+    countDbQuery('history');
+    const similarTransactions = await DescriptionSimilarityService.findSimilar(
+      context.description,
+      companyId,
+      {
+        sinceDate: cutoffDate.toISOString().split('T')[0],
+        limit: HISTORY_CANDIDATE_LIMIT
+      }
+    );
 
     if (similarTransactions.length === 0) {
       return null;
@@ -662,6 +645,7 @@ export class TransactionCategorizationService {
       return this.fallbackCategoryCache.get(companyId) ?? null;
     }
 
+    countDbQuery('fallbackCategory');
     const [fallback] = await db
       .select({ id: categories.id })
       .from(categories)
@@ -705,6 +689,7 @@ export class TransactionCategorizationService {
       if (!result) return null;
 
       // Buscar categoryId do nome retornado pela IA (filtrado por empresa)
+      countDbQuery('aiCategoryLookup');
       const category = await db
         .select({ id: categories.id, name: categories.name })
         .from(categories)
@@ -744,13 +729,15 @@ export class TransactionCategorizationService {
   }
 
   /**
-   * Normaliza descrição para comparação
+   * Normaliza descrição para comparação.
+   * Espelhada em financeai_normalize_description (coluna normalized_description):
+   * mudanças aqui precisam ir também para scripts/apply-description-similarity-migration.ts
    */
   private static normalizeDescription(description: string): string {
     return description
-      .toUpperCase()
-      .replace(/\d{6,}/g, '')          // Remove só sequências longas (>= 6 dígitos)
-      .replace(/[^A-Z0-9\s]/g, ' ')    // Mantém letras E dígitos curtos
+      .replace(/[0-9]{6,}/g, '')        // Remove só sequências longas (>= 6 dígitos)
+      .replace(/[^A-Za-z0-9\s]/g, ' ') // Mantém letras ASCII E dígitos curtos
+      .toUpperCase()                    // Depois do filtro: só ASCII, igual ao upper() do Postgres
       .replace(/\s+/g, ' ')
       .trim();
   }
@@ -824,6 +811,7 @@ export class TransactionCategorizationService {
         return;
       }
 
+      countDbQuery('autoLearning');
       const [category] = await db
         .select({ id: categories.id })
         .from(categories)
@@ -8,12 +8,14 @@
  */
 
 import { db } from '@/lib/db/drizzle';
-import { transactionClusters, transactions, categories } from '@/lib/db/schema';
+import { transactionClusters } from '@/lib/db/schema';
 import { eq, and, sql } from 'drizzle-orm';
 import { createLogger } from '@/lib/logger';
 
 const log = createLogger('tx-clustering');
 import { RuleGenerationService } from './rule-generation.service';
+import DescriptionSimilarityService from './description-similarity.service';
+import { countDbQuery } from './categorization-metrics';
 
 // ============================================================================
 // TIPOS E INTERFACES
@@ -72,7 +74,13 @@ const CLUSTERING_CONFIG = {
   maximumClusterSize: 50,
 
   // Dias para buscar transações para clustering
-  lookbackDays: 90
+  lookbackDays: 90,
+
+  // Clusters candidatos (mais próximos por trigramas) avaliados com Jaccard
+  candidateClusters: 10,
+
+  // Transações candidatas por resultado pedido em findSimilarTransactions
+  candidatesPerResult: 5
 };
 
 // ============================================================================
@@ -146,7 +154,10 @@ export class TransactionClusteringService {
       const normalized = this.normalizeDescription(description);
       const tokens = this.tokenize(description);
 
-      // Buscar clusters existentes da mesma categoria/empresa
+      // Clusters pendentes da mesma categoria/empresa mais próximos do
+      // centróide por trigramas (índice GIN), em vez de todos
+      const centroidSimilarity = sql`similarity(${transactionClusters.centroidDescription}, ${normalized})`;
+      countDbQuery('clustering');
       const existingClusters = await db!
         .select()
         .from(transactionClusters)
@@ -154,9 +165,12 @@ export class TransactionClusteringService {
           and(
             eq(transactionClusters.companyId, companyId),
             eq(transactionClusters.categoryId, categoryId),
-            eq(transactionClusters.status, 'pending')
+            eq(transactionClusters.status, 'pending'),
+            sql`${transactionClusters.centroidDescription} % ${normalized}`
           )
-        );
+        )
+        .orderBy(sql`${centroidSimilarity} DESC`)
+        .limit(CLUSTERING_CONFIG.candidateClusters);
 
       // Tentar encontrar cluster similar
       for (const cluster of existingClusters) {
@@ -175,6 +189,7 @@ export class TransactionClusteringService {
           // Atualizar tokens comuns (interseção)
           const newCommonTokens = tokens.filter(t => clusterTokens.includes(t));
 
+          countDbQuery('clustering');
           await db!
             .update(transactionClusters)
             .set({
@@ -193,6 +208,7 @@ export class TransactionClusteringService {
       }
 
       // Criar novo cluster
+      countDbQuery('clustering');
       const [newCluster] = await db!
         .insert(transactionClusters)
         .values({
@@ -233,23 +249,19 @@ export class TransactionClusteringService {
 
       const tokens = this.tokenize(description);
 
-      // Buscar transações recentes
+      // Candidatos recentes da empresa, pré-selecionados por trigramas no banco
       const cutoffDate = new Date();
       cutoffDate.setDate(cutoffDate.getDate() - CLUSTERING_CONFIG.lookbackDays);
 
-      const recentTransactions = await db!
-        .select({
-          id: transactions.id,
-          description: transactions.description,
-          categoryId: transactions.categoryId,
-          categoryName: categories.name
-        })
-        .from(transactions)
-        .leftJoin(categories, eq(transactions.categoryId, categories.id))
-        .where(
-          sql`${transactions.transactionDate} >= ${cutoffDate.toISOString().split('T')[0]}`
-        )
-        .limit(500); // Limitar para performance
+      const recentTransactions = await DescriptionSimilarityService.findSimilar(
+        description,
+        companyId,
+        {
+          sinceDate: cutoffDate.toISOString().split('T')[0],
+          labeledOnly: false,
+          limit: limit * CLUSTERING_CONFIG.candidatesPerResult
+        }
+      );
 
       // Calcular similaridade
       const similar: SimilarTransaction[] = [];
@@ -1,4 +1,6 @@
 import { writeFile, mkdir, access } from 'fs/promises';
+import { createReadStream } from 'fs';
+import { Readable } from 'stream';
 import { join, dirname } from 'path';
 import { v4 as uuidv4 } from 'uuid';
 import { createClient, SupabaseClient } from '@supabase/supabase-js';
@@ -19,6 +21,9 @@ export interface FileStorageResult {
 
 export type StorageProvider = 'filesystem' | 'supabase' | 's3';
 
+// Bucket fixo dos arquivos no Supabase (independe de S3_BUCKET_NAME)
+const SUPABASE_BUCKET = 'ofx-files';
+
 export class FileStorageService {
   private static instance: FileStorageService;
   private readonly storageBasePath: string;
@@ -207,12 +212,11 @@ export class FileStorageService {
     const storagePath = `ofx/${companyId}/${yearMonth}/${filename}`;
 
     // Garantir que o bucket existe (usando nome fixo para Supabase como antes)
-    const supabaseBucket = 'ofx-files';
-    await this.ensureSupabaseBucketExists(supabaseBucket);
+    await this.ensureSupabaseBucketExists(SUPABASE_BUCKET);
 
     // Upload para o Supabase
     const { data, error } = await this.supabaseClient.storage
-      .from(supabaseBucket)
+      .from(SUPABASE_BUCKET)
       .upload(storagePath, buffer, {
         contentType: this.getMimeType(originalName),
         upsert: false
@@ -316,7 +320,25 @@ export class FileStorageService {
   }
 
   /**
-   * Lê um arquivo do storage (filesystem ou S3)
+   * Baixa um arquivo do bucket do Supabase
+   */
+  private async downloadFromSupabase(relativePath: string): Promise<Blob> {
+    if (!this.supabaseClient) {
+      throw new Error('Supabase client não inicializado');
+    }
+
+    const { data, error } = await this.supabaseClient.storage
+      .from(SUPABASE_BUCKET)
+      .download(relativePath);
+
+    if (error || !data) {
+      throw new Error(`Erro no download Supabase: ${error?.message || 'arquivo vazio'}`);
+    }
+    return data;
+  }
+
+  /**
+   * Lê um arquivo do storage (filesystem, Supabase ou S3)
    */
   async readFile(relativePath: string): Promise<Buffer | null> {
     try {
@@ -328,6 +350,9 @@ export class FileStorageService {
         const response = await this.s3Client.send(command);
         const body = await response.Body?.transformToByteArray();
         return body ? Buffer.from(body) : null;
+      } else if (this.provider === 'supabase') {
+        const blob = await this.downloadFromSupabase(relativePath);
+        return Buffer.from(await blob.arrayBuffer());
       } else {
         const fullPath = join(this.storageBasePath, relativePath);
         const fs = await import('fs/promises');
@@ -339,6 +364,33 @@ export class FileStorageService {
     }
   }
 
+  /**
+   * Abre um arquivo do storage como stream (sem carregá-lo inteiro em memória).
+   * No Supabase o download vem inteiro (Blob); o stream só percorre esse Blob
+   */
+  async openReadStream(relativePath: string): Promise<Readable | null> {
+    try {
+      if (this.provider === 's3' && this.s3Client) {
+        const command = new GetObjectCommand({
+          Bucket: this.bucketName,
+          Key: relativePath,
+        });
+        const response = await this.s3Client.send(command);
+        return (response.Body as Readable | undefined) ?? null;
+      } else if (this.provider === 'supabase') {
+        const blob = await this.downloadFromSupabase(relativePath);
+        return Readable.fromWeb(blob.stream() as import('stream/web').ReadableStream<Uint8Array>);
+      } else {
+        const fullPath = join(this.storageBasePath, relativePath);
+        await access(fullPath);
+        return createReadStream(fullPath);
+      }
+    } catch (error) {
+      console.error('❌ Erro ao abrir arquivo:', error);
+      return null;
+    }
+  }
+
   /**
    * Lê metadados de um arquivo (filesystem ou S3 simulado via metadata)
    */
@@ -136,18 +136,37 @@ export interface DREStatement {
 
   categories: DRECategory[];
   lineDetails?: {
-    grossRevenue: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    taxes: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    financialCosts: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    variableCosts: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    fixedCosts: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    nonOperationalRevenue: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    nonOperationalExpenses: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
-    unclassified: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; drilldown: unknown[] }>;
+    grossRevenue: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    taxes: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    financialCosts: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    variableCosts: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    fixedCosts: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    nonOperationalRevenue: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    nonOperationalExpenses: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
+    unclassified: Array<{ label: string; value: number; categoryGroup?: string | null; transactions: number; categoryId: string }>;
   };
+  // Intervalo efetivo do período (usado para buscar o drilldown sob demanda)
+  startDate?: string;
+  endDate?: string;
   generatedAt: string;
 }
 
+export interface DREDrilldownTransaction {
+  id: string;
+  date: string;
+  description: string;
+  category: string;
+  amount: number;
+  type: 'income' | 'expense';
+  bank?: string;
+}
+
+export interface DREDrilldownPage {
+  transactions: DREDrilldownTransaction[];
+  // Cursor opaco para a próxima página (null = fim)
+  nextCursor: string | null;
+}
+
 export interface DRECategory {
   id: string;
   name: string;
@@ -163,7 +182,6 @@ export interface DRECategory {
   subcategories: string[];
   growthRate: number;
   transactions?: number;
-  drilldown?: unknown[];
 }
 
 export interface DRELineItem {
@@ -0,0 +1,94 @@
+/**
+ * Script para aplicar migração da busca por similaridade de descrições
+ * Execute com: pnpm tsx scripts/apply-description-similarity-migration.ts
+ *
+ * - pg_trgm + financeai_normalize_description(text), espelho de
+ *   TransactionCategorizationService.normalizeDescription (conferido por
+ *   scripts/test-description-similarity.ts)
+ * - financeai_transactions.normalized_description (coluna gerada) com índice GIN de trigramas
+ * - índice GIN de trigramas em financeai_transaction_clusters.centroid_description
+ *
+ * A coluna gerada reescreve financeai_transactions: rodar fora do horário de uploads.
+ */
+
+import 'dotenv/config';
+import { db } from '../lib/db/drizzle';
+import { sql } from 'drizzle-orm';
+
+async function applyMigration() {
+  console.log('🔄 Iniciando migração de similaridade de descrições...\n');
+
+  try {
+    console.log('🧩 Habilitando extensão pg_trgm...');
+    await db.execute(sql`CREATE EXTENSION IF NOT EXISTS pg_trgm`);
+    console.log('✅ Extensão habilitada\n');
+
+    console.log('⚙️  Criando função financeai_normalize_description...');
+    await db.execute(sql.raw(`
+      CREATE OR REPLACE FUNCTION financeai_normalize_description(description text)
+      RETURNS text
+      LANGUAGE sql IMMUTABLE PARALLEL SAFE
+      AS $$
+        SELECT btrim(regexp_replace(
+          upper(regexp_replace(
+            regexp_replace(description, '[0-9]{6,}', '', 'g'),
+            '[^A-Za-z0-9\\s]', ' ', 'g'
+          )),
+          '\\s+', ' ', 'g'
+        ))
+      $$
+    `));
+    console.log('✅ Função criada\n');
+
+    // Bancos com a versão anterior da função (upper() e \d dependentes do locale):
+    // recalcula a coluna gerada só onde o valor gravado mudou (ex: ı, ſ viravam I, S)
+    const columnExists = await db.execute(sql`
+      SELECT 1 FROM information_schema.columns
+      WHERE table_name = 'financeai_transactions' AND column_name = 'normalized_description'
+    `);
+    if (columnExists.rows.length > 0) {
+      console.log('🔁 Recalculando normalized_description desatualizadas...');
+      const refreshed = await db.execute(sql`
+        UPDATE financeai_transactions SET description = description
+        WHERE normalized_description IS DISTINCT FROM financeai_normalize_description(description)
+      `);
+      console.log(`✅ ${refreshed.rowCount ?? 0} linha(s) recalculada(s)\n`);
+    }
+
+    console.log('📦 Adicionando coluna normalized_description em financeai_transactions...');
+    await db.execute(sql`
+      ALTER TABLE financeai_transactions
+        ADD COLUMN IF NOT EXISTS normalized_description text
+        GENERATED ALWAYS AS (financeai_normalize_description(description)) STORED
+    `);
+    console.log('✅ Coluna adicionada\n');
+
+    console.log('📑 Criando índice idx_transactions_normalized_description_trgm...');
+    await db.execute(sql`
+      CREATE INDEX IF NOT EXISTS idx_transactions_normalized_description_trgm
+      ON financeai_transactions USING gin (normalized_description gin_trgm_ops)
+    `);
+    console.log('✅ Índice criado\n');
+
+    console.log('📑 Criando índice idx_transaction_clusters_centroid_trgm...');
+    await db.execute(sql`
+      CREATE INDEX IF NOT EXISTS idx_transaction_clusters_centroid_trgm
+      ON financeai_transaction_clusters USING gin (centroid_description gin_trgm_ops)
+    `);
+    console.log('✅ Índice criado\n');
+
+    const check = await db.execute(sql`
+      SELECT financeai_normalize_description('PIX ENVIADO - João 12345678 / LJ 02') AS normalized
+    `);
+    console.log(`🔎 Verificação: "${(check.rows[0] as { normalized: string }).normalized}"\n`);
+
+    console.log('✅ Migração concluída com sucesso!');
+  } catch (error) {
+    console.error('\n❌ Erro durante a migração:', error);
+    process.exit(1);
+  }
+
+  process.exit(0);
+}
+
+applyMigration();
@@ -0,0 +1,334 @@
+/**
+ * Script para aplicar migração dos agregados mensais de transações
+ * Execute com: pnpm tsx scripts/apply-monthly-aggregates-migration.ts
+ *
+ * Cria financeai_transaction_monthly_aggregates (empresa × conta × categoria ×
+ * mês × tipo) e os triggers que a mantêm:
+ * - INSERT em transações: soma incremental (delta) no bucket
+ * - UPDATE/DELETE em transações e qualquer mudança em splits: recálculo do
+ *   bucket (conta × mês) afetado, já que splits substituem categoria/valor
+ * Os triggers são por statement (transition tables), então um bulk insert de
+ * um batch vira uma atualização por bucket, não por linha.
+ * Idempotente: pode ser reexecutado para recriar funções e refazer o backfill.
+ */
+
+import 'dotenv/config';
+import { db } from '../lib/db/drizzle';
+import { sql } from 'drizzle-orm';
+import { BALANCE_SNAPSHOT_PATTERNS } from '../lib/services/financial-exclusion';
+
+async function applyMigration() {
+  console.log('🔄 Iniciando migração dos agregados mensais...\n');
+
+  try {
+    console.log('📦 Criando tabela financeai_transaction_monthly_aggregates...');
+    await db.execute(sql`
+      CREATE TABLE IF NOT EXISTS financeai_transaction_monthly_aggregates (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        company_id uuid REFERENCES financeai_companies(id) ON DELETE CASCADE,
+        account_id uuid NOT NULL REFERENCES financeai_accounts(id) ON DELETE CASCADE,
+        category_id uuid,
+        month date NOT NULL,
+        type varchar(10) NOT NULL,
+        balance_snapshot boolean NOT NULL DEFAULT false,
+        total_amount numeric(18, 2) NOT NULL DEFAULT 0,
+        abs_amount numeric(18, 2) NOT NULL DEFAULT 0,
+        transaction_count integer NOT NULL DEFAULT 0,
+        updated_at timestamp DEFAULT now()
+      )
+    `);
+    await db.execute(sql`
+      CREATE INDEX IF NOT EXISTS idx_monthly_aggregates_company_month
+      ON financeai_transaction_monthly_aggregates (company_id, month)
+    `);
+    await db.execute(sql`
+      CREATE INDEX IF NOT EXISTS idx_monthly_aggregates_account_month
+      ON financeai_transaction_monthly_aggregates (account_id, month)
+    `);
+    console.log('✅ Tabela e índices criados\n');
+
+    // Mesmos padrões de getTransactionDescriptionExclusionClause()
+    const patterns = BALANCE_SNAPSHOT_PATTERNS
+      .map(pattern => `'${pattern.replace(/'/g, "''")}'`)
+      .join(', ');
+
+    console.log('🔧 Criando funções de manutenção...');
+    await db.execute(sql.raw(`
+      CREATE OR REPLACE FUNCTION financeai_is_balance_snapshot(p_description text)
+      RETURNS boolean LANGUAGE sql IMMUTABLE AS $$
+        SELECT COALESCE(p_description ILIKE ANY (ARRAY[${patterns}]), false)
+      $$
+    `));
+
+    // Lock por bucket (conta × mês): serializa deltas e recálculos concorrentes
+    await db.execute(sql`
+      CREATE OR REPLACE FUNCTION financeai_lock_monthly_aggregate(p_account_id uuid, p_month date)
+      RETURNS void LANGUAGE sql AS $$
+        SELECT pg_advisory_xact_lock(
+          hashtext('financeai_monthly_aggregates'),
+          hashtext(p_account_id::text || ':' || p_month::text)
+        )
+      $$
+    `);
+
+    await db.execute(sql`
+      CREATE OR REPLACE FUNCTION financeai_apply_monthly_aggregate_delta(
+        p_account_id uuid, p_month date, p_category_id uuid, p_type varchar,
+        p_balance_snapshot boolean, p_total numeric, p_abs numeric, p_count integer
+      )
+      RETURNS void LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+      BEGIN
+        PERFORM financeai_lock_monthly_aggregate(p_account_id, p_month);
+
+        UPDATE financeai_transaction_monthly_aggregates
+        SET total_amount = total_amount + p_total,
+            abs_amount = abs_amount + p_abs,
+            transaction_count = transaction_count + p_count,
+            updated_at = now()
+        WHERE account_id = p_account_id
+          AND month = p_month
+          AND category_id IS NOT DISTINCT FROM p_category_id
+          AND type = p_type
+          AND balance_snapshot = p_balance_snapshot;
+
+        IF NOT FOUND THEN
+          INSERT INTO financeai_transaction_monthly_aggregates
+            (company_id, account_id, category_id, month, type, balance_snapshot,
+             total_amount, abs_amount, transaction_count)
+          SELECT a.company_id, p_account_id, p_category_id, p_month, p_type, p_balance_snapshot,
+                 p_total, p_abs, p_count
+          FROM financeai_accounts a
+          WHERE a.id = p_account_id;
+        END IF;
+      END
+      $$
+    `);
+
+    await db.execute(sql`
+      CREATE OR REPLACE FUNCTION financeai_refresh_monthly_aggregate(p_account_id uuid, p_month date)
+      RETURNS void LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+      BEGIN
+        PERFORM financeai_lock_monthly_aggregate(p_account_id, p_month);
+
+        DELETE FROM financeai_transaction_monthly_aggregates
+        WHERE account_id = p_account_id AND month = p_month;
+
+        INSERT INTO financeai_transaction_monthly_aggregates
+          (company_id, account_id, category_id, month, type, balance_snapshot,
+           total_amount, abs_amount, transaction_count)
+        SELECT a.company_id, p_account_id, c.category_id, p_month, c.type, c.balance_snapshot,
+               SUM(c.amount), SUM(ABS(c.amount)), COUNT(*)
+        FROM (
+          -- Transações que NÃO possuem desmembramentos
+          SELECT t.category_id, t.amount, t.type,
+                 financeai_is_balance_snapshot(t.description) AS balance_snapshot
+          FROM financeai_transactions t
+          WHERE t.account_id = p_account_id
+            AND t.transaction_date >= p_month
+            AND t.transaction_date < (p_month + interval '1 month')
+            AND NOT EXISTS (SELECT 1 FROM financeai_transaction_splits s WHERE s.transaction_id = t.id)
+
+          UNION ALL
+
+          -- Desmembramentos individuais (tipo e descrição da transação original, como no DRE)
+          SELECT s.category_id, s.amount, t.type,
+                 financeai_is_balance_snapshot(t.description)
+          FROM financeai_transaction_splits s
+          JOIN financeai_transactions t ON t.id = s.transaction_id
+          WHERE t.account_id = p_account_id
+            AND t.transaction_date >= p_month
+            AND t.transaction_date < (p_month + interval '1 month')
+        ) c
+        JOIN financeai_accounts a ON a.id = p_account_id
+        GROUP BY a.company_id, c.category_id, c.type, c.balance_snapshot;
+      END
+      $$
+    `);
+    console.log('✅ Funções criadas\n');
+
+    console.log('⚡ Criando triggers...');
+    await db.execute(sql`
+      CREATE OR REPLACE FUNCTION financeai_transactions_aggregates_trigger()
+      RETURNS trigger LANGUAGE plpgsql AS $$
+      DECLARE
+        r record;
+      BEGIN
+        IF TG_OP = 'INSERT' THEN
+          -- Transação nova ainda não tem splits: delta direto
+          FOR r IN
+            SELECT account_id, date_trunc('month', transaction_date)::date AS month,
+                   category_id, type, financeai_is_balance_snapshot(description) AS balance_snapshot,
+                   SUM(amount) AS total, SUM(ABS(amount)) AS abs_total, COUNT(*)::int AS n
+            FROM new_rows
+            WHERE account_id IS NOT NULL
+            GROUP BY 1, 2, 3, 4, 5
+            ORDER BY 1, 2
+          LOOP
+            PERFORM financeai_apply_monthly_aggregate_delta(
+              r.account_id, r.month, r.category_id, r.type, r.balance_snapshot, r.total, r.abs_total, r.n
+            );
+          END LOOP;
+
+        ELSIF TG_OP = 'UPDATE' THEN
+          -- Só buckets de linhas em que algo relevante mudou (needs_review, verified etc. não contam)
+          FOR r IN
+            SELECT account_id, month FROM (
+              SELECT o.account_id, date_trunc('month', o.transaction_date)::date AS month
+              FROM old_rows o JOIN new_rows n ON n.id = o.id
+              WHERE (o.account_id, o.category_id, o.amount, o.type, o.transaction_date, o.description)
+                IS DISTINCT FROM (n.account_id, n.category_id, n.amount, n.type, n.transaction_date, n.description)
+              UNION
+              SELECT n.account_id, date_trunc('month', n.transaction_date)::date
+              FROM old_rows o JOIN new_rows n ON n.id = o.id
+              WHERE (o.account_id, o.category_id, o.amount, o.type, o.transaction_date, o.description)
+                IS DISTINCT FROM (n.account_id, n.category_id, n.amount, n.type, n.transaction_date, n.description)
+            ) b
+            WHERE account_id IS NOT NULL
+            ORDER BY 1, 2
+          LOOP
+            PERFORM financeai_refresh_monthly_aggregate(r.account_id, r.month);
+          END LOOP;
+
+        ELSIF TG_OP = 'DELETE' THEN
+          FOR r IN
+            SELECT DISTINCT account_id, date_trunc('month', transaction_date)::date AS month
+            FROM old_rows
+            WHERE account_id IS NOT NULL
+            ORDER BY 1, 2
+          LOOP
+            PERFORM financeai_refresh_monthly_aggregate(r.account_id, r.month);
+          END LOOP;
+
+        ELSIF TG_OP = 'TRUNCATE' THEN
+          TRUNCATE financeai_transaction_monthly_aggregates;
+        END IF;
+
+        RETURN NULL;
+      END
+      $$
+    `);
+
+    await db.execute(sql`
+      CREATE OR REPLACE FUNCTION financeai_splits_aggregates_trigger()
+      RETURNS trigger LANGUAGE plpgsql AS $$
+      DECLARE
+        r record;
+      BEGIN
+        IF TG_OP = 'INSERT' THEN
+          FOR r IN
+            SELECT DISTINCT t.account_id, date_trunc('month', t.transaction_date)::date AS month
+            FROM new_rows s JOIN financeai_transactions t ON t.id = s.transaction_id
+            WHERE t.account_id IS NOT NULL
+            ORDER BY 1, 2
+          LOOP
+            PERFORM financeai_refresh_monthly_aggregate(r.account_id, r.month);
+          END LOOP;
+
+        ELSIF TG_OP = 'UPDATE' THEN
+          FOR r IN
+            SELECT t.account_id, date_trunc('month', t.transaction_date)::date AS month
+            FROM new_rows s JOIN financeai_transactions t ON t.id = s.transaction_id
+            WHERE t.account_id IS NOT NULL
+            UNION
+            SELECT t.account_id, date_trunc('month', t.transaction_date)::date
+            FROM old_rows s JOIN financeai_transactions t ON t.id = s.transaction_id
+            WHERE t.account_id IS NOT NULL
+            ORDER BY 1, 2
+          LOOP
+            PERFORM financeai_refresh_monthly_aggregate(r.account_id, r.month);
+          END LOOP;
+
+        ELSE
+          -- DELETE (inclusive cascata da transação: aí o JOIN não acha nada e
+          -- o trigger da própria transação cuida do bucket)
+          FOR r IN
+            SELECT DISTINCT t.account_id, date_trunc('month', t.transaction_date)::date AS month
+            FROM old_rows s JOIN financeai_transactions t ON t.id = s.transaction_id
+            WHERE t.account_id IS NOT NULL
+            ORDER BY 1, 2
+          LOOP
+            PERFORM financeai_refresh_monthly_aggregate(r.account_id, r.month);
+          END LOOP;
+        END IF;
+
+        RETURN NULL;
+      END
+      $$
+    `);
+
+    // Transition tables exigem um trigger por evento
+    await db.execute(sql.raw(`
+      DROP TRIGGER IF EXISTS trg_transactions_aggregates_insert ON financeai_transactions;
+      DROP TRIGGER IF EXISTS trg_transactions_aggregates_update ON financeai_transactions;
+      DROP TRIGGER IF EXISTS trg_transactions_aggregates_delete ON financeai_transactions;
+      DROP TRIGGER IF EXISTS trg_transactions_aggregates_truncate ON financeai_transactions;
+      DROP TRIGGER IF EXISTS trg_splits_aggregates_insert ON financeai_transaction_splits;
+      DROP TRIGGER IF EXISTS trg_splits_aggregates_update ON financeai_transaction_splits;
+      DROP TRIGGER IF EXISTS trg_splits_aggregates_delete ON financeai_transaction_splits;
+
+      CREATE TRIGGER trg_transactions_aggregates_insert
+        AFTER INSERT ON financeai_transactions
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_transactions_aggregates_trigger();
+      CREATE TRIGGER trg_transactions_aggregates_update
+        AFTER UPDATE ON financeai_transactions
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_transactions_aggregates_trigger();
+      CREATE TRIGGER trg_transactions_aggregates_delete
+        AFTER DELETE ON financeai_transactions
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_transactions_aggregates_trigger();
+      CREATE TRIGGER trg_transactions_aggregates_truncate
+        AFTER TRUNCATE ON financeai_transactions
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_transactions_aggregates_trigger();
+
+      CREATE TRIGGER trg_splits_aggregates_insert
+        AFTER INSERT ON financeai_transaction_splits
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_splits_aggregates_trigger();
+      CREATE TRIGGER trg_splits_aggregates_update
+        AFTER UPDATE ON financeai_transaction_splits
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_splits_aggregates_trigger();
+      CREATE TRIGGER trg_splits_aggregates_delete
+        AFTER DELETE ON financeai_transaction_splits
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION financeai_splits_aggregates_trigger();
+    `));
+    console.log('✅ Triggers criados\n');
+
+    console.log('📊 Recalculando agregados a partir das transações existentes...');
+    await db.execute(sql`TRUNCATE financeai_transaction_monthly_aggregates`);
+    const buckets = await db.execute(sql`
+      SELECT count(DISTINCT (account_id, date_trunc('month', transaction_date)))::int AS n
+      FROM financeai_transactions
+      WHERE account_id IS NOT NULL
+    `);
+    await db.execute(sql`
+      DO $$
+      DECLARE
+        r record;
+      BEGIN
+        FOR r IN
+          SELECT DISTINCT account_id, date_trunc('month', transaction_date)::date AS month
+          FROM financeai_transactions
+          WHERE account_id IS NOT NULL
+          ORDER BY 1, 2
+        LOOP
+          PERFORM financeai_refresh_monthly_aggregate(r.account_id, r.month);
+        END LOOP;
+      END
+      $$
+    `);
+    console.log(`✅ ${buckets.rows[0]?.n ?? 0} buckets (conta × mês) recalculados\n`);
+
+    console.log('✅ Migração concluída com sucesso!');
+  } catch (error) {
+    console.error('\n❌ Erro durante a migração:', error);
+    process.exit(1);
+  }
+
+  process.exit(0);
+}
+
+applyMigration();
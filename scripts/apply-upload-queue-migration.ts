@@ -0,0 +1,69 @@
+/**
+ * Script para aplicar migração da fila de uploads assíncronos
+ * Execute com: pnpm tsx scripts/apply-upload-queue-migration.ts
+ *
+ * - colunas de fila em financeai_uploads + idx_uploads_queue
+ * - índice único (upload_id, batch_number) em financeai_processing_batches,
+ *   depois de remover duplicatas (mantém o batch concluído mais recente)
+ */
+
+import 'dotenv/config';
+import { db } from '../lib/db/drizzle';
+import { sql } from 'drizzle-orm';
+
+async function applyMigration() {
+  console.log('🔄 Iniciando migração da fila de uploads...\n');
+
+  try {
+    console.log('📦 Adicionando colunas de fila em financeai_uploads...');
+    await db.execute(sql`
+      ALTER TABLE financeai_uploads
+        ADD COLUMN IF NOT EXISTS queued_at timestamp,
+        ADD COLUMN IF NOT EXISTS worker_id varchar(100),
+        ADD COLUMN IF NOT EXISTS heartbeat_at timestamp,
+        ADD COLUMN IF NOT EXISTS attempts integer DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS next_attempt_at timestamp
+    `);
+    console.log('✅ Colunas adicionadas\n');
+
+    console.log('📑 Criando índice idx_uploads_queue...');
+    await db.execute(sql`
+      CREATE INDEX IF NOT EXISTS idx_uploads_queue
+      ON financeai_uploads (status, queued_at)
+    `);
+    console.log('✅ Índice criado\n');
+
+    console.log('🧹 Removendo processing batches duplicados...');
+    const duplicates = await db.execute(sql`
+      DELETE FROM financeai_processing_batches
+      WHERE id IN (
+        SELECT id FROM (
+          SELECT id, row_number() OVER (
+            PARTITION BY upload_id, batch_number
+            ORDER BY (status = 'completed') DESC, completed_at DESC NULLS LAST, created_at DESC
+          ) AS position
+          FROM financeai_processing_batches
+          WHERE upload_id IS NOT NULL
+        ) ranked
+        WHERE position > 1
+      )
+    `);
+    console.log(`✅ ${duplicates.rowCount ?? 0} duplicado(s) removido(s)\n`);
+
+    console.log('📑 Criando índice único idx_processing_batches_upload_batch...');
+    await db.execute(sql`
+      CREATE UNIQUE INDEX IF NOT EXISTS idx_processing_batches_upload_batch
+      ON financeai_processing_batches (upload_id, batch_number)
+    `);
+    console.log('✅ Índice criado\n');
+
+    console.log('✅ Migração concluída com sucesso!');
+  } catch (error) {
+    console.error('\n❌ Erro durante a migração:', error);
+    process.exit(1);
+  }
+
+  process.exit(0);
+}
+
+applyMigration();
@@ -0,0 +1,259 @@
+/**
+ * Benchmark: pipeline de upload (categorização + gravação) contra Postgres local
+ *
+ * Reproduz os .ofx de exemplo do repositório pelo mesmo caminho do worker de
+ * uploads (OFXStreamReader → BatchProcessingService.processTransactionStream)
+ * e imprime transações/s, razões de acerto por camada e latência por etapa,
+ * lidas das métricas gravadas nos processing batches (getUploadMetrics).
+ *
+ * A IA é substituída por um stub determinístico (sem rede e sem custo) com
+ * latência configurável. O stub ocupa o lugar do adapter inteiro, então
+ * enriquecimento e pesquisa de empresa não entram na medição.
+ *
+ * Os dados vão para uma empresa descartável, com categorias e regras copiadas
+ * de BENCH_SOURCE_COMPANY_ID (padrão: a empresa com mais categorias). A empresa
+ * é removida no final, com tudo o que depende dela.
+ *
+ * Uso: npx tsx scripts/bench-categorization-pipeline.ts [latenciaIAms=150] [--cold-cache] [--keep]
+ */
+
+process.env.LOG_LEVEL ??= 'silent';
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+
+import fs from 'fs';
+import path from 'path';
+import { sql } from 'drizzle-orm';
+import type {
+  AICategorizationService,
+  TransactionContext
+} from '@/lib/services/transaction-categorization.service';
+import type { UploadMetrics } from '@/lib/services/batch-processing.service';
+import type { PipelineStage } from '@/lib/services/categorization-metrics';
+
+const args = process.argv.slice(2);
+const AI_LATENCY_MS = parseInt(args.find(a => !a.startsWith('--')) || '150', 10);
+const COLD_CACHE = args.includes('--cold-cache');
+const KEEP_DATA = args.includes('--keep');
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+function sampleFiles(): string[] {
+  return [
+    ...fs.readdirSync('.').filter(f => f.endsWith('.ofx')),
+    ...fs.readdirSync('ofx-extratos-ago2023').map(f => path.join('ofx-extratos-ago2023', f))
+  ];
+}
+
+/**
+ * IA de mentira: escolhe sempre a mesma categoria para a mesma descrição,
+ * entre as categorias do tipo da transação
+ */
+class StubAIProvider implements AICategorizationService {
+  calls = 0;
+
+  constructor(
+    private readonly latencyMs: number,
+    private readonly categoryNames: { credit: string[]; debit: string[] }
+  ) {}
+
+  async categorize(context: TransactionContext & { companyId: string }) {
+    this.calls++;
+    if (this.latencyMs > 0) await sleep(this.latencyMs);
+
+    const names = (context.amount ?? 0) >= 0 ? this.categoryNames.credit : this.categoryNames.debit;
+    let hash = 0;
+    for (const char of context.description.toUpperCase()) {
+      hash = (hash * 31 + char.charCodeAt(0)) >>> 0;
+    }
+
+    return {
+      category: names[hash % names.length],
+      confidence: 0.9,
+      reasoning: 'Stub de benchmark',
+      modelUsed: 'bench-stub'
+    };
+  }
+}
+
+async function runBenchmark() {
+  const { db } = await import('@/lib/db/drizzle');
+  const { companies, accounts, uploads } = await import('@/lib/db/schema');
+  const { OFXStreamReader } = await import('@/lib/ofx-parser');
+  const { default: batchService } = await import('@/lib/services/batch-processing.service');
+  const { TransactionCategorizationService } = await import('@/lib/services/transaction-categorization.service');
+  const { default: categoryCacheService } = await import('@/lib/services/category-cache.service');
+
+  // Empresa de origem das categorias/regras
+  const sourceCompanyId = process.env.BENCH_SOURCE_COMPANY_ID || (await db.execute(sql`
+    SELECT company_id FROM financeai_categories
+    WHERE company_id IS NOT NULL AND active = true
+    GROUP BY company_id ORDER BY count(*) DESC LIMIT 1
+  `)).rows[0]?.company_id as string | undefined;
+
+  if (!sourceCompanyId) {
+    throw new Error('Nenhuma empresa com categorias encontrada (rode o seed ou defina BENCH_SOURCE_COMPANY_ID)');
+  }
+
+  const [company] = await db.insert(companies)
+    .values({ name: `Benchmark ${new Date().toISOString()}` })
+    .returning({ id: companies.id });
+  const companyId = company.id;
+
+  try {
+    const [account] = await db.insert(accounts)
+      .values({ companyId, name: 'Conta Benchmark', bankName: 'Benchmark', bankCode: '000', accountNumber: '0' })
+      .returning({ id: accounts.id });
+
+    await db.execute(sql`
+      INSERT INTO financeai_categories (company_id, name, description, type, parent_type, color_hex, category_group, dre_group, icon, is_system, is_ignored, active)
+      SELECT ${companyId}, name, description, type, parent_type, color_hex, category_group, dre_group, icon, is_system, is_ignored, active
+      FROM financeai_categories
+      WHERE company_id = ${sourceCompanyId}
+    `);
+
+    const copiedRules = await db.execute(sql`
+      INSERT INTO financeai_category_rules (category_id, company_id, rule_pattern, rule_type, confidence_score, active, source_type, match_fields, status)
+      SELECT target.id, ${companyId}, r.rule_pattern, r.rule_type, r.confidence_score, r.active, r.source_type, r.match_fields, r.status
+      FROM financeai_category_rules r
+      JOIN financeai_categories source ON source.id = r.category_id
+      JOIN financeai_categories target ON target.company_id = ${companyId} AND target.name = source.name
+      WHERE r.company_id = ${sourceCompanyId} AND r.active = true
+    `);
+
+    const categoryRows = (await db.execute(sql`
+      SELECT name, type, dre_group FROM financeai_categories
+      WHERE company_id = ${companyId} AND active = true AND COALESCE(is_ignored, false) = false
+    `)).rows as Array<{ name: string; type: string; dre_group: string | null }>;
+
+    const isCredit = (c: { type: string; dre_group: string | null }) =>
+      c.type === 'revenue' || c.dre_group === 'RoB' || c.dre_group === 'RNOP';
+    const stub = new StubAIProvider(AI_LATENCY_MS, {
+      credit: categoryRows.filter(isCredit).map(c => c.name),
+      debit: categoryRows.filter(c => !isCredit(c)).map(c => c.name)
+    });
+
+    // O BatchProcessingService injeta o adapter real ao ser instanciado: sobrescrever depois
+    TransactionCategorizationService.setAIService(stub);
+
+    console.log('--- Benchmark: pipeline de categorização ---\n');
+    console.log(`Categorias: ${categoryRows.length} | Regras: ${copiedRules.rowCount ?? 0} | Latência da IA (stub): ${AI_LATENCY_MS}ms | Cache: ${COLD_CACHE ? 'frio por arquivo' : 'compartilhado'}\n`);
+    console.log(
+      'Arquivo'.padEnd(44) + 'Tx'.padStart(7) + 'Tempo'.padStart(10) + 'Tx/s'.padStart(9) +
+      'Cache'.padStart(8) + 'Regra'.padStart(8) + 'Hist'.padStart(8) + 'IA'.padStart(8) +
+      'Q/tx'.padStart(7) + 'p95 total'.padStart(11)
+    );
+
+    const percent = (value: number) => `${(value * 100).toFixed(0)}%`;
+    const results: UploadMetrics[] = [];
+    let totalTransactions = 0;
+    let totalSeconds = 0;
+
+    for (const file of sampleFiles()) {
+      if (COLD_CACHE) categoryCacheService.clear();
+
+      // Pré-contagem (fora da medição), como a rota de upload faz
+      let count = 0;
+      for await (const _ of new OFXStreamReader(fs.createReadStream(file))) count++;
+
+      const [upload] = await db.insert(uploads)
+        .values({
+          companyId,
+          accountId: account.id,
+          filename: path.basename(file),
+          originalName: path.basename(file),
+          fileType: 'ofx',
+          fileSize: fs.statSync(file).size,
+          filePath: file,
+          status: 'processing',
+          totalTransactions: count
+        })
+        .returning({ id: uploads.id });
+
+      const start = process.hrtime.bigint();
+
+      await batchService.prepareUploadForBatchProcessing(upload.id, count);
+      const reader = new OFXStreamReader(fs.createReadStream(file));
+      const source = (async function* () {
+        for await (const tx of reader) {
+          yield {
+            description: tx.description,
+            memo: tx.memo,
+            amount: tx.amount,
+            date: tx.date,
+            fitid: tx.fitid,
+            balance: tx.balance
+          };
+        }
+      })();
+      const result = await batchService.processTransactionStream(upload.id, source, account.id, {
+        fileName: path.basename(file),
+        companyId
+      });
+      await batchService.completeUpload(upload.id, {
+        successful: result.success,
+        failed: result.failed,
+        totalTime: Number(process.hrtime.bigint() - start) / 1e6
+      });
+
+      const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+      const metrics = await batchService.getUploadMetrics(upload.id, companyId);
+      if (!metrics) throw new Error(`Métricas do upload ${upload.id} não encontradas`);
+      results.push(metrics);
+      totalTransactions += result.total;
+      totalSeconds += seconds;
+
+      const { hitRatios, latencySummary, dbQueriesPerTransaction } = metrics.pipeline;
+      console.log(
+        path.basename(file).slice(0, 42).padEnd(44) +
+        String(result.total).padStart(7) +
+        `${seconds.toFixed(2)}s`.padStart(10) +
+        Math.round(result.total / seconds).toLocaleString().padStart(9) +
+        percent(hitRatios.cache).padStart(8) +
+        percent(hitRatios.rules).padStart(8) +
+        percent(hitRatios.history).padStart(8) +
+        percent(hitRatios.ai).padStart(8) +
+        dbQueriesPerTransaction.toFixed(1).padStart(7) +
+        `${latencySummary.total?.p95Ms ?? 0}ms`.padStart(11)
+      );
+    }
+
+    // Latência por etapa somando todos os arquivos
+    const { CategorizationMetrics } = await import('@/lib/services/categorization-metrics');
+    const overall = CategorizationMetrics.summarize(
+      CategorizationMetrics.merge(results.map(r => r.pipeline))
+    );
+
+    console.log('\nEtapa'.padEnd(16) + 'Chamadas'.padStart(10) + 'Acertos'.padStart(10) + 'Média'.padStart(10) + 'p50'.padStart(10) + 'p95'.padStart(10) + 'Máx'.padStart(11));
+    for (const [stage, latency] of Object.entries(overall.latencySummary) as [PipelineStage, { avgMs: number; p50Ms: number; p95Ms: number; maxMs: number }][]) {
+      const stats = overall.stages[stage];
+      console.log(
+        stage.padEnd(15) +
+        String(overall.latency[stage]?.count ?? 0).padStart(10) +
+        String(stats?.hits ?? '-').padStart(10) +
+        `${latency.avgMs}ms`.padStart(10) +
+        `${latency.p50Ms}ms`.padStart(10) +
+        `${latency.p95Ms}ms`.padStart(10) +
+        `${latency.maxMs}ms`.padStart(11)
+      );
+    }
+
+    console.log(`\nQueries por tipo: ${JSON.stringify(overall.dbQueries)}`);
+    console.log(`Chamadas à IA (stub): ${stub.calls}`);
+    console.log(`\n✅ ${totalTransactions} transações em ${totalSeconds.toFixed(2)}s → ${Math.round(totalTransactions / totalSeconds).toLocaleString()} tx/s`);
+  } finally {
+    if (KEEP_DATA) {
+      console.log(`\nDados mantidos na empresa ${companyId}`);
+    } else {
+      await db.execute(sql`DELETE FROM financeai_companies WHERE id = ${companyId}`);
+    }
+  }
+}
+
+runBenchmark()
+  .then(() => process.exit(0))
+  .catch(err => {
+    console.error(err);
+    process.exit(1);
+  });
@@ -0,0 +1,158 @@
+/**
+ * Benchmark: parseOFXFile (arquivo inteiro em string) vs OFXStreamReader
+ *
+ * Mede, para cada .ofx de exemplo do repositório e para um extrato sintético
+ * grande (blocos STMTTRN replicados), o pico de RSS e a vazão do parse.
+ * Cada medição roda num processo filho próprio, para que o maxRSS de uma
+ * não contamine a outra; a linha "baseline" é o RSS do runtime sem parse.
+ *
+ * Uso: npx tsx scripts/bench-ofx-stream.ts [tamanhoSinteticoMB=50]
+ */
+
+process.env.LOG_LEVEL ??= 'silent';
+
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { spawnSync } from 'child_process';
+
+type Mode = 'baseline' | 'string' | 'stream';
+
+interface Measurement {
+  mode: Mode;
+  transactions: number;
+  seconds: number;
+  maxRssMb: number;
+}
+
+const SYNTHETIC_MB = parseInt(process.argv[2] || '50', 10);
+
+function sampleFiles(): string[] {
+  return [
+    ...fs.readdirSync('.').filter(f => f.endsWith('.ofx')),
+    ...fs.readdirSync('ofx-extratos-ago2023').map(f => path.join('ofx-extratos-ago2023', f))
+  ];
+}
+
+/**
+ * Extrato grande: cabeçalho/rodapé de um arquivo real com os blocos de
+ * transação repetidos até o tamanho pedido (FITIDs únicos)
+ */
+function buildSyntheticFile(templatePath: string, targetMb: number): string {
+  const template = fs.readFileSync(templatePath, 'utf-8');
+  const blocks = template.match(/<STMTTRN>[\s\S]*?<\/STMTTRN>/gi) || [];
+  const first = template.search(/<STMTTRN>/i);
+  const last = template.lastIndexOf(blocks[blocks.length - 1]) + blocks[blocks.length - 1].length;
+
+  const target = path.join(os.tmpdir(), `bench-ofx-${targetMb}mb.ofx`);
+  const out = fs.openSync(target, 'w');
+  fs.writeSync(out, template.slice(0, first));
+
+  let written = 0;
+  let copy = 0;
+  while (written < targetMb * 1024 * 1024) {
+    const chunk = blocks
+      .map(block => block.replace(/<FITID>([^<\r\n]+)/i, (_, fitid) => `<FITID>${fitid.trim()}-${copy}`))
+      .join('\n');
+    fs.writeSync(out, chunk + '\n');
+    written += Buffer.byteLength(chunk);
+    copy++;
+  }
+
+  fs.writeSync(out, template.slice(last));
+  fs.closeSync(out);
+  return target;
+}
+
+/**
+ * Processo filho: executa um modo sobre um arquivo e imprime a medição em JSON
+ */
+async function runChild(mode: Mode, file: string) {
+  const { parseOFXFile, OFXStreamReader } = await import('@/lib/ofx-parser');
+
+  const start = process.hrtime.bigint();
+  let transactions = 0;
+
+  if (mode === 'string') {
+    const content = fs.readFileSync(file).toString('utf-8');
+    const result = await parseOFXFile(content);
+    transactions = result.transactions.length;
+  } else if (mode === 'stream') {
+    const reader = new OFXStreamReader(fs.createReadStream(file));
+    for await (const _ of reader) transactions++;
+  }
+
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+  const measurement: Measurement = {
+    mode,
+    transactions,
+    seconds,
+    maxRssMb: process.resourceUsage().maxRSS / 1024
+  };
+  process.stdout.write(JSON.stringify(measurement));
+}
+
+function measure(mode: Mode, file: string): Measurement {
+  const child = spawnSync(
+    process.execPath,
+    [...process.execArgv, process.argv[1], '--child', mode, file],
+    { encoding: 'utf-8', env: { ...process.env, LOG_LEVEL: 'silent' }, maxBuffer: 1024 * 1024 }
+  );
+  if (child.status !== 0) {
+    throw new Error(`Falha no processo filho (${mode}, ${file}): ${child.stderr}`);
+  }
+  return JSON.parse(child.stdout.trim().split('\n').pop()!);
+}
+
+async function runBenchmark() {
+  const files = sampleFiles();
+  const largest = files.reduce((a, b) => (fs.statSync(a).size >= fs.statSync(b).size ? a : b));
+  const synthetic = buildSyntheticFile(largest, SYNTHETIC_MB);
+
+  const baseline = measure('baseline', synthetic);
+
+  console.log('--- Benchmark: OFX string vs streaming ---\n');
+  console.log(`Baseline do runtime: ${baseline.maxRssMb.toFixed(1)} MB RSS\n`);
+  console.log(
+    'Arquivo'.padEnd(44) + 'Tamanho'.padStart(10) + 'Modo'.padStart(8) +
+    'Tx'.padStart(9) + 'Tempo'.padStart(10) + 'MB/s'.padStart(9) + 'Tx/s'.padStart(11) + 'Pico RSS'.padStart(11)
+  );
+
+  let mismatches = 0;
+  for (const file of [...files, synthetic]) {
+    const sizeMb = fs.statSync(file).size / (1024 * 1024);
+    const results = [measure('string', file), measure('stream', file)];
+
+    for (const r of results) {
+      console.log(
+        path.basename(file).slice(0, 42).padEnd(44) +
+        `${sizeMb.toFixed(2)} MB`.padStart(10) +
+        r.mode.padStart(8) +
+        String(r.transactions).padStart(9) +
+        `${r.seconds.toFixed(3)}s`.padStart(10) +
+        (sizeMb / r.seconds).toFixed(1).padStart(9) +
+        Math.round(r.transactions / r.seconds).toLocaleString().padStart(11) +
+        `${r.maxRssMb.toFixed(1)} MB`.padStart(11)
+      );
+    }
+
+    if (results[0].transactions !== results[1].transactions) mismatches++;
+  }
+
+  fs.unlinkSync(synthetic);
+
+  console.log(mismatches === 0 ? '\n✅ Mesma quantidade de transações nos dois modos' : `\n❌ ${mismatches} arquivos divergentes`);
+  if (mismatches > 0) process.exitCode = 1;
+}
+
+if (process.argv[2] === '--child') {
+  runChild(process.argv[3] as Mode, process.argv[4]).catch(err => {
+    console.error(err);
+    process.exit(1);
+  });
+} else {
+  runBenchmark().catch(err => {
+    console.error(err);
+    process.exit(1);
+  });
+}
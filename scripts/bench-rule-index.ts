@@ -0,0 +1,135 @@
+/**
+ * Benchmark: Índice compilado de regras vs avaliação linear
+ *
+ * Compara o caminho antigo (RuleScoringService.findBestMatch sobre todas as
+ * regras, com RegExp recompilado por transação) com o CompiledRuleIndex.
+ * Usa as descrições dos .ofx de exemplo do repositório e gera regras
+ * sintéticas (contains, exact, wildcard, regex, tokens) a partir delas.
+ * Não acessa o banco.
+ *
+ * Uso: npx tsx scripts/bench-rule-index.ts [numRegras=300] [iteracoes=5]
+ */
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+// O serviço importa a conexão (pool lazy); o benchmark não faz queries.
+process.env.DATABASE_URL ??= 'postgres://bench@localhost/bench';
+
+import fs from 'fs';
+import path from 'path';
+import type { CategoryRule, Category } from '@/lib/db/schema';
+import type { TransactionContext } from '@/lib/services/rule-scoring.service';
+
+const NUM_RULES = parseInt(process.argv[2] || '300', 10);
+const ITERATIONS = parseInt(process.argv[3] || '5', 10);
+
+function loadSampleDescriptions(): string[] {
+  const files = [
+    ...fs.readdirSync('.').filter(f => f.endsWith('.ofx')),
+    ...fs.readdirSync('ofx-extratos-ago2023').map(f => path.join('ofx-extratos-ago2023', f))
+  ];
+
+  const descriptions: string[] = [];
+  for (const file of files) {
+    const content = fs.readFileSync(file, 'latin1');
+    for (const match of content.matchAll(/<MEMO>([^<\r\n]+)/g)) {
+      descriptions.push(match[1].trim());
+    }
+  }
+  return descriptions;
+}
+
+function buildRules(descriptions: string[], count: number) {
+  const category = { id: 'cat-bench', name: 'Bench', type: 'variable_cost', dreGroup: 'CV' } as Category;
+  const words = Array.from(new Set(
+    descriptions.flatMap(d => d.toLowerCase().split(/[^a-z0-9]+/)).filter(w => w.length >= 4)
+  ));
+
+  const rows = [];
+  for (let i = 0; i < count; i++) {
+    const w1 = words[i % words.length];
+    const w2 = words[(i * 7 + 3) % words.length];
+    const kind = i % 10;
+
+    let ruleType = 'contains';
+    let rulePattern = `${w1}`;
+    if (kind === 0) { ruleType = 'exact'; rulePattern = descriptions[i % descriptions.length].toLowerCase(); }
+    else if (kind === 1) { ruleType = 'wildcard'; rulePattern = `*${w1}*${w2}*`; }
+    else if (kind === 2) { ruleType = 'regex'; rulePattern = `${w1}.*\\d+`; }
+    else if (kind === 3) { ruleType = 'tokens'; rulePattern = `${w1} ${w2}`; }
+    else if (kind === 4) { rulePattern = `${w1} ${w2}`; }
+
+    rows.push({
+      financeai_category_rules: {
+        id: `rule-${i}`,
+        categoryId: category.id,
+        companyId: 'company-bench',
+        rulePattern,
+        ruleType,
+        confidenceScore: (0.7 + (i % 30) / 100).toFixed(2),
+        active: true,
+        usageCount: i % 50,
+        status: 'active'
+      } as CategoryRule,
+      financeai_categories: category
+    });
+  }
+  return rows;
+}
+
+async function runBenchmark() {
+  const { RuleScoringService } = await import('@/lib/services/rule-scoring.service');
+  const { CompiledRuleIndex } = await import('@/lib/services/rule-index.service');
+
+  const descriptions = loadSampleDescriptions();
+  const contexts: TransactionContext[] = descriptions.map(description => ({ description }));
+  const rows = buildRules(descriptions, NUM_RULES);
+  const rules = rows.map(r => r.financeai_category_rules);
+
+  console.log(`--- Benchmark: Rule Index (${rules.length} regras, ${contexts.length} transações, ${ITERATIONS} iterações) ---\n`);
+
+  // Sanidade: os dois caminhos devem escolher a mesma regra
+  const index = new CompiledRuleIndex(rows);
+  let mismatches = 0;
+  for (const context of contexts) {
+    const linear = RuleScoringService.findBestMatch(rules, context);
+    const indexed = index.findBestMatch(context);
+    if ((linear?.ruleId ?? null) !== (indexed?.ruleId ?? null)) mismatches++;
+  }
+  console.log(mismatches === 0 ? '✅ Resultados idênticos' : `❌ ${mismatches} divergências`);
+  if (mismatches > 0) process.exitCode = 1;
+
+  // Caminho antigo
+  let start = process.hrtime.bigint();
+  for (let it = 0; it < ITERATIONS; it++) {
+    for (const context of contexts) RuleScoringService.findBestMatch(rules, context);
+  }
+  const linearSeconds = Number(process.hrtime.bigint() - start) / 1e9;
+
+  // Índice compilado (inclui o custo de compilação a cada iteração)
+  start = process.hrtime.bigint();
+  for (let it = 0; it < ITERATIONS; it++) {
+    const compiled = new CompiledRuleIndex(rows);
+    for (const context of contexts) compiled.findBestMatch(context);
+  }
+  const indexedSeconds = Number(process.hrtime.bigint() - start) / 1e9;
+
+  const evaluations = rules.length * contexts.length * ITERATIONS;
+  const report = (label: string, seconds: number) => {
+    console.log(
+      `${label.padEnd(10)} ${seconds.toFixed(3)}s | ` +
+      `${Math.round(evaluations / seconds).toLocaleString()} regras avaliadas/s | ` +
+      `${Math.round((contexts.length * ITERATIONS) / seconds).toLocaleString()} transações/s`
+    );
+  };
+
+  console.log('');
+  report('Linear', linearSeconds);
+  report('Índice', indexedSeconds);
+  console.log(`\nSpeedup: ${(linearSeconds / indexedSeconds).toFixed(1)}x`);
+}
+
+runBenchmark().catch(err => {
+  console.error(err);
+  process.exit(1);
+});
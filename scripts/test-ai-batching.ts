@@ -0,0 +1,161 @@
+/**
+ * Test: Modo lote do adapter de IA (AICategorization)
+ *
+ * Com um provider de mentira no lugar do aiProviderService, verifica a
+ * interpretação da resposta do lote, a deduplicação de descrições, o envio
+ * por janela e por maxBatchSize, e o fallback para a chamada individual
+ * (com logContext) quando o lote falha ou vem incompleto.
+ *
+ * Uso: npx tsx scripts/test-ai-batching.ts
+ */
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+// O adapter importa a conexão (pool lazy); este teste não faz queries.
+process.env.DATABASE_URL ??= 'postgres://test@localhost/test';
+process.env.LOG_LEVEL ??= 'silent';
+
+import type { AICompletionOptions, AICompletionResponse } from '@/lib/ai/ai-provider.service';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+const CATEGORIES = ['Energia', 'Aluguel', 'Tarifas Bancárias', 'OUTRAS DESPESAS NOP'];
+
+async function runTests() {
+  const { aiProviderService } = await import('@/lib/ai/ai-provider.service');
+  const { AICategorization, parseBatchResponse, normalizeForDedupe } = await import('@/lib/services/ai-categorization-adapter.service');
+
+  // Provider de mentira: lote responde pelo handler atual, individual devolve a 1ª categoria
+  const calls: AICompletionOptions[] = [];
+  let batchHandler: (items: number) => string = items =>
+    JSON.stringify(Array.from({ length: items }, (_, i) => ({ i, categoria: CATEGORIES[i % 3] })));
+
+  aiProviderService.completeWithRetry = async (options: AICompletionOptions): Promise<AICompletionResponse> => {
+    calls.push(options);
+    if (options.logContext?.operationType === 'batch-categorization') {
+      const items = (options.messages[1].content.match(/^\d+\. DESCRIÇÃO/gm) || []).length;
+      return { content: batchHandler(items), provider: 'openrouter', model: 'stub' };
+    }
+    return { content: CATEGORIES[0], provider: 'openrouter', model: 'stub' };
+  };
+
+  const adapter = new AICategorization();
+  // Entra direto na fila do lote (sem enriquecimento, pesquisa web e categorias do banco)
+  const submit = (description: string, companyId = 'company-a') =>
+    new Promise<{ category: string; modelUsed?: string }>((resolve, reject) => {
+      (adapter as unknown as { enqueue(request: unknown): void }).enqueue({
+        prepared: {
+          context: { description, amount: -100, companyId },
+          enrichment: null,
+          companyInfo: null,
+          availableCategories: CATEGORIES,
+          transactionType: 'debit'
+        },
+        resolve,
+        reject
+      });
+    });
+  const batchCalls = () => calls.filter(c => c.logContext?.operationType === 'batch-categorization').length;
+  const singleCalls = () => calls.filter(c => c.logContext?.operationType === 'categorization').length;
+
+  console.log('--- AI Batching Tests ---\n');
+
+  // ============================================================
+  // TESTE 1: parseBatchResponse
+  // ============================================================
+  console.log('>> Teste 1: Interpretação da resposta do lote');
+
+  const fenced = parseBatchResponse('```json\n[{"i": 0, "categoria": "Energia"}, {"index": 1, "category": " Aluguel "}]\n```');
+  assert(fenced?.get(0) === 'Energia' && fenced?.get(1) === 'Aluguel', 'JSON em bloco de código, com aliases index/category');
+  assert(parseBatchResponse('[{"i": 0, "categoria": "Energia"') === null, 'JSON truncado → null');
+  assert(parseBatchResponse('Não sei categorizar') === null, 'Sem array → null');
+  assert(parseBatchResponse('{"i": 0, "categoria": "Energia"}') === null, 'Objeto em vez de array → null');
+
+  const partial = parseBatchResponse('[{"categoria": "Energia"}, {"i": "x", "categoria": "Aluguel"}, {"i": 2, "categoria": ""}, {"i": 3, "categoria": "Aluguel"}]');
+  assert(partial?.size === 1 && partial.get(3) === 'Aluguel', 'Itens sem índice, com índice inválido ou categoria vazia são ignorados');
+  assert(parseBatchResponse('[{"i": 0, "categoria": "Energia"}]')?.size === 1, 'Array curto devolve só os itens presentes');
+
+  // ============================================================
+  // TESTE 2: normalizeForDedupe
+  // ============================================================
+  console.log('\n>> Teste 2: Normalização para deduplicação');
+
+  assert(
+    normalizeForDedupe('pix  enviado - cemig 12345678') === normalizeForDedupe('PIX ENVIADO CEMIG'),
+    'Caixa, pontuação, espaços e números longos não diferenciam descrições'
+  );
+  assert(normalizeForDedupe('TED 123') !== normalizeForDedupe('TED 456'), 'Números curtos diferenciam descrições');
+
+  // ============================================================
+  // TESTE 3: Duplicadas viram uma chamada; envio pela janela
+  // ============================================================
+  console.log('\n>> Teste 3: Deduplicação e envio pela janela');
+
+  calls.length = 0;
+  const windowed = [
+    submit('PIX CEMIG 12345678'),
+    submit('pix cemig 87654321'),
+    submit('ALUGUEL SALA 101')
+  ];
+  assert(calls.length === 0, 'Nada é enviado antes da janela');
+  const windowedResults = await Promise.all(windowed);
+  assert(calls.length === 1 && batchCalls() === 1, 'Uma única chamada de lote após a janela');
+  assert((calls[0].messages[1].content.match(/^\d+\. DESCRIÇÃO/gm) || []).length === 2, 'Descrições duplicadas vão uma vez só no prompt');
+  assert(windowedResults[0].category === windowedResults[1].category, 'Duplicadas recebem a mesma resposta');
+
+  // ============================================================
+  // TESTE 4: Envio por maxBatchSize
+  // ============================================================
+  console.log('\n>> Teste 4: Envio ao atingir maxBatchSize');
+
+  calls.length = 0;
+  const full = Array.from({ length: 20 }, (_, i) => submit(`FORNECEDOR ${i}`));
+  assert(batchCalls() === 1, 'Lote com 20 itens distintos sai sem esperar a janela');
+  const extra = submit('FORNECEDOR EXTRA');
+  await Promise.all(full);
+  assert(batchCalls() === 1, 'Item seguinte fica para a próxima janela');
+  await extra;
+  assert(calls.length === 2 && singleCalls() === 1, 'Lote de um item usa a chamada individual');
+
+  // ============================================================
+  // TESTE 5: Fallback para completeSingle
+  // ============================================================
+  console.log('\n>> Teste 5: Fallback para a chamada individual');
+
+  calls.length = 0;
+  batchHandler = () => JSON.stringify([{ i: 0, categoria: 'Aluguel' }]);
+  const short = await Promise.all([submit('ITEM A'), submit('ITEM B'), submit('ITEM C')]);
+  assert(batchCalls() === 1 && singleCalls() === 2, 'Array curto: itens ausentes vão para chamadas individuais');
+  assert(short[0].category === 'Aluguel' && short[1].category === CATEGORIES[0], 'Itens do lote e do fallback recebem suas respostas');
+
+  calls.length = 0;
+  batchHandler = () => 'resposta sem JSON';
+  await Promise.all([submit('ITEM D'), submit('ITEM E')]);
+  assert(batchCalls() === 1 && singleCalls() === 2, 'Resposta malformada: todos os itens vão para chamadas individuais');
+
+  calls.length = 0;
+  batchHandler = () => { throw new Error('provider fora do ar'); };
+  const failed = await Promise.all([submit('ITEM F'), submit('ITEM G')]);
+  assert(batchCalls() === 1 && singleCalls() === 2, 'Lote com erro: todos os itens vão para chamadas individuais');
+  assert(failed.every(r => r.modelUsed === 'openrouter/stub'), 'Fallback devolve a resposta do provider');
+  assert(
+    calls.filter(c => c.logContext?.operationType === 'categorization').every(c => c.logContext?.companyId === 'company-a'),
+    'Chamada individual leva o logContext com a empresa'
+  );
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests();
@@ -0,0 +1,165 @@
+/**
+ * Test: Métricas do pipeline de categorização (CategorizationMetrics)
+ *
+ * Verifica os buckets de latência, o percentil aproximado, a soma de
+ * snapshots (merge), as razões de acerto e queries por transação (summarize)
+ * e o coletor ativo de measureStage/countDbQuery.
+ *
+ * Uso: npx tsx scripts/test-categorization-metrics.ts
+ */
+
+import type { CategorizationMetricsSnapshot } from '@/lib/services/categorization-metrics';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+async function runTests() {
+  const {
+    CategorizationMetrics,
+    LATENCY_BUCKETS_MS,
+    percentile,
+    measureStage,
+    countDbQuery
+  } = await import('@/lib/services/categorization-metrics');
+
+  const histogramOf = (samples: number[]) => {
+    const metrics = new CategorizationMetrics();
+    samples.forEach(ms => metrics.recordLatency('total', ms));
+    return metrics.toJSON().latency.total!;
+  };
+
+  console.log('--- Categorization Metrics Tests ---\n');
+
+  // ============================================================
+  // TESTE 1: Buckets de latência
+  // ============================================================
+  console.log('>> Teste 1: recordLatency');
+
+  const buckets = histogramOf([0.5, 1, 1.5, 10000, 20000]).buckets;
+  assert(buckets.length === LATENCY_BUCKETS_MS.length + 1, 'Um bucket por limite + overflow');
+  assert(buckets[0] === 2 && buckets[1] === 1, 'Limite superior é inclusivo (1ms cai no bucket de 1ms)');
+  assert(buckets[LATENCY_BUCKETS_MS.length - 1] === 1 && buckets[LATENCY_BUCKETS_MS.length] === 1, '10s no último bucket, acima disso no overflow');
+
+  const histogram = histogramOf([3, 7, 40]);
+  assert(histogram.count === 3 && histogram.sumMs === 50 && histogram.maxMs === 40, 'count, sumMs e maxMs');
+
+  // ============================================================
+  // TESTE 2: percentile
+  // ============================================================
+  console.log('\n>> Teste 2: percentile');
+
+  const emptyHistogram = { count: 0, sumMs: 0, maxMs: 0, buckets: new Array(LATENCY_BUCKETS_MS.length + 1).fill(0) };
+  assert(percentile(emptyHistogram, 0.95) === 0, 'Histograma vazio → 0');
+  assert(percentile(histogramOf(new Array(100).fill(3)), 0.5) === 3, 'Limite do bucket é cortado pelo máximo observado');
+
+  const mixed = histogramOf([...new Array(90).fill(4), ...new Array(10).fill(800)]);
+  assert(percentile(mixed, 0.5) === 5, 'p50: limite superior do bucket da amostra');
+  assert(percentile(mixed, 0.9) === 5, 'p90: última amostra do bucket de 5ms');
+  assert(percentile(mixed, 0.95) === 800, 'p95: bucket de 1000ms, cortado pelo máximo (800)');
+  assert(percentile(mixed, 1) === 800, 'p100 = máximo');
+  assert(percentile(histogramOf([2, 15000]), 0.95) === 15000, 'Overflow devolve o máximo');
+
+  // ============================================================
+  // TESTE 3: merge
+  // ============================================================
+  console.log('\n>> Teste 3: merge');
+
+  const a = new CategorizationMetrics();
+  a.recordOutcome('rule');
+  a.recordOutcome('cache-exact');
+  a.recordStage('rules', true);
+  a.recordStage('cache', false);
+  a.recordLatency('rules', 3);
+  a.countDbQuery('history', 2);
+
+  const b = new CategorizationMetrics();
+  b.recordOutcome('rule');
+  b.recordOutcome('ai');
+  b.recordStage('rules', false);
+  b.recordLatency('rules', 30);
+  b.recordLatency('ai', 700);
+  b.countDbQuery('history');
+  b.countDbQuery('persist', 3);
+
+  const aBefore = JSON.stringify(a.toJSON());
+  const merged = CategorizationMetrics.merge([a.toJSON(), b.toJSON()]);
+
+  assert(merged.transactions === 4, 'Soma transações');
+  assert(merged.outcomes.rule === 2 && merged.outcomes['cache-exact'] === 1 && merged.outcomes.ai === 1, 'Soma resultados por fonte');
+  assert(merged.dbQueries.history === 3 && merged.dbQueries.persist === 3, 'Soma queries por tipo');
+  assert(merged.stages.rules?.calls === 2 && merged.stages.rules?.hits === 1 && merged.stages.cache?.calls === 1, 'Soma chamadas e acertos por etapa');
+  assert(
+    merged.latency.rules?.count === 2 && merged.latency.rules?.sumMs === 33 && merged.latency.rules?.maxMs === 30 &&
+    merged.latency.rules?.buckets.reduce((sum, n) => sum + n, 0) === 2,
+    'Soma histogramas (count, sumMs, máximo, buckets)'
+  );
+  assert(merged.latency.ai?.count === 1, 'Etapa presente em um só snapshot');
+  assert(JSON.stringify(a.toJSON()) === aBefore, 'Não altera os snapshots de entrada');
+
+  const empty = CategorizationMetrics.merge([]);
+  assert(empty.transactions === 0 && Object.keys(empty.latency).length === 0, 'Lista vazia → snapshot vazio');
+
+  // ============================================================
+  // TESTE 4: summarize
+  // ============================================================
+  console.log('\n>> Teste 4: summarize');
+
+  const snapshot: CategorizationMetricsSnapshot = {
+    transactions: 6,
+    outcomes: { 'cache-exact': 1, 'cache-similar': 1, rule: 1, history: 1, manual: 1, error: 1 },
+    stages: {},
+    latency: { total: histogramOf([1, 2, 3]) },
+    dbQueries: { history: 4, persist: 3, ruleIndex: 1 }
+  };
+  const summary = CategorizationMetrics.summarize(snapshot);
+
+  assert(summary.hitRatios.cache === 0.333, 'cache soma cache-exact e cache-similar (arredondado em 3 casas)');
+  assert(summary.hitRatios.rules === 0.167 && summary.hitRatios.history === 0.167 && summary.hitRatios.ai === 0, 'Razões de regra, histórico e IA');
+  assert(summary.hitRatios.unclassified === 0.333, 'unclassified soma manual e error');
+  assert(summary.dbQueriesPerTransaction === 1.33, 'Queries por transação somam todos os tipos (8 / 6)');
+  assert(
+    summary.latencySummary.total?.avgMs === 2 && summary.latencySummary.total?.p50Ms === 2 && summary.latencySummary.total?.maxMs === 3,
+    'latencySummary com média, p50 e máximo'
+  );
+
+  const zero = CategorizationMetrics.summarize(CategorizationMetrics.merge([]));
+  assert(zero.dbQueriesPerTransaction === 0 && zero.hitRatios.cache === 0, 'Sem transações → razões e queries zeradas');
+
+  // ============================================================
+  // TESTE 5: Coletor ativo
+  // ============================================================
+  console.log('\n>> Teste 5: measureStage e countDbQuery');
+
+  const outside = await measureStage('cache', async () => 'fora');
+  countDbQuery('history');
+  assert(outside === 'fora', 'Fora de um coletor, measureStage só executa a função');
+
+  const metrics = new CategorizationMetrics();
+  await metrics.run(async () => {
+    await measureStage('cache', async () => null);
+    await measureStage('rules', async () => ({ categoryId: 'x' }));
+    countDbQuery('history');
+    countDbQuery('persist', 2);
+    await measureStage('ai', async () => { throw new Error('falhou'); }).catch(() => undefined);
+  });
+
+  const collected = metrics.toJSON();
+  assert(collected.stages.cache?.hits === 0 && collected.stages.rules?.hits === 1, 'hit = etapa devolveu resultado');
+  assert(collected.stages.ai?.calls === 1 && collected.stages.ai?.hits === 0 && collected.latency.ai?.count === 1, 'Etapa com erro conta chamada e latência, sem acerto');
+  assert(collected.dbQueries.history === 1 && collected.dbQueries.persist === 2, 'Queries contadas só dentro do coletor');
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests();
@@ -0,0 +1,102 @@
+/**
+ * Test: Cache de categorias v3 (partição, índice de trigramas, LRU/TTL)
+ *
+ * Verifica que a busca por similaridade com poda por trigramas encontra o
+ * mesmo resultado que a varredura completa, que o cache respeita os limites
+ * de tamanho (LRU) e de idade (TTL) e que getStats expõe os contadores.
+ *
+ * Uso: npx tsx scripts/test-category-cache-index.ts
+ */
+
+import { CategoryCacheService } from '@/lib/services/category-cache.service';
+
+const COMPANY_ID = 'test-company-cache-index';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+function runTests() {
+  console.log('--- Cache v3: Índice, LRU e TTL ---\n');
+
+  // ============================================================
+  // TESTE 1: Similaridade via índice de trigramas
+  // ============================================================
+  console.log('>> Teste 1: Busca por similaridade');
+
+  const cache = new CategoryCacheService();
+  cache.addToCache('ENERGIA ELETRICA CEMIG', 'cat-energia', 'Energia', COMPANY_ID, 0.90);
+  cache.addToCache('ALUGUEL SALA COMERCIAL', 'cat-aluguel', 'Aluguel', COMPANY_ID, 0.90);
+  cache.addToCache('INTERNET VIVO FIBRA', 'cat-internet', 'Internet', COMPANY_ID, 0.90);
+
+  const similar = cache.findInCache('ENERGIA ELETRICA CEMIX', COMPANY_ID, 0.90);
+  assert(similar?.categoryId === 'cat-energia', 'Encontra ENERGIA ELETRICA CEMIG com 1 caractere diferente');
+  assert(similar?.source === 'cache-similar', 'Fonte: cache-similar');
+
+  const tooFar = cache.findInCache('ENERGIA SOLAR', COMPANY_ID, 0.90);
+  assert(tooFar === null, 'Descrição distante não casa');
+
+  const lowThreshold = cache.findInCache('ALUGUEL SALA', COMPANY_ID, 0.5);
+  assert(lowThreshold?.categoryId === 'cat-aluguel', 'Threshold baixo (varredura da partição) ainda encontra');
+
+  const otherCompany = cache.findInCache('ENERGIA ELETRICA CEMIG', 'other-company');
+  assert(otherCompany === null, 'Partição isolada por empresa');
+
+  // ============================================================
+  // TESTE 2: LRU por empresa e global
+  // ============================================================
+  console.log('\n>> Teste 2: Limite de tamanho (LRU)');
+
+  const small = new CategoryCacheService({ maxEntriesPerCompany: 3, maxEntries: 5 });
+  small.addToCache('FORNECEDOR ALFA LTDA', 'cat-a', 'A', COMPANY_ID, 0.90);
+  small.addToCache('FORNECEDOR BETA LTDA', 'cat-b', 'B', COMPANY_ID, 0.90);
+  small.addToCache('FORNECEDOR GAMA LTDA', 'cat-c', 'C', COMPANY_ID, 0.90);
+  small.findInCache('FORNECEDOR ALFA LTDA', COMPANY_ID); // ALFA vira a mais recente
+  small.addToCache('FORNECEDOR DELTA LTDA', 'cat-d', 'D', COMPANY_ID, 0.90);
+
+  assert(small.getStats().byCompany[COMPANY_ID] === 3, 'Empresa limitada a 3 entradas');
+  assert(small.findInCache('FORNECEDOR BETA LTDA', COMPANY_ID, 0.99) === null, 'BETA (menos recente) foi removida');
+  assert(small.findInCache('FORNECEDOR ALFA LTDA', COMPANY_ID)?.categoryId === 'cat-a', 'ALFA (acessada) foi mantida');
+
+  small.addToCache('CLIENTE UM SA', 'cat-1', 'Um', 'company-b', 0.90);
+  small.addToCache('CLIENTE DOIS SA', 'cat-2', 'Dois', 'company-b', 0.90);
+  small.addToCache('CLIENTE TRES SA', 'cat-3', 'Tres', 'company-b', 0.90);
+  assert(small.getStats().totalEntries === 5, 'Limite global de 5 entradas respeitado');
+  assert(small.getStats().evictions === 2, 'Evictions contabilizadas');
+
+  // ============================================================
+  // TESTE 3: TTL
+  // ============================================================
+  console.log('\n>> Teste 3: Expiração (TTL)');
+
+  const expiring = new CategoryCacheService({ ttlMs: -1 });
+  expiring.addToCache('TARIFA BANCARIA PACOTE', 'cat-tarifa', 'Tarifas', COMPANY_ID, 0.90);
+  assert(expiring.findInCache('TARIFA BANCARIA PACOTE', COMPANY_ID) === null, 'Entrada expirada não é retornada');
+  assert(expiring.getStats().expired === 1, 'Expiração contabilizada');
+  assert(expiring.getStats().totalEntries === 0, 'Entrada expirada removida');
+
+  // ============================================================
+  // TESTE 4: Contadores
+  // ============================================================
+  console.log('\n>> Teste 4: Contadores em getStats');
+
+  const stats = cache.getStats();
+  assert(stats.totalLookups === 4, 'totalLookups = 4');
+  assert(stats.similarHits === 2 && stats.exactHits === 0, 'Hits por similaridade contabilizados');
+  assert(stats.misses === 2, 'Misses contabilizados');
+  assert(stats.avgLookupMs >= 0 && stats.maxLookupMs >= stats.avgLookupMs, 'Latência de busca registrada');
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests();
@@ -0,0 +1,244 @@
+/**
+ * Test: Similaridade de descrições (pg_trgm)
+ *
+ * Contra o Postgres, verifica que financeai_normalize_description devolve o
+ * mesmo texto que TransactionCategorizationService.normalizeDescription
+ * (acentos, ß, sequências longas de dígitos, pontuação, espaços), e a seleção
+ * de candidatos por trigramas: DescriptionSimilarityService.findSimilar, a
+ * camada de histórico (tryHistory) e addToCluster. Usa empresas de teste com
+ * ids fixos e remove tudo no final.
+ *
+ * Requer scripts/apply-description-similarity-migration.ts aplicado.
+ *
+ * Uso: npx tsx scripts/test-description-similarity.ts
+ */
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+process.env.LOG_LEVEL ??= 'silent';
+
+import { sql } from 'drizzle-orm';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+const COMPANY_A_ID = 'd5d5d5d5-0000-4000-8000-00000000000a';
+const COMPANY_B_ID = 'd5d5d5d5-0000-4000-8000-00000000000b';
+const ACCOUNT_A_ID = 'd5d5d5d5-0000-4000-8000-0000000000a1';
+const ACCOUNT_B_ID = 'd5d5d5d5-0000-4000-8000-0000000000b1';
+const CATEGORY_ENERGY_ID = 'd5d5d5d5-0000-4000-8000-0000000000c1';
+const CATEGORY_PHONE_ID = 'd5d5d5d5-0000-4000-8000-0000000000c2';
+const CATEGORY_SUPPLIER_ID = 'd5d5d5d5-0000-4000-8000-0000000000c3';
+const CATEGORY_B_ID = 'd5d5d5d5-0000-4000-8000-0000000000c4';
+
+const NORMALIZATION_SAMPLES = [
+  'PIX ENVIADO - João 12345678 / LJ 02',
+  'Pagamento Água e Esgoto — COPASA',
+  'CAFÉ ÇÃO ÑANDU ÜBER',
+  'STRAßE GmbH',
+  'ıstanbul ſ',
+  'ﬁnanceiro',
+  'TED 123456 789012 12345',
+  'BOLETO 1234567890123456789',
+  'COMPRA*LOJA#123;XYZ/2024.10',
+  '\tTABS\nE\r\nQUEBRAS  ',
+  'NBSP\u00a0AQUI',
+  '٣٤٥٦٧٨ ARABE',
+  'PAGTO 🎉 FESTA',
+  '',
+  '   '
+];
+
+function daysAgo(days: number): string {
+  const date = new Date();
+  date.setDate(date.getDate() - days);
+  return date.toISOString().split('T')[0];
+}
+
+async function runTests() {
+  const { db } = await import('@/lib/db/drizzle');
+  const { transactionClusters } = await import('@/lib/db/schema');
+  const { default: DescriptionSimilarityService } = await import('@/lib/services/description-similarity.service');
+  const { TransactionCategorizationService } = await import('@/lib/services/transaction-categorization.service');
+  const { TransactionClusteringService } = await import('@/lib/services/transaction-clustering.service');
+
+  const normalize = (description: string) =>
+    (TransactionCategorizationService as unknown as { normalizeDescription(d: string): string })
+      .normalizeDescription(description);
+
+  console.log('--- Description Similarity Tests ---\n');
+
+  // ============================================================
+  // TESTE 1: Normalização JS = SQL
+  // ============================================================
+  console.log('>> Teste 1: normalizeDescription = financeai_normalize_description');
+
+  assert(normalize('PIX ENVIADO - João 12345678 / LJ 02') === 'PIX ENVIADO JO O LJ 02', 'Acento vira espaço, sequência longa de dígitos sai');
+  assert(normalize('STRAßE') === 'STRA E', 'ß vira espaço (sem expandir para SS)');
+  assert(normalize('TED 12345 123456') === 'TED 12345', 'Até 5 dígitos ficam, 6 ou mais saem');
+
+  for (const sample of NORMALIZATION_SAMPLES) {
+    const result = await db.execute(sql`SELECT financeai_normalize_description(${sample}) AS normalized`);
+    const fromSql = (result.rows[0] as { normalized: string }).normalized;
+    const fromJs = normalize(sample);
+    assert(fromSql === fromJs, `${JSON.stringify(sample)} → ${JSON.stringify(fromJs)}`);
+    if (fromSql !== fromJs) {
+      console.error(`   SQL: ${JSON.stringify(fromSql)}`);
+    }
+  }
+
+  // ============================================================
+  // Dados de teste
+  // ============================================================
+  const cleanup = async () => {
+    await db.execute(sql`DELETE FROM financeai_transactions WHERE account_id IN (${ACCOUNT_A_ID}, ${ACCOUNT_B_ID})`);
+    await db.execute(sql`DELETE FROM financeai_transaction_clusters WHERE company_id IN (${COMPANY_A_ID}, ${COMPANY_B_ID})`);
+    await db.execute(sql`DELETE FROM financeai_categories WHERE company_id IN (${COMPANY_A_ID}, ${COMPANY_B_ID})`);
+    await db.execute(sql`DELETE FROM financeai_accounts WHERE id IN (${ACCOUNT_A_ID}, ${ACCOUNT_B_ID})`);
+    await db.execute(sql`DELETE FROM financeai_companies WHERE id IN (${COMPANY_A_ID}, ${COMPANY_B_ID})`);
+  };
+
+  const insertTransaction = (accountId: string, categoryId: string | null, description: string, date: string) => db.execute(sql`
+    INSERT INTO financeai_transactions (account_id, category_id, description, amount, type, transaction_date, confidence)
+    VALUES (${accountId}, ${categoryId}, ${description}, -100.00, 'debit', ${date}, 100.00)
+  `);
+
+  await cleanup();
+
+  try {
+    await db.execute(sql`
+      INSERT INTO financeai_companies (id, name)
+      VALUES (${COMPANY_A_ID}, 'Similaridade A'), (${COMPANY_B_ID}, 'Similaridade B')
+    `);
+    await db.execute(sql`
+      INSERT INTO financeai_accounts (id, company_id, name, bank_name, bank_code, account_number)
+      VALUES (${ACCOUNT_A_ID}, ${COMPANY_A_ID}, 'Conta A', 'Banco', '000', '1'),
+             (${ACCOUNT_B_ID}, ${COMPANY_B_ID}, 'Conta B', 'Banco', '000', '2')
+    `);
+    await db.execute(sql`
+      INSERT INTO financeai_categories (id, company_id, name, type)
+      VALUES (${CATEGORY_ENERGY_ID}, ${COMPANY_A_ID}, 'Energia Similaridade', 'fixed_cost'),
+             (${CATEGORY_PHONE_ID}, ${COMPANY_A_ID}, 'Telefone Similaridade', 'fixed_cost'),
+             (${CATEGORY_SUPPLIER_ID}, ${COMPANY_A_ID}, 'Fornecedores Similaridade', 'variable_cost'),
+             (${CATEGORY_B_ID}, ${COMPANY_B_ID}, 'Energia B', 'fixed_cost')
+    `);
+
+    // ============================================================
+    // TESTE 2: findSimilar
+    // ============================================================
+    console.log('\n>> Teste 2: DescriptionSimilarityService.findSimilar');
+
+    await insertTransaction(ACCOUNT_A_ID, CATEGORY_ENERGY_ID, 'PAGAMENTO CEMIG ENERGIA 1234567', daysAgo(10));
+    await insertTransaction(ACCOUNT_A_ID, CATEGORY_ENERGY_ID, 'Pagamento Cemig Energia Eletrica', daysAgo(20));
+    await insertTransaction(ACCOUNT_A_ID, CATEGORY_ENERGY_ID, 'PAGAMENTO CEMIG ENERGIA', daysAgo(200));
+    await insertTransaction(ACCOUNT_A_ID, null, 'PAGAMENTO CEMIG ENERGIA', daysAgo(5));
+    await insertTransaction(ACCOUNT_A_ID, CATEGORY_SUPPLIER_ID, 'ALUGUEL SALA 101', daysAgo(5));
+    await insertTransaction(ACCOUNT_B_ID, CATEGORY_B_ID, 'PAGAMENTO CEMIG ENERGIA', daysAgo(5));
+
+    const query = 'PAGTO CEMIG ENERGIA 7654321';
+    const labeled = await DescriptionSimilarityService.findSimilar(query, COMPANY_A_ID);
+    assert(labeled.length === 3, 'Só transações rotuladas e parecidas da empresa (3)');
+    assert(labeled.every(r => r.categoryId === CATEGORY_ENERGY_ID && r.categoryName === 'Energia Similaridade'), 'Nenhuma de outra empresa nem dissimilar');
+    assert(labeled.every((r, i) => i === 0 || labeled[i - 1].similarity >= r.similarity), 'Ordenadas por similaridade');
+    assert(labeled.every(r => r.similarity > 0 && r.similarity <= 1), 'Similaridade entre 0 e 1');
+
+    const recent = await DescriptionSimilarityService.findSimilar(query, COMPANY_A_ID, { sinceDate: daysAgo(90) });
+    assert(recent.length === 2, 'sinceDate descarta as antigas');
+
+    const all = await DescriptionSimilarityService.findSimilar(query, COMPANY_A_ID, { labeledOnly: false });
+    assert(all.length === 4 && all.some(r => r.categoryId === null), 'labeledOnly: false inclui as sem categoria');
+
+    const top = await DescriptionSimilarityService.findSimilar(query, COMPANY_A_ID, { limit: 1 });
+    assert(top.length === 1 && top[0].similarity === labeled[0].similarity, 'limit devolve os top-k');
+
+    assert((await DescriptionSimilarityService.findSimilar('   ', COMPANY_A_ID)).length === 0, 'Descrição vazia → nenhum candidato');
+
+    // ============================================================
+    // TESTE 3: Histórico acha a parecida fora das mais recentes
+    // ============================================================
+    console.log('\n>> Teste 3: tryHistory escolhe candidatos por similaridade, não por data');
+
+    await insertTransaction(ACCOUNT_A_ID, CATEGORY_PHONE_ID, 'DEBITO AUTOMATICO CONTA CLARO', daysAgo(60));
+    for (let i = 0; i < 30; i++) {
+      await insertTransaction(ACCOUNT_A_ID, CATEGORY_SUPPLIER_ID, `COMPRA FORNECEDOR ${i} MATERIAL`, daysAgo(i % 10));
+    }
+
+    const options = { skipCache: true, skipRules: true, skipAI: true, confidenceThreshold: 70 };
+    const context = { description: 'DEBITO AUTOMATICO CONTA CLARO 998877', amount: -100 };
+
+    const fromHistory = await TransactionCategorizationService.categorize(context, { ...options, companyId: COMPANY_A_ID });
+    assert(
+      fromHistory.source === 'history' && fromHistory.categoryId === CATEGORY_PHONE_ID,
+      `Transação de 60 dias atrás, atrás de 30 mais recentes, é encontrada (${fromHistory.source})`
+    );
+
+    const otherCompany = await TransactionCategorizationService.categorize(context, { ...options, companyId: COMPANY_B_ID });
+    assert(otherCompany.source !== 'history', 'Outra empresa não usa esse histórico');
+
+    // ============================================================
+    // TESTE 4: addToCluster
+    // ============================================================
+    console.log('\n>> Teste 4: addToCluster escolhe o cluster pelo centróide');
+
+    const cluster = (companyId: string, categoryId: string, centroidDescription: string, transactionCount = 3) => ({
+      companyId,
+      categoryId,
+      categoryName: 'Teste',
+      centroidDescription,
+      transactionCount,
+      commonTokens: TransactionClusteringService.tokenize(centroidDescription),
+      transactionIds: [],
+      status: 'pending'
+    });
+
+    // Começa sem clusters (o aprendizado automático do Teste 3 pode ter criado algum)
+    await db.execute(sql`DELETE FROM financeai_transaction_clusters WHERE company_id IN (${COMPANY_A_ID}, ${COMPANY_B_ID})`);
+
+    // Mais clusters parecidos do que candidateClusters, nenhum bom o bastante no Jaccard
+    await db.insert(transactionClusters).values(
+      Array.from({ length: 12 }, (_, i) => cluster(COMPANY_A_ID, CATEGORY_PHONE_ID, `DEBITO AUTOMATICO OPERADORA ${String.fromCharCode(65 + i)}X`))
+    );
+    const [target] = await db.insert(transactionClusters)
+      .values(cluster(COMPANY_A_ID, CATEGORY_PHONE_ID, 'DEBITO AUTOMATICO CONTA CLARO'))
+      .returning({ id: transactionClusters.id });
+    const [otherCategory] = await db.insert(transactionClusters)
+      .values(cluster(COMPANY_A_ID, CATEGORY_ENERGY_ID, 'DEBITO AUTOMATICO CONTA CLARO'))
+      .returning({ id: transactionClusters.id });
+    const [otherCompanyCluster] = await db.insert(transactionClusters)
+      .values(cluster(COMPANY_B_ID, CATEGORY_B_ID, 'DEBITO AUTOMATICO CONTA CLARO'))
+      .returning({ id: transactionClusters.id });
+
+    const joined = await TransactionClusteringService.addToCluster(
+      'Debito Automatico Conta Claro 998877', CATEGORY_PHONE_ID, 'Telefone Similaridade', COMPANY_A_ID
+    );
+    assert(joined.clusterId === target.id && !joined.isNew && joined.clusterSize === 4, 'Entra no cluster com o mesmo centróide, categoria e empresa');
+    assert(joined.clusterId !== otherCategory.id && joined.clusterId !== otherCompanyCluster.id, 'Ignora clusters de outra categoria ou empresa');
+
+    const created = await TransactionClusteringService.addToCluster(
+      'TARIFA PACOTE SERVICOS', CATEGORY_PHONE_ID, 'Telefone Similaridade', COMPANY_A_ID
+    );
+    assert(created.isNew && created.clusterSize === 1, 'Descrição sem cluster parecido cria um novo');
+  } finally {
+    await cleanup();
+  }
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests()
+  .then(() => process.exit())
+  .catch(err => {
+    console.error(err);
+    process.exit(1);
+  });
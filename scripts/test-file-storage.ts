@@ -0,0 +1,136 @@
+/**
+ * Test: Leitura de arquivos do FileStorageService por provider
+ *
+ * O worker da fila de uploads relê o arquivo do storage (openReadStream).
+ * Verifica, para filesystem, Supabase e S3, que readFile e openReadStream
+ * devolvem os bytes gravados e null para um arquivo inexistente. Supabase e
+ * S3 usam clientes de mentira no lugar dos SDKs (sem rede).
+ *
+ * Uso: npx tsx scripts/test-file-storage.ts
+ */
+
+import { Readable } from 'stream';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+const OFX = Buffer.from('OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRN><TRNAMT>-10.00</STMTTRN></BANKMSGSRSV1></OFX>\n');
+
+async function readAll(stream: Readable | null): Promise<Buffer | null> {
+  if (!stream) return null;
+  const chunks: Buffer[] = [];
+  for await (const chunk of stream) chunks.push(Buffer.from(chunk));
+  return Buffer.concat(chunks);
+}
+
+async function runTests() {
+  const { FileStorageService } = await import('@/lib/storage/file-storage.service');
+  type Storage = InstanceType<typeof FileStorageService>;
+
+  // Instância com provider/clientes definidos pelo teste (o construtor lê o ambiente)
+  const withProvider = (fields: Record<string, unknown>): Storage =>
+    Object.assign(Object.create(FileStorageService.prototype), {
+      storageBasePath: '/nao-existe',
+      bucketName: 'ofx-files-s3',
+      supabaseClient: null,
+      s3Client: null,
+      ...fields
+    });
+
+  const checkProvider = async (storage: Storage, path: string) => {
+    const name = storage.getProvider();
+    const buffer = await storage.readFile(path);
+    assert(!!buffer && buffer.equals(OFX), `${name}: readFile devolve o arquivo gravado`);
+
+    const streamed = await readAll(await storage.openReadStream(path));
+    assert(!!streamed && streamed.equals(OFX), `${name}: openReadStream devolve o arquivo gravado`);
+
+    assert(await storage.readFile(`${path}.inexistente`) === null, `${name}: readFile de arquivo inexistente → null`);
+    assert(await storage.openReadStream(`${path}.inexistente`) === null, `${name}: openReadStream de arquivo inexistente → null`);
+  };
+
+  console.log('--- File Storage Tests ---\n');
+
+  // ============================================================
+  // TESTE 1: Filesystem
+  // ============================================================
+  console.log('>> Teste 1: Filesystem');
+
+  const filesystem = FileStorageService.getInstance();
+  if (filesystem.getProvider() !== 'filesystem') {
+    console.log(`ℹ️  Provider do ambiente é ${filesystem.getProvider()}: teste de filesystem pulado`);
+  } else {
+    const saved = await filesystem.saveOFXFile(OFX, 'teste-storage.ofx', 'test-company-file-storage');
+    assert(saved.success && !!saved.filePath, 'Arquivo salvo');
+    try {
+      await checkProvider(filesystem, saved.filePath!);
+    } finally {
+      if (saved.filePath) await filesystem.deleteFile(saved.filePath);
+    }
+  }
+
+  // ============================================================
+  // TESTE 2: Supabase
+  // ============================================================
+  console.log('\n>> Teste 2: Supabase');
+
+  const supabasePath = 'ofx/test-company/2026-10/arquivo.ofx';
+  const buckets: string[] = [];
+  const supabase = withProvider({
+    provider: 'supabase',
+    supabaseClient: {
+      storage: {
+        from: (bucket: string) => ({
+          download: async (path: string) => {
+            buckets.push(bucket);
+            return bucket === 'ofx-files' && path === supabasePath
+              ? { data: new Blob([OFX]), error: null }
+              : { data: null, error: { message: 'Object not found' } };
+          }
+        })
+      }
+    }
+  });
+
+  await checkProvider(supabase, supabasePath);
+  assert(buckets.every(bucket => bucket === 'ofx-files'), 'Lê do mesmo bucket em que saveToSupabase grava');
+
+  // ============================================================
+  // TESTE 3: S3
+  // ============================================================
+  console.log('\n>> Teste 3: S3');
+
+  const s3Path = 'ofx/test-company/2026-10/arquivo-s3.ofx';
+  const s3 = withProvider({
+    provider: 's3',
+    s3Client: {
+      send: async (command: { input: { Bucket: string; Key: string } }) => {
+        if (command.input.Bucket !== 'ofx-files-s3' || command.input.Key !== s3Path) {
+          throw Object.assign(new Error('NoSuchKey'), { name: 'NoSuchKey' });
+        }
+        return {
+          Body: Object.assign(Readable.from([OFX]), {
+            transformToByteArray: async () => new Uint8Array(OFX)
+          })
+        };
+      }
+    }
+  });
+
+  await checkProvider(s3, s3Path);
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests();
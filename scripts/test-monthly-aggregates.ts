@@ -0,0 +1,286 @@
+/**
+ * Test: Agregados mensais (MonthlyAggregatesService + triggers)
+ *
+ * Verifica a divisão do período em meses inteiros e pontas parciais
+ * (splitPeriod) e, contra o Postgres, que financeai_transaction_monthly_aggregates
+ * bate com um SUM direto sobre transações + splits depois de insert, update de
+ * categoria/valor/data, delete e mudanças nos splits. Usa uma empresa de teste
+ * com ids fixos e remove tudo no final.
+ *
+ * Requer scripts/apply-monthly-aggregates-migration.ts aplicado.
+ *
+ * Uso: npx tsx scripts/test-monthly-aggregates.ts
+ */
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+
+import { sql } from 'drizzle-orm';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+const COMPANY_ID = 'a9a9a9a9-0000-4000-8000-000000000001';
+const ACCOUNT_ID = 'a9a9a9a9-0000-4000-8000-000000000002';
+const CATEGORY_A_ID = 'a9a9a9a9-0000-4000-8000-000000000003';
+const CATEGORY_B_ID = 'a9a9a9a9-0000-4000-8000-000000000004';
+const TX_1_ID = 'a9a9a9a9-0000-4000-8000-000000000011';
+const TX_2_ID = 'a9a9a9a9-0000-4000-8000-000000000012';
+const TX_3_ID = 'a9a9a9a9-0000-4000-8000-000000000013';
+const SPLIT_1_ID = 'a9a9a9a9-0000-4000-8000-000000000021';
+const SPLIT_2_ID = 'a9a9a9a9-0000-4000-8000-000000000022';
+
+async function runTests() {
+  const { db } = await import('@/lib/db/drizzle');
+  const { default: MonthlyAggregatesService } = await import('@/lib/services/monthly-aggregates.service');
+
+  console.log('--- Monthly Aggregates Tests ---\n');
+
+  // ============================================================
+  // TESTE 1: splitPeriod
+  // ============================================================
+  console.log('>> Teste 1: Divisão do período (splitPeriod)');
+
+  const split = (start?: string, end?: string) => JSON.stringify(MonthlyAggregatesService.splitPeriod(start, end));
+  const expected = (value: unknown) => JSON.stringify(value);
+
+  assert(
+    split('2024-01-01', '2024-03-31') === expected({ months: { start: '2024-01-01', end: '2024-03-31' }, partial: [] }),
+    'Meses inteiros: tudo dos agregados'
+  );
+  assert(
+    split('2024-01-15', '2024-03-31') === expected({
+      months: { start: '2024-02-01', end: '2024-03-31' },
+      partial: [{ start: '2024-01-15', end: '2024-01-31' }]
+    }),
+    'Primeiro mês parcial vai para as transações'
+  );
+  assert(
+    split('2024-01-01', '2024-03-10') === expected({
+      months: { start: '2024-01-01', end: '2024-02-29' },
+      partial: [{ start: '2024-03-01', end: '2024-03-10' }]
+    }),
+    'Último mês parcial vai para as transações (fevereiro bissexto)'
+  );
+  assert(
+    split('2024-01-15', '2024-03-10') === expected({
+      months: { start: '2024-02-01', end: '2024-02-29' },
+      partial: [{ start: '2024-01-15', end: '2024-01-31' }, { start: '2024-03-01', end: '2024-03-10' }]
+    }),
+    'Duas pontas parciais em volta de um mês inteiro'
+  );
+  assert(
+    split('2024-05-20', '2024-05-20') === expected({ months: null, partial: [{ start: '2024-05-20', end: '2024-05-20' }] }),
+    'Um único dia: só transações'
+  );
+  assert(
+    split('2024-05-10', '2024-05-20') === expected({ months: null, partial: [{ start: '2024-05-10', end: '2024-05-20' }] }),
+    'Período dentro de um mês: só transações'
+  );
+  assert(
+    split('2024-12-10', '2025-01-20') === expected({ months: null, partial: [{ start: '2024-12-10', end: '2025-01-20' }] }),
+    'Virada de ano sem mês inteiro: só transações'
+  );
+  assert(
+    split('2024-12-10', '2025-02-28') === expected({
+      months: { start: '2025-01-01', end: '2025-02-28' },
+      partial: [{ start: '2024-12-10', end: '2024-12-31' }]
+    }),
+    'Virada de ano: dezembro parcial, janeiro e fevereiro inteiros'
+  );
+  assert(
+    split('2024-11-01', '2025-01-05') === expected({
+      months: { start: '2024-11-01', end: '2024-12-31' },
+      partial: [{ start: '2025-01-01', end: '2025-01-05' }]
+    }),
+    'Virada de ano: janeiro parcial no fim'
+  );
+  assert(
+    split(undefined, '2024-03-10') === expected({
+      months: { start: undefined, end: '2024-02-29' },
+      partial: [{ start: '2024-03-01', end: '2024-03-10' }]
+    }),
+    'Sem data inicial: agregados até o último mês inteiro'
+  );
+  assert(
+    split('2024-03', '2024-04-30') === expected({ months: null, partial: [{ start: '2024-03', end: '2024-04-30' }] }),
+    'Data fora de YYYY-MM-DD: só transações'
+  );
+
+  // ============================================================
+  // Dados de teste
+  // ============================================================
+  const cleanup = async () => {
+    await db.execute(sql`DELETE FROM financeai_transactions WHERE account_id = ${ACCOUNT_ID}`);
+    await db.execute(sql`DELETE FROM financeai_transaction_monthly_aggregates WHERE account_id = ${ACCOUNT_ID}`);
+    await db.execute(sql`DELETE FROM financeai_categories WHERE id IN (${CATEGORY_A_ID}, ${CATEGORY_B_ID})`);
+    await db.execute(sql`DELETE FROM financeai_accounts WHERE id = ${ACCOUNT_ID}`);
+    await db.execute(sql`DELETE FROM financeai_companies WHERE id = ${COMPANY_ID}`);
+  };
+
+  // (categoria, mês) → total/quantidade, pelos agregados
+  const fromAggregates = async () => {
+    const result = await db.execute(sql`
+      SELECT category_id, to_char(month, 'YYYY-MM-DD') AS month,
+             SUM(total_amount) AS total, SUM(abs_amount) AS abs_total, SUM(transaction_count) AS count
+      FROM financeai_transaction_monthly_aggregates
+      WHERE account_id = ${ACCOUNT_ID} AND transaction_count > 0
+      GROUP BY category_id, month
+    `);
+    return serialize(result.rows);
+  };
+
+  // O mesmo, somando direto transações sem splits + splits
+  const fromTransactions = async () => {
+    const result = await db.execute(sql`
+      SELECT category_id, to_char(date_trunc('month', transaction_date), 'YYYY-MM-DD') AS month,
+             SUM(amount) AS total, SUM(ABS(amount)) AS abs_total, COUNT(*) AS count
+      FROM (
+        SELECT t.category_id, t.amount, t.transaction_date
+        FROM financeai_transactions t
+        WHERE t.account_id = ${ACCOUNT_ID}
+          AND NOT EXISTS (SELECT 1 FROM financeai_transaction_splits s WHERE s.transaction_id = t.id)
+        UNION ALL
+        SELECT s.category_id, s.amount, t.transaction_date
+        FROM financeai_transaction_splits s
+        JOIN financeai_transactions t ON t.id = s.transaction_id
+        WHERE t.account_id = ${ACCOUNT_ID}
+      ) combined
+      GROUP BY 1, 2
+    `);
+    return serialize(result.rows);
+  };
+
+  const serialize = (rows: Record<string, unknown>[]) => JSON.stringify(
+    rows
+      .map(r => `${r.category_id ?? '-'}|${r.month}|${Number(r.total).toFixed(2)}|${Number(r.abs_total).toFixed(2)}|${Number(r.count)}`)
+      .sort()
+  );
+
+  const checkTotals = async (label: string) => {
+    const [aggregates, direct] = await Promise.all([fromAggregates(), fromTransactions()]);
+    assert(aggregates === direct, `${label}: agregados = SUM direto`);
+    if (aggregates !== direct) {
+      console.error(`   agregados: ${aggregates}\n   direto:    ${direct}`);
+    }
+  };
+
+  await cleanup();
+
+  try {
+    await db.execute(sql`INSERT INTO financeai_companies (id, name) VALUES (${COMPANY_ID}, 'Teste Agregados')`);
+    await db.execute(sql`
+      INSERT INTO financeai_accounts (id, company_id, name, bank_name, bank_code, account_number)
+      VALUES (${ACCOUNT_ID}, ${COMPANY_ID}, 'Conta Agregados', 'Banco Agregados', '000', '0')
+    `);
+    await db.execute(sql`
+      INSERT INTO financeai_categories (id, company_id, name, type)
+      VALUES (${CATEGORY_A_ID}, ${COMPANY_ID}, 'Aluguel Teste', 'fixed_cost'),
+             (${CATEGORY_B_ID}, ${COMPANY_ID}, 'Energia Teste', 'variable_cost')
+    `);
+
+    // ============================================================
+    // TESTE 2: Insert
+    // ============================================================
+    console.log('\n>> Teste 2: Insert');
+
+    await db.execute(sql`
+      INSERT INTO financeai_transactions (id, account_id, category_id, description, amount, type, transaction_date)
+      VALUES (${TX_1_ID}, ${ACCOUNT_ID}, ${CATEGORY_A_ID}, 'ALUGUEL SALA', -1000.00, 'debit', '2024-12-15'),
+             (${TX_2_ID}, ${ACCOUNT_ID}, ${CATEGORY_B_ID}, 'CEMIG ENERGIA', -250.50, 'debit', '2025-01-10'),
+             (${TX_3_ID}, ${ACCOUNT_ID}, NULL, 'PIX RECEBIDO', 800.00, 'credit', '2025-01-20')
+    `);
+    await checkTotals('Após insert');
+
+    // ============================================================
+    // TESTE 3: Update de categoria, valor e data
+    // ============================================================
+    console.log('\n>> Teste 3: Update');
+
+    await db.execute(sql`UPDATE financeai_transactions SET category_id = ${CATEGORY_B_ID} WHERE id = ${TX_1_ID}`);
+    await checkTotals('Categoria alterada');
+
+    await db.execute(sql`UPDATE financeai_transactions SET amount = -1200.00 WHERE id = ${TX_1_ID}`);
+    await checkTotals('Valor alterado');
+
+    await db.execute(sql`UPDATE financeai_transactions SET transaction_date = '2025-01-05' WHERE id = ${TX_1_ID}`);
+    await checkTotals('Data alterada (muda de mês e de ano)');
+
+    await db.execute(sql`UPDATE financeai_transactions SET category_id = ${CATEGORY_A_ID} WHERE id = ${TX_3_ID}`);
+    await checkTotals('Categoria atribuída a transação sem categoria');
+
+    // ============================================================
+    // TESTE 4: Splits
+    // ============================================================
+    console.log('\n>> Teste 4: Splits');
+
+    await db.execute(sql`
+      INSERT INTO financeai_transaction_splits (id, transaction_id, category_id, amount, description)
+      VALUES (${SPLIT_1_ID}, ${TX_2_ID}, ${CATEGORY_A_ID}, -150.50, 'Parte aluguel'),
+             (${SPLIT_2_ID}, ${TX_2_ID}, ${CATEGORY_B_ID}, -100.00, 'Parte energia')
+    `);
+    await checkTotals('Splits inseridos substituem a transação');
+
+    await db.execute(sql`UPDATE financeai_transaction_splits SET amount = -120.00, category_id = ${CATEGORY_B_ID} WHERE id = ${SPLIT_1_ID}`);
+    await checkTotals('Split com valor e categoria alterados');
+
+    await db.execute(sql`UPDATE financeai_transactions SET transaction_date = '2024-11-30' WHERE id = ${TX_2_ID}`);
+    await checkTotals('Transação com splits muda de mês');
+
+    await db.execute(sql`DELETE FROM financeai_transaction_splits WHERE id = ${SPLIT_2_ID}`);
+    await checkTotals('Um split removido');
+
+    await db.execute(sql`DELETE FROM financeai_transaction_splits WHERE id = ${SPLIT_1_ID}`);
+    await checkTotals('Último split removido: transação volta a contar');
+
+    // ============================================================
+    // TESTE 5: Delete
+    // ============================================================
+    console.log('\n>> Teste 5: Delete');
+
+    await db.execute(sql`DELETE FROM financeai_transactions WHERE id = ${TX_3_ID}`);
+    await checkTotals('Transação removida');
+
+    // ============================================================
+    // TESTE 6: Leitura pelo serviço (meses inteiros + pontas parciais)
+    // ============================================================
+    console.log('\n>> Teste 6: getTotals com pontas parciais');
+
+    const filters = { companyId: COMPANY_ID, accountId: ACCOUNT_ID, startDate: '2024-11-15', endDate: '2025-01-07' };
+    const totals = await MonthlyAggregatesService.getTotals(filters);
+    const direct = (await db.execute(sql`
+      SELECT COALESCE(SUM(amount), 0) AS total, COUNT(*) AS count
+      FROM financeai_transactions
+      WHERE account_id = ${ACCOUNT_ID} AND transaction_date BETWEEN ${filters.startDate} AND ${filters.endDate}
+    `)).rows[0];
+    assert(
+      totals.amount.toFixed(2) === Number(direct.total).toFixed(2) && totals.transactionCount === Number(direct.count),
+      `Total de ${filters.startDate} a ${filters.endDate} = SUM direto`
+    );
+
+    const otherBank = await MonthlyAggregatesService.getTotals({ ...filters, bankName: ['Banco Agregados', 'Outro Banco'] });
+    assert(otherBank.transactionCount === 0, 'Nomes de banco diferentes se somam como AND');
+  } finally {
+    await cleanup();
+  }
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests()
+  .then(() => process.exit())
+  .catch(err => {
+    console.error(err);
+    process.exit(1);
+  });
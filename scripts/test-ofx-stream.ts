@@ -0,0 +1,107 @@
+/**
+ * Test: OFXStreamReader x parseOFXFile
+ *
+ * Nos .ofx de exemplo do repositório, verifica que o leitor incremental
+ * devolve as mesmas transações, bankInfo, saldo e período que parseOFXFile,
+ * em qualquer tamanho de chunk. As transações do leitor saem na ordem do
+ * arquivo (parseOFXFile ordena por data): é essa a ordem de lastProcessedIndex
+ * nos uploads da fila, e por isso a retomada confere a última linha gravada
+ * antes de pular linhas (AsyncUploadProcessorService.resumeIndexMatchesFile).
+ *
+ * Uso: npx tsx scripts/test-ofx-stream.ts
+ */
+
+process.env.LOG_LEVEL ??= 'silent';
+
+import fs from 'fs';
+import path from 'path';
+import type { OFXTransaction } from '@/lib/ofx-parser';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+function sampleFiles(): string[] {
+  return [
+    ...fs.readdirSync('.').filter(f => f.endsWith('.ofx')),
+    ...fs.readdirSync('ofx-extratos-ago2023').map(f => path.join('ofx-extratos-ago2023', f))
+  ];
+}
+
+// Fonte com chunks de tamanho fixo (força tags divididas entre chunks)
+async function* chunked(bytes: Buffer, size: number): AsyncGenerator<Uint8Array> {
+  for (let i = 0; i < bytes.length; i += size) {
+    yield bytes.subarray(i, i + size);
+  }
+}
+
+// Mesma ordenação de parseOFXFile (sort estável por data)
+function byDate(transactions: OFXTransaction[]): OFXTransaction[] {
+  return [...transactions].sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+}
+
+async function runTests() {
+  const { parseOFXFile, OFXStreamReader } = await import('@/lib/ofx-parser');
+
+  console.log('--- OFX Stream Reader Tests ---\n');
+
+  let reordered = 0;
+
+  for (const file of sampleFiles()) {
+    console.log(`>> ${path.basename(file)}`);
+
+    const bytes = fs.readFileSync(file);
+    const parsed = await parseOFXFile(bytes.toString('utf-8'));
+
+    for (const chunkSize of [7, 4096, 64 * 1024]) {
+      const reader = new OFXStreamReader(chunked(bytes, chunkSize));
+      const streamed: OFXTransaction[] = [];
+      for await (const tx of reader) streamed.push(tx);
+
+      assert(
+        streamed.length === parsed.transactions.length &&
+        JSON.stringify(byDate(streamed)) === JSON.stringify(parsed.transactions),
+        `chunk ${chunkSize}B: ${streamed.length} transações iguais às de parseOFXFile (após ordenar por data)`
+      );
+      assert(
+        JSON.stringify(reader.bankInfo) === JSON.stringify(parsed.bankInfo) &&
+        JSON.stringify(reader.balance) === JSON.stringify(parsed.balance) &&
+        reader.startDate === parsed.startDate &&
+        reader.endDate === parsed.endDate,
+        `chunk ${chunkSize}B: bankInfo, saldo e período iguais`
+      );
+
+      if (chunkSize === 4096) {
+        // Ordem do arquivo: mesma sequência de FITIDs do texto
+        const fileFitids = Array.from(bytes.toString('utf-8').matchAll(/<FITID>\s*([^<\r\n]+)/gi), m => m[1].trim());
+        const streamedFitids = streamed.map(tx => tx.fitid).filter(Boolean);
+        if (streamedFitids.length === fileFitids.length) {
+          assert(
+            streamedFitids.every((fitid, i) => fitid === fileFitids[i]),
+            'Transações na ordem do arquivo'
+          );
+        }
+        if (streamed.some((tx, i) => JSON.stringify(tx) !== JSON.stringify(parsed.transactions[i]))) {
+          reordered++;
+        }
+      }
+    }
+    console.log('');
+  }
+
+  console.log(`ℹ️  ${reordered} arquivo(s) com ordem do arquivo diferente da ordem por data`);
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests();
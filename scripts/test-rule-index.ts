@@ -0,0 +1,159 @@
+/**
+ * Test: Índice compilado de regras (RuleIndexService)
+ *
+ * Verifica que o CompiledRuleIndex escolhe a mesma regra que o caminho
+ * linear do RuleScoringService (tipos, campos memo/name, desempate e
+ * fallback de regex inválido), que o filtro de movimento é respeitado e
+ * que invalidate() durante um build não descarta o build seguinte.
+ *
+ * Uso: npx tsx scripts/test-rule-index.ts
+ */
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+// O serviço importa a conexão (pool lazy); este teste não faz queries.
+process.env.DATABASE_URL ??= 'postgres://test@localhost/test';
+
+import type { CategoryRule, Category } from '@/lib/db/schema';
+import type { TransactionContext } from '@/lib/services/rule-scoring.service';
+
+function assert(condition: boolean, label: string) {
+  if (condition) {
+    console.log(`✅ ${label}`);
+  } else {
+    console.error(`❌ FALHOU: ${label}`);
+    process.exitCode = 1;
+  }
+}
+
+const CATEGORY_COST = { id: 'cat-cost', name: 'Energia', type: 'fixed_cost', dreGroup: 'CF' } as Category;
+const CATEGORY_REVENUE = { id: 'cat-rev', name: 'Vendas', type: 'revenue', dreGroup: 'RoB' } as Category;
+
+function row(id: string, rulePattern: string, ruleType: string, confidenceScore = '0.80', category = CATEGORY_COST) {
+  return {
+    financeai_category_rules: {
+      id,
+      categoryId: category.id,
+      companyId: 'test-company-rule-index',
+      rulePattern,
+      ruleType,
+      confidenceScore,
+      active: true,
+      usageCount: 0,
+      status: 'active'
+    } as CategoryRule,
+    financeai_categories: category
+  };
+}
+
+async function runTests() {
+  const { RuleScoringService } = await import('@/lib/services/rule-scoring.service');
+  const { CompiledRuleIndex } = await import('@/lib/services/rule-index.service');
+
+  console.log('--- Rule Index Tests ---\n');
+
+  const rows = [
+    row('r-exact', 'CEMIG ENERGIA', 'exact', '0.90'),
+    row('r-contains', 'cemig', 'contains', '0.90'),
+    row('r-contains-tie', 'energia', 'contains', '0.90'),
+    row('r-wildcard', 'pix*posto*', 'wildcard', '0.85'),
+    row('r-regex', '^ted\\s+\\d+', 'regex', '0.85'),
+    row('r-regex-invalid', 'boleto(', 'regex', '0.95'),
+    row('r-tokens', 'aluguel sala', 'tokens', '0.85'),
+    row('r-short', 'xp', 'contains', '0.70'),
+    row('r-revenue', 'venda', 'contains', '0.95', CATEGORY_REVENUE)
+  ];
+  const rules = rows.map(r => r.financeai_category_rules);
+  const index = new CompiledRuleIndex(rows);
+
+  const contexts: TransactionContext[] = [
+    { description: 'CEMIG ENERGIA' },
+    { description: 'PAGTO CEMIG ENERGIA 123' },
+    { description: 'PIX ENVIADO AUTO POSTO SHELL' },
+    { description: 'TED 12345 FORNECEDOR' },
+    { description: 'PAGAMENTO BOLETO( 999' },
+    { description: 'SALA COMERCIAL ALUGUEL' },
+    { description: 'INVEST XP' },
+    { description: 'DEBITO AUTOMATICO', memo: 'conta cemig' },
+    { description: 'SEM REGRA NENHUMA' }
+  ];
+
+  // ============================================================
+  // TESTE 1: Equivalência com o caminho linear
+  // ============================================================
+  console.log('>> Teste 1: Mesma regra e mesmo texto que o RuleScoringService');
+
+  for (const context of contexts) {
+    const linear = RuleScoringService.findBestMatch(rules, context);
+    const indexed = index.findBestMatch(context);
+    assert(
+      (linear?.ruleId ?? null) === (indexed?.ruleId ?? null) &&
+      (linear?.matchedText ?? '') === (indexed?.matchedText ?? ''),
+      `"${context.description}" → ${indexed?.ruleId ?? 'sem match'}`
+    );
+  }
+
+  // ============================================================
+  // TESTE 2: Desempate segue a ordem original
+  // ============================================================
+  console.log('\n>> Teste 2: Desempate pela ordem das regras');
+
+  const tie = index.findBestMatch({ description: 'CONTA ENERGIA CEMIG' });
+  assert(tie?.ruleId === 'r-contains', 'Empate de score resolve para a primeira regra');
+
+  // ============================================================
+  // TESTE 3: Filtro de movimento
+  // ============================================================
+  console.log('\n>> Teste 3: Filtro de candidatas');
+
+  const unfiltered = index.findBestMatch({ description: 'VENDA CEMIG' });
+  assert(unfiltered?.ruleId === 'r-revenue', 'Sem filtro, regra de receita vence (maior confiança)');
+
+  const filtered = index.findBestMatch(
+    { description: 'VENDA CEMIG' },
+    entry => entry.category.type !== 'revenue'
+  );
+  assert(filtered?.ruleId === 'r-contains', 'Com filtro, regra de receita é descartada');
+
+  // ============================================================
+  // TESTE 4: Build obsoleto não derruba o build mais novo
+  // ============================================================
+  console.log('\n>> Teste 4: invalidate() durante um build');
+
+  const { RuleIndexService } = await import('@/lib/services/rule-index.service');
+  const service = RuleIndexService as unknown as {
+    loadRules: (companyId: string) => Promise<typeof rows>;
+    pending: Map<string, Promise<unknown>>;
+  };
+  const releases: Array<() => void> = [];
+  let loads = 0;
+  service.loadRules = () => {
+    loads++;
+    return new Promise(resolve => releases.push(() => resolve(rows)));
+  };
+
+  const companyId = 'test-company-rule-index';
+  const stale = RuleIndexService.getIndex(companyId);
+  RuleIndexService.invalidate(companyId);
+  const fresh = RuleIndexService.getIndex(companyId);
+
+  releases[0]();
+  await stale;
+  assert(service.pending.has(companyId), 'Build obsoleto mantém o build novo em pending');
+
+  const shared = RuleIndexService.getIndex(companyId);
+  assert(loads === 2, 'Chamada concorrente reaproveita o build novo (sem nova carga)');
+
+  releases[1]();
+  await Promise.all([fresh, shared]);
+  assert(!service.pending.has(companyId), 'Build novo sai de pending ao terminar');
+
+  console.log('\n--- Resultado Final ---');
+  if (process.exitCode === 1) {
+    console.error('\n⛔ Alguns testes falharam!');
+  } else {
+    console.log('\n🎉 Todos os testes passaram!');
+  }
+}
+
+runTests();
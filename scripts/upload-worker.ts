@@ -0,0 +1,35 @@
+/**
+ * Worker dedicado da fila de uploads
+ *
+ * Consome a mesma fila (financeai_uploads) que os processos Next.js, para
+ * escalar o processamento em mais núcleos/nós sem servir HTTP.
+ *
+ * Uso: UPLOAD_WORKER_CONCURRENCY=4 npx tsx scripts/upload-worker.ts
+ */
+
+import { config } from 'dotenv';
+config({ path: '.env.local' });
+
+async function main() {
+  const { default: asyncUploadProcessor } = await import('@/lib/services/async-upload-processor.service');
+
+  asyncUploadProcessor.start();
+  console.log('🚀 Worker de uploads iniciado (Ctrl+C para parar)');
+
+  const shutdown = () => {
+    console.log('\n⏹️  Parando de reivindicar uploads...');
+    asyncUploadProcessor.stop();
+    // Uploads em andamento que não terminarem serão retomados por outro worker após o heartbeat vencer
+    setTimeout(() => process.exit(0), 1000);
+  };
+  process.on('SIGINT', shutdown);
+  process.on('SIGTERM', shutdown);
+
+  // Mantém o processo vivo (o timer de polling usa unref)
+  setInterval(() => {}, 60 * 60 * 1000);
+}
+
+main().catch(err => {
+  console.error(err);
+  process.exit(1);
+});